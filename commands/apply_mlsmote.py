@@ -8,7 +8,73 @@ from sentence_transformers import SentenceTransformer
 from sklearn.neighbors import NearestNeighbors
 from skmultilearn.model_selection import iterative_train_test_split
 
+from utils.embedding_store import (
+    SAMPLE_WEIGHT_COLUMN,
+    load_embedding_store,
+    load_sample_weights,
+    read_meta,
+)
+from utils.encoding import DEFAULT_TOKEN_BUDGET, EncodingService
+from utils.instrumentation import instrumented, record_rows
+
+
+def mlsmote_samples(X_train, y_train, k=5, samples_per_class=200, seed=42, sample_weight=None):
+    """
+    Generates up to samples_per_class synthetic rows per minority label by
+    interpolating between a sample of that label and one of its k nearest
+    neighbours. Synthetic labels are the union of both, minus the majority class.
+    Label frequencies count each row sample_weight times when given.
+    Returns the synthetic features, labels and the majority class index.
+    """
+    if sample_weight is None:
+        label_sums = np.sum(y_train, axis=0)
+    else:
+        label_sums = np.asarray(sample_weight) @ y_train
+    majority_class_idx = int(np.argmax(label_sums))
+
+    label_gap = {
+        i: max(0, int(label_sums[majority_class_idx] - label_sums[i]))
+        for i in range(y_train.shape[1])
+        if i != majority_class_idx
+    }
+    total_needed = {
+        i: min(samples_per_class, gap) for i, gap in label_gap.items() if gap > 0
+    }
+
+    nn = NearestNeighbors(n_neighbors=k + 1, metric="cosine").fit(X_train)
+    neighbors = nn.kneighbors(X_train, return_distance=False)
+
+    synthetic_X = []
+    synthetic_y = []
+
+    np.random.seed(seed)
+    for class_idx, count in total_needed.items():
+        class_indices = np.where(y_train[:, class_idx] == 1)[0]
+        for _ in range(count):
+            if len(class_indices) == 0:
+                continue
+            idx = np.random.choice(class_indices)
+            ref_vec = X_train[idx]
+            ref_label = y_train[idx]
+
+            neighbor_idx = np.random.choice(neighbors[idx][1:])
+            neighbor_vec = X_train[neighbor_idx]
+            neighbor_label = y_train[neighbor_idx]
+
+            lam = np.random.rand()
+            synth_vec = ref_vec + lam * (neighbor_vec - ref_vec)
+            synth_label = np.maximum(ref_label, neighbor_label)
+
+            # Exclude majority class from synthetic label
+            synth_label[majority_class_idx] = 0
+
+            synthetic_X.append(synth_vec)
+            synthetic_y.append(synth_label)
+
+    return synthetic_X, synthetic_y, majority_class_idx
+
 
+@instrumented
 @click.command()
 @click.option(
     "--input-file",
@@ -43,26 +109,65 @@ from skmultilearn.model_selection import iterative_train_test_split
     default=200,
     help="Number of synthetic samples to generate per underrepresented class.",
 )
+@click.option(
+    "--token-budget",
+    default=DEFAULT_TOKEN_BUDGET,
+    help="Padded tokens per encoder batch (messages are batched by length).",
+)
+@click.option(
+    "--embeddings-dir",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+    help="Use the memory-mapped matrix written by embed-corpus instead of encoding again.",
+)
 def apply_mlsmote(
-    input_file, output_file, vectorizer_file, model_name, k, samples_per_class
+    input_file,
+    output_file,
+    vectorizer_file,
+    model_name,
+    k,
+    samples_per_class,
+    token_budget,
+    embeddings_dir,
 ):
     """
     Applies approximated MLSMOTE to commit message dataset using Sentence-BERT embeddings,
     while excluding the majority class from oversampling and synthetic label assignment.
     """
-    click.echo(f"📥 Loading data from {input_file}...")
-    df = pd.read_csv(input_file)
-    label_cols = [col for col in df.columns if col.startswith("DEMPE_Class_")]
-    click.echo(f"🧷 Identified label columns: {label_cols}")
-
-    df = df[df[label_cols].sum(axis=1) > 0]
-
-    click.echo(f"🤖 Loading Sentence-BERT model: {model_name}...")
-    model = SentenceTransformer(model_name)
-
-    click.echo("🔢 Encoding commit messages into dense vectors...")
-    X = model.encode(df["Commit Message"].astype(str).tolist(), show_progress_bar=True)
-    y = df[label_cols].values
+    if embeddings_dir:
+        click.echo(f"📥 Memory-mapping embeddings from {embeddings_dir}...")
+        X, y, label_cols = load_embedding_store(embeddings_dir)
+        weights = load_sample_weights(embeddings_dir)
+        model_name = read_meta(embeddings_dir)["model_name"]
+        click.echo(f"🧷 Identified label columns: {label_cols}")
+
+        keep = y.sum(axis=1) > 0
+        X, y = X[keep], y[keep].astype(int)
+        if weights is not None:
+            weights = weights[keep]
+    else:
+        click.echo(f"📥 Loading data from {input_file}...")
+        df = pd.read_csv(input_file)
+        label_cols = [col for col in df.columns if col.startswith("DEMPE_Class_")]
+        click.echo(f"🧷 Identified label columns: {label_cols}")
+
+        df = df[df[label_cols].sum(axis=1) > 0]
+
+        click.echo(f"🤖 Loading Sentence-BERT model: {model_name}...")
+        model = SentenceTransformer(model_name)
+
+        click.echo("🔢 Encoding commit messages into dense vectors...")
+        X = EncodingService(model).encode(
+            df["Commit Message"].astype(str).tolist(),
+            token_budget=token_budget,
+            show_progress_bar=True,
+        )
+        y = df[label_cols].values
+        weights = (
+            df[SAMPLE_WEIGHT_COLUMN].to_numpy(dtype=np.float64)
+            if SAMPLE_WEIGHT_COLUMN in df
+            else None
+        )
 
     os.makedirs(os.path.dirname(vectorizer_file), exist_ok=True)
     with open(vectorizer_file, "w") as f:
@@ -70,63 +175,35 @@ def apply_mlsmote(
     click.echo(f"📁 Saved Sentence-BERT model name reference to: {vectorizer_file}")
 
     click.echo("🔀 Splitting with iterative stratification...")
-    X_train, y_train, _, _ = iterative_train_test_split(np.array(X), y, test_size=0.0)
-
-    click.echo("🧪 Calculating per-label sample counts...")
-    label_sums = np.sum(y_train, axis=0)
-    majority_class_idx = int(np.argmax(label_sums))
-
-    click.echo(
-        f"🚫 Excluding majority class: {label_cols[majority_class_idx]} from oversampling"
+    # Split row indices rather than features, so sample weights follow their rows.
+    order, y_train, _, _ = iterative_train_test_split(
+        np.arange(len(y)).reshape(-1, 1), y, test_size=0.0
     )
-
-    label_gap = {
-        i: max(0, int(label_sums[majority_class_idx] - label_sums[i]))
-        for i in range(len(label_cols))
-        if i != majority_class_idx
-    }
-    total_needed = {
-        i: min(samples_per_class, gap) for i, gap in label_gap.items() if gap > 0
-    }
+    order = order.ravel()
+    X_train = np.asarray(X)[order]
+    w_train = weights[order] if weights is not None else None
+    if w_train is not None:
+        click.echo(f"⚖️ Deduplicated input: {len(order)} rows stand for {int(w_train.sum())} commits")
 
     click.echo("🧪 Generating balanced synthetic samples...")
-    nn = NearestNeighbors(n_neighbors=k + 1, metric="cosine").fit(X_train)
-    neighbors = nn.kneighbors(X_train, return_distance=False)
-
-    synthetic_X = []
-    synthetic_y = []
-
-    np.random.seed(42)
-    for class_idx, count in total_needed.items():
-        class_indices = np.where(y_train[:, class_idx] == 1)[0]
-        for _ in range(count):
-            if len(class_indices) == 0:
-                continue
-            idx = np.random.choice(class_indices)
-            ref_vec = X_train[idx]
-            ref_label = y_train[idx]
-
-            neighbor_idx = np.random.choice(neighbors[idx][1:])
-            neighbor_vec = X_train[neighbor_idx]
-            neighbor_label = y_train[neighbor_idx]
-
-            lam = np.random.rand()
-            synth_vec = ref_vec + lam * (neighbor_vec - ref_vec)
-            synth_label = np.maximum(ref_label, neighbor_label)
-
-            # Exclude majority class from synthetic label
-            synth_label[majority_class_idx] = 0
-
-            synthetic_X.append(synth_vec)
-            synthetic_y.append(synth_label)
+    synthetic_X, synthetic_y, majority_class_idx = mlsmote_samples(
+        X_train, y_train, k=k, samples_per_class=samples_per_class, sample_weight=w_train
+    )
+    click.echo(
+        f"🚫 Excluded majority class: {label_cols[majority_class_idx]} from oversampling"
+    )
 
     click.echo("🧬 Synthetic samples created. Combining with original data...")
     X_final = np.vstack([X_train, np.array(synthetic_X)])
+    record_rows(rows_in=len(X_train), rows_out=len(X_final))
     y_final = np.vstack([y_train, np.array(synthetic_y)])
 
     final_df = pd.DataFrame(X_final, columns=[f"f_{i}" for i in range(X_final.shape[1])])
     for i, col in enumerate(label_cols):
         final_df[col] = y_final[:, i].astype(int)
+    if w_train is not None:
+        # Synthetic rows stand for themselves only.
+        final_df[SAMPLE_WEIGHT_COLUMN] = np.concatenate([w_train, np.ones(len(synthetic_y))])
 
     click.echo("📊 Final label distribution:")
     click.echo(final_df[label_cols].sum().to_string())
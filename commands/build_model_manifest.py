@@ -0,0 +1,44 @@
+import click
+
+from utils.instrumentation import instrumented
+from utils.registry import MANIFEST_FILE, build_manifest, write_manifest
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--manifest-file",
+    default=MANIFEST_FILE,
+    type=click.Path(),
+    help="Where the model manifest is written.",
+)
+@click.option(
+    "--no-benchmark",
+    is_flag=True,
+    help="Skip the load/predict latency benchmarks.",
+)
+def build_model_manifest(manifest_file, no_benchmark):
+    """
+    Records encoder, label columns, thresholds, feature dtype, test metrics and
+    latency benchmarks of every trained model in one manifest.
+    """
+    click.echo("🗂️ Building model manifest...")
+    manifest = build_manifest(benchmark=not no_benchmark)
+
+    for key, entry in manifest["models"].items():
+        line = f"   {key}: {entry['name']}"
+        if "benchmarks" in entry:
+            bench = entry["benchmarks"]
+            line += (
+                f" | load {bench['load_sec']:.2f}s"
+                f" | {bench['predict_one_ms']:.2f} ms/msg"
+                f" | {bench['predict_batch_rows_per_sec']:.0f} rows/s"
+            )
+        click.echo(line)
+
+    write_manifest(manifest, manifest_file)
+    click.echo(f"✅ Manifest with {len(manifest['models'])} model(s) saved to: {manifest_file}")
+
+
+if __name__ == "__main__":
+    build_model_manifest()
@@ -0,0 +1,91 @@
+import time
+
+import click
+import numpy as np
+
+from utils.embedding_store import load_sample_weights
+from utils.helper import load_features_labels, load_model_artifact
+from utils.instrumentation import instrumented
+from utils.metrics import compute_multilabel_metrics
+from utils.registry import refresh_manifest_thresholds
+from utils.thresholds import (
+    apply_thresholds,
+    best_f1_thresholds,
+    predict_scores,
+    save_thresholds,
+)
+
+
+def calibrate_model(model_file, X_cal, y_cal, label_cols, batch_size=8192, sample_weight=None):
+    """
+    Scores the calibration set once, sweeps the per-label F1-optimal thresholds
+    and stores them next to the model. With sample_weight, each row counts as
+    many commits as it stands for. Returns the thresholds and the macro F1
+    reached before and after calibration.
+    """
+    model = load_model_artifact(model_file)
+    scores = predict_scores(model, X_cal, batch_size=batch_size)
+    thresholds, best_f1 = best_f1_thresholds(y_cal, scores, sample_weight=sample_weight)
+    save_thresholds(model_file, thresholds, label_cols, best_f1, len(y_cal))
+
+    before = compute_multilabel_metrics(
+        y_cal, apply_thresholds(scores, getattr(model, "thresholds_", None))
+    )
+    after = compute_multilabel_metrics(y_cal, apply_thresholds(scores, thresholds))
+    return thresholds, before["summary"]["macro_f1"], after["summary"]["macro_f1"]
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--model-file",
+    "model_files",
+    multiple=True,
+    required=True,
+    type=click.Path(exists=True),
+    help="Trained model to calibrate (repeat to calibrate several).",
+)
+@click.option(
+    "--calibration-file",
+    default="data/csv_data/validation_re_sampled_mlsmote.csv",
+    type=click.Path(exists=True),
+    help="Held-out CSV the thresholds are tuned on (see split-train-test --validation-size).",
+)
+@click.option(
+    "--batch-size",
+    default=8192,
+    show_default=True,
+    help="Rows scored per prediction batch.",
+)
+def calibrate_thresholds(model_files, calibration_file, batch_size):
+    """
+    Tunes one F1-optimal decision threshold per label for each model and saves
+    them as <model>_thresholds.json, used by every prediction command.
+    """
+    click.echo(f"📥 Loading calibration data from {calibration_file}...")
+    X_cal, y_cal, label_cols = load_features_labels(calibration_file)
+    X_cal = X_cal.astype(np.float32)
+    w_cal = load_sample_weights(calibration_file)
+    if w_cal is not None:
+        click.echo(f"⚖️ Calibration rows weighted by duplicate count ({int(w_cal.sum())} commits)")
+
+    for model_file in model_files:
+        click.echo(f"🎯 Calibrating {model_file} on {len(X_cal)} rows...")
+        start = time.perf_counter()
+        thresholds, f1_before, f1_after = calibrate_model(
+            model_file, X_cal, y_cal, label_cols, batch_size, sample_weight=w_cal
+        )
+        click.echo(
+            f"⏱️ Done in {time.perf_counter() - start:.2f}s | "
+            f"macro F1 {f1_before:.4f} → {f1_after:.4f}"
+        )
+        for label, threshold in zip(label_cols, thresholds):
+            click.echo(f"   {label}: {threshold:.4f}")
+
+    click.echo("✅ Thresholds saved next to each model artifact.")
+    if refresh_manifest_thresholds():
+        click.echo("🗂️ Model manifest updated with the new thresholds.")
+
+
+if __name__ == "__main__":
+    calibrate_thresholds()
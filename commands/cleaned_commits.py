@@ -3,6 +3,8 @@ import re
 import click
 import pandas as pd
 
+from utils.instrumentation import instrumented, record_rows
+
 
 # Cleaning function
 def clean_text(text):
@@ -20,6 +22,7 @@ def clean_text(text):
     return text.strip()
 
 
+@instrumented
 @click.command()
 @click.option(
     "--input-file",
@@ -46,6 +49,7 @@ def clean_commits(input_file, output_file, nonconv_output):
     """
     click.echo(f"📂 Loading data from {input_file}...")
     df = pd.read_csv(input_file)
+    rows_in = len(df)
 
     # Drop rows with missing messages
     df.dropna(subset=["Commit Message"], inplace=True)
@@ -64,6 +68,7 @@ def clean_commits(input_file, output_file, nonconv_output):
 
     # Save cleaned data
     df.to_csv(output_file, index=False)
+    record_rows(rows_in=rows_in, rows_out=len(df))
     click.echo(f"✅ Cleaned multi-label commits saved to {output_file}")
 
     # Save non-conventional data
@@ -0,0 +1,160 @@
+import json
+import os
+
+import click
+import numpy as np
+import pandas as pd
+
+from utils.dedup import MinHasher, NearDuplicateIndex, SortedKeyMap, exact_keys
+from utils.embedding_store import SAMPLE_WEIGHT_COLUMN
+from utils.instrumentation import instrumented, record_rows
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--input-file",
+    default="data/csv_data/cleaned_commits.csv",
+    type=click.Path(exists=True),
+    help="Path to the cleaned multi-label CSV file.",
+)
+@click.option(
+    "--output-file",
+    default="data/csv_data/deduplicated_commits.csv",
+    type=click.Path(),
+    help="Path to save one row per duplicate cluster, with its size as Sample_Weight.",
+)
+@click.option(
+    "--report-file",
+    default="data/reports/dedup_report.json",
+    type=click.Path(),
+    help="Path to save duplicate counts and the largest clusters.",
+)
+@click.option(
+    "--threshold",
+    default=0.8,
+    show_default=True,
+    help="Estimated Jaccard similarity for near duplicates; 1.0 keeps exact deduplication only.",
+)
+@click.option("--num-perm", default=64, show_default=True, help="MinHash permutations.")
+@click.option(
+    "--bands",
+    default=16,
+    show_default=True,
+    help="LSH bands; more bands find more candidate pairs at lower similarity.",
+)
+@click.option(
+    "--chunk-size",
+    default=100_000,
+    show_default=True,
+    help="Rows read per chunk; the corpus is never loaded whole.",
+)
+def dedup_commits(
+    input_file, output_file, report_file, threshold, num_perm, bands, chunk_size
+):
+    """
+    Collapses exact and near-duplicate commit messages (bot and templated
+    commits) before embedding. Exact duplicates are found by hash, near
+    duplicates with the same labels by MinHash-LSH on character shingles.
+    Each kept row carries the size of its cluster as Sample_Weight, which
+    apply-mlsmote and the trainers use.
+    """
+    hasher = MinHasher(num_perm=num_perm)
+    index = NearDuplicateIndex(num_perm=num_perm, bands=bands, threshold=threshold)
+    near = threshold < 1.0
+
+    # Pass 1: assign every row to a cluster and flag the first row of each
+    # cluster as its leader. Leaders appear in row order, so the k-th leader
+    # belongs to cluster k; one flag byte per row is all pass 2 needs.
+    click.echo(f"🔎 Hashing commit messages from {input_file}...")
+    exact_clusters = SortedKeyMap()
+    weights = np.zeros(0)
+    integral = True
+    leader_flags = []
+    rows_in = 0
+    for chunk in pd.read_csv(input_file, chunksize=chunk_size):
+        label_cols = [col for col in chunk.columns if col.startswith("DEMPE_Class_")]
+        texts = chunk["Commit Message"].fillna("").astype(str).tolist()
+        labels = chunk[label_cols].to_numpy(dtype=np.int8)
+        if SAMPLE_WEIGHT_COLUMN in chunk:
+            row_weights = chunk[SAMPLE_WEIGHT_COLUMN].to_numpy(dtype=np.float64)
+            integral = integral and bool(np.all(row_weights == np.round(row_weights)))
+        else:
+            row_weights = np.ones(len(chunk))
+        keys = exact_keys(chunk[label_cols].assign(text=texts))
+
+        # Only the first occurrence of each message not seen before is
+        # clustered, in row order.
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        unique_clusters = exact_clusters.lookup(unique_keys)
+        new = np.flatnonzero(unique_clusters < 0)
+        new = new[np.argsort(first[new])]
+        rows = first[new]
+        if near:
+            groups = labels[rows].astype(np.uint64) @ (
+                np.uint64(1) << np.arange(len(label_cols), dtype=np.uint64)
+            )
+            signatures = hasher.signatures([texts[i] for i in rows])
+            clusters, created = index.assign(signatures, groups)
+        else:
+            clusters = len(weights) + np.arange(len(rows))
+            created = np.ones(len(rows), dtype=bool)
+        unique_clusters[new] = clusters
+        exact_clusters.insert(unique_keys[new], clusters)
+
+        is_leader = np.zeros(len(chunk), dtype=bool)
+        is_leader[rows[created]] = True
+        leader_flags.append(is_leader)
+        n_clusters = len(weights) + int(created.sum())
+        weights = np.concatenate([weights, np.zeros(n_clusters - len(weights))])
+        weights += np.bincount(
+            unique_clusters[inverse.ravel()], weights=row_weights, minlength=n_clusters
+        )
+        rows_in += len(chunk)
+
+    n_exact_unique = len(exact_clusters)
+    del exact_clusters, index
+    if integral:
+        weights = weights.astype(np.int64)
+
+    # Pass 2: write the leader rows with their cluster weights.
+    click.echo(f"✍️ Writing {len(weights)} clusters to {output_file}...")
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    top = np.argsort(-weights, kind="stable")[:20]
+    top_clusters = []
+    next_cluster = 0
+    chunks = pd.read_csv(input_file, chunksize=chunk_size)
+    for n, (chunk, is_leader) in enumerate(zip(chunks, leader_flags)):
+        leaders = chunk[is_leader].drop(columns=[SAMPLE_WEIGHT_COLUMN], errors="ignore")
+        cluster_ids = np.arange(next_cluster, next_cluster + len(leaders))
+        leaders[SAMPLE_WEIGHT_COLUMN] = weights[cluster_ids]
+        is_top = np.isin(cluster_ids, top)
+        for cluster, text in zip(cluster_ids[is_top], leaders["Commit Message"].fillna("")[is_top]):
+            top_clusters.append({"message": text, "count": weights[cluster].item()})
+        leaders.to_csv(output_file, mode="a" if n else "w", header=not n, index=False)
+        next_cluster += len(leaders)
+
+    record_rows(rows_in=rows_in, rows_out=len(weights))
+    report = {
+        "rows_in": rows_in,
+        "exact_unique": n_exact_unique,
+        "clusters": len(weights),
+        "threshold": threshold,
+        "num_perm": num_perm,
+        "bands": bands,
+        "largest_clusters": sorted(top_clusters, key=lambda c: -c["count"]),
+    }
+    os.makedirs(os.path.dirname(report_file) or ".", exist_ok=True)
+    with open(report_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    click.echo(
+        f"🧹 {rows_in} rows → {n_exact_unique} exact-unique → {len(weights)} clusters "
+        f"({rows_in / max(len(weights), 1):.1f}x fewer rows to embed)"
+    )
+    click.echo(f"✅ Deduplicated commits saved to: {output_file}")
+    click.echo(f"📄 Dedup report saved to: {report_file}")
+
+
+if __name__ == "__main__":
+    dedup_commits()
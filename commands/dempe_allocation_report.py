@@ -0,0 +1,120 @@
+import os
+
+import click
+import pandas as pd
+
+from constants import dempe_class_mapping
+from utils.commit_store import DEFAULT_STORE, DEMPE_CLASSES, PERIOD_EXPRESSIONS, CommitStore
+from utils.instrumentation import instrumented, record_rows
+
+
+def allocation_frame(rows):
+    """
+    Turns allocation rows of CommitStore.allocation into a report table with
+    the commits per DEMPE function and each function's share of the labels
+    assigned in the bucket.
+    """
+    class_names = [dempe_class_mapping[str(k)] for k in DEMPE_CLASSES]
+    df = pd.DataFrame(
+        rows,
+        columns=[
+            "Repository",
+            "Period",
+            "Commits",
+            dempe_class_mapping["Non-conventional"],
+            *class_names,
+        ],
+    )
+    df["Period"] = df["Period"].replace("", "unknown")
+    assigned = df[class_names].sum(axis=1)
+    for name in class_names:
+        df[f"{name} Share"] = (df[name] / assigned.where(assigned > 0)).fillna(0.0).round(4)
+    return df
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--store",
+    default=DEFAULT_STORE,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Commit store holding the predictions (see predict-dempe --store).",
+)
+@click.option(
+    "--model",
+    default=None,
+    help="Prediction model to report on (default: the only model in the store).",
+)
+@click.option(
+    "--period",
+    default="quarter",
+    show_default=True,
+    type=click.Choice(list(PERIOD_EXPRESSIONS)),
+    help="Reporting period the monthly buckets are rolled up to.",
+)
+@click.option("--repo", "repos", multiple=True, help="Only these repositories (repeatable).")
+@click.option("--since", default=None, help="First commit month included, e.g. 2024-01.")
+@click.option(
+    "--until",
+    default=None,
+    help="First commit month excluded, e.g. 2024-04. A date inside a month keeps that month.",
+)
+@click.option(
+    "--output-file",
+    default="data/reports/dempe_allocation.csv",
+    type=click.Path(),
+    help="Where the per-repository allocation table is written.",
+)
+@click.option(
+    "--rebuild",
+    is_flag=True,
+    help="Recompute the buckets from all stored predictions before reporting.",
+)
+def dempe_allocation_report(store, model, period, repos, since, until, output_file, rebuild):
+    """
+    Reports per-repository DEMPE allocation (commits and shares per function)
+    by month, quarter or year, from buckets the store updates as predictions
+    are written.
+    """
+    with CommitStore(store) as commit_store:
+        if rebuild:
+            click.echo("🔁 Rebuilding allocation buckets from all predictions...")
+            commit_store.rebuild_allocation()
+        models = commit_store.allocation_models()
+        if model is None:
+            if len(models) != 1:
+                raise click.UsageError(
+                    f"choose a model with --model: {', '.join(models) or 'no predictions stored'}"
+                )
+            model = models[0]
+        elif model not in models:
+            raise click.BadParameter(
+                f"no predictions of {model} in {store}", param_hint="--model"
+            )
+        rows = commit_store.allocation(model, period, repos, since, until)
+
+    df = allocation_frame(rows)
+    record_rows(rows_in=int(df["Commits"].sum()), rows_out=len(df))
+    if df.empty:
+        click.echo("⚠️ No predicted commits in the selected repositories and periods.")
+        return
+
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    df.to_csv(output_file, index=False)
+
+    # Portfolio totals per period across the selected repositories
+    count_columns = list(df.columns[2 : 4 + len(DEMPE_CLASSES)])
+    summed = df.groupby("Period")[count_columns].sum()
+    totals = allocation_frame(
+        [("all", label, *counts) for label, counts in zip(summed.index, summed.itertuples(index=False))]
+    )
+    click.echo(
+        f"📊 DEMPE allocation of {model} by {period}: "
+        f"{df['Repository'].nunique()} repositories, {int(df['Commits'].sum())} commits"
+    )
+    click.echo(totals.drop(columns=["Repository"]).to_string(index=False))
+    click.echo(f"✅ Allocation report saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    dempe_allocation_report()
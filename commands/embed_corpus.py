@@ -0,0 +1,194 @@
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+import numpy as np
+import pandas as pd
+
+from utils.embedding_store import (
+    EMBEDDINGS_FILE,
+    LABELS_FILE,
+    SAMPLE_WEIGHT_COLUMN,
+    WEIGHTS_FILE,
+    assemble_shards,
+    read_meta,
+    shard_path,
+    write_meta,
+    write_shard,
+)
+from utils.encoding import DEFAULT_TOKEN_BUDGET
+from utils.instrumentation import instrumented, record_rows
+from utils.pipeline import ContentHasher
+
+_WORKER_SERVICE = None
+
+
+def _init_worker(model_name, threads):
+    # Runs once per spawned worker, before torch is imported.
+    global _WORKER_SERVICE
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    from utils.encoding import EncodingService
+
+    torch.set_num_threads(threads)
+    _WORKER_SERVICE = EncodingService(SentenceTransformer(model_name), workers=threads)
+
+
+def _embed_shard(index, texts, path, token_budget):
+    start = time.perf_counter()
+    write_shard(path, _WORKER_SERVICE.encode(texts, token_budget=token_budget))
+    return index, time.perf_counter() - start
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--input-file",
+    default="data/csv_data/cleaned_commits.csv",
+    type=click.Path(exists=True),
+    help="Path to the cleaned multi-label CSV file with commit messages and DEMPE classes.",
+)
+@click.option(
+    "--output-dir",
+    default="data/embeddings",
+    type=click.Path(),
+    help="Directory receiving the shards, the final embedding matrix and labels.",
+)
+@click.option(
+    "--model-name",
+    default="all-MiniLM-L6-v2",
+    help="Pretrained Sentence-BERT model to use (e.g., all-MiniLM-L6-v2).",
+)
+@click.option(
+    "--shard-size",
+    default=20000,
+    show_default=True,
+    help="Messages per shard; finished shards are skipped on restart.",
+)
+@click.option(
+    "--workers",
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="Number of encoder worker processes.",
+)
+@click.option(
+    "--threads-per-worker",
+    default=1,
+    show_default=True,
+    help="Torch/BLAS threads pinned to each worker.",
+)
+@click.option(
+    "--token-budget",
+    default=DEFAULT_TOKEN_BUDGET,
+    help="Padded tokens per encoder batch (messages are batched by length).",
+)
+def embed_corpus(
+    input_file,
+    output_dir,
+    model_name,
+    shard_size,
+    workers,
+    threads_per_worker,
+    token_budget,
+):
+    """
+    Embeds every commit message into a memory-mappable float32 matrix, sharded
+    across worker processes and resumable after a crash.
+    """
+    click.echo(f"📥 Loading data from {input_file}...")
+    df = pd.read_csv(input_file)
+    label_cols = [col for col in df.columns if col.startswith("DEMPE_Class_")]
+    messages = df["Commit Message"].fillna("").astype(str).tolist()
+    n_shards = -(-len(messages) // shard_size)
+    record_rows(rows_in=len(messages), rows_out=len(messages))
+
+    # The content hash keeps shards of a regenerated input from being reused
+    meta = {
+        "input_file": input_file,
+        "input_sha256": ContentHasher().digest(input_file),
+        "model_name": model_name,
+        "n_rows": len(messages),
+        "shard_size": shard_size,
+        "label_columns": label_cols,
+    }
+    if not messages:
+        click.echo("⚠️ No commit messages to embed.")
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    previous = read_meta(output_dir) or {}
+    same_run = all(previous.get(key) == value for key, value in meta.items())
+    if same_run and previous.get("complete"):
+        click.echo(f"✅ Embeddings already complete in {output_dir}")
+        return
+    if previous and not same_run:
+        # Shards and matrix of another corpus, input version, model or shard size cannot be reused.
+        stale = glob.glob(os.path.join(output_dir, "shard_*.npy"))
+        outputs = [os.path.join(output_dir, name) for name in (EMBEDDINGS_FILE, WEIGHTS_FILE)]
+        for path in [*outputs, *stale]:
+            if os.path.exists(path):
+                os.remove(path)
+    write_meta(output_dir, meta)
+
+    pending = [
+        index
+        for index in range(n_shards)
+        if not os.path.exists(shard_path(output_dir, index))
+    ]
+    click.echo(
+        f"🧩 {n_shards} shard(s) of up to {shard_size} messages, "
+        f"{n_shards - len(pending)} already done"
+    )
+
+    if pending:
+        click.echo(
+            f"🤖 Encoding with {model_name} on {workers} worker(s) x "
+            f"{threads_per_worker} thread(s)..."
+        )
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, threads_per_worker),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _embed_shard,
+                    index,
+                    messages[index * shard_size : (index + 1) * shard_size],
+                    shard_path(output_dir, index),
+                    token_budget,
+                )
+                for index in pending
+            ]
+            for future in as_completed(futures):
+                index, seconds = future.result()
+                click.echo(f"   ✅ shard {index} done in {seconds:.1f}s")
+        elapsed = time.perf_counter() - start
+        n_encoded = sum(
+            min(shard_size, len(messages) - index * shard_size) for index in pending
+        )
+        click.echo(f"⏱️ {n_encoded} messages in {elapsed:.1f}s ({n_encoded / elapsed:.0f}/s)")
+
+    dimension = np.load(shard_path(output_dir, 0), mmap_mode="r").shape[1]
+    click.echo("🧱 Assembling shards into one float32 matrix...")
+    assemble_shards(output_dir, n_shards, len(messages), dimension)
+    np.save(os.path.join(output_dir, LABELS_FILE), df[label_cols].values.astype(np.int8))
+    if SAMPLE_WEIGHT_COLUMN in df:
+        # Deduplicated input: keep how many commits each row stands for.
+        weights = df[SAMPLE_WEIGHT_COLUMN].to_numpy(dtype=np.float64)
+        np.save(os.path.join(output_dir, WEIGHTS_FILE), weights)
+    write_meta(output_dir, {**meta, "dimension": int(dimension), "complete": True})
+    click.echo(f"✅ Embeddings ({len(messages)} x {dimension}) saved to: {output_dir}")
+
+
+if __name__ == "__main__":
+    embed_corpus()
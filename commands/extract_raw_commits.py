@@ -7,8 +7,11 @@ from tqdm import tqdm
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn, TaskProgressColumn
 
+from utils.instrumentation import instrumented, record_rows
+
 console = Console()
 
+@instrumented
 @click.command(
     help="""
 Extract commit messages from JSON files in a specified directory and save them to a CSV file.
@@ -84,6 +87,7 @@ def extract_raw_commit_messages(input_folder, output_file):
                 console.log(error_message)
             progress.update(task, advance=1)
 
+    record_rows(rows_in=len(json_files), rows_out=len(commit_messages))
     if not commit_messages:
         console.print("[bold yellow]No commit messages found in the JSON files.[/bold yellow]")
         return
@@ -1,13 +1,42 @@
 import json
 import os
+import random
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import parse_qs, urlsplit
 
 import click
 import requests
 from tqdm import tqdm
 
+from utils.instrumentation import instrumented, record_rows
 
+GITHUB_API_URL = "https://api.github.com"
+# Waits on rate limits do not use up --max-retries; this cap only stops a
+# server that never lifts its limit.
+MAX_RATE_LIMIT_WAITS = 100
+
+# Only the fields the pipeline reads; a fraction of the REST commit object.
+HISTORY_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: $first, after: $cursor) {
+            totalCount
+            pageInfo { hasNextPage endCursor }
+            nodes { oid message authoredDate committedDate author { name email } }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+@instrumented
 @click.command(
     help="""
 Fetch commits from GitHub repositories listed in a JSON file and save them to individual JSON files.
@@ -36,7 +65,48 @@ The input file should be a JSON array where each object contains the following k
     show_default=True,
     help="Path to the folder where fetched commits will be saved.",
 )
-def fetch_commits(input_file, output_folder):
+@click.option(
+    "--api-url",
+    default=GITHUB_API_URL,
+    show_default=True,
+    envvar="GITHUB_API_URL",
+    help="Base URL of the GitHub API, e.g. a local serve-github-standin.",
+)
+@click.option(
+    "--mode",
+    default="rest",
+    show_default=True,
+    type=click.Choice(["rest", "graphql"]),
+    help="rest saves full REST commit objects; graphql fetches only oid, message, dates and author.",
+)
+@click.option(
+    "--workers",
+    default=None,
+    type=int,
+    help="Repositories fetched concurrently (default: the ThreadPoolExecutor default).",
+)
+@click.option(
+    "--per-page",
+    default=100,
+    show_default=True,
+    type=click.IntRange(1, 100),
+    help="Commits requested per page.",
+)
+@click.option(
+    "--max-retries",
+    default=5,
+    show_default=True,
+    help="Retries per request on rate limits, server errors and dropped connections.",
+)
+@click.option(
+    "--retry-backoff",
+    default=1.0,
+    show_default=True,
+    help="Base delay in seconds of the exponential backoff on server errors.",
+)
+def fetch_commits(
+    input_file, output_folder, api_url, mode, workers, per_page, max_retries, retry_backoff
+):
     """
     Fetch commits from GitHub repositories listed in a JSON file and
     save them to JSON files.
@@ -53,19 +123,21 @@ def fetch_commits(input_file, output_folder):
             repos = json.load(file)
 
         if not repos or not isinstance(repos, list):
-            click.echo("The input file is empty or does not contain a valid JSON array.")
-            return
+            raise click.ClickException(
+                "The input file is empty or does not contain a valid JSON array."
+            )
 
         total_repos = len(repos)
+        record_rows(rows_in=total_repos)
         click.echo(f"Found {total_repos} repos to process.")
 
         # Create progress bars for each repo with unique positions
         progress_bars = []
         for i, repo in enumerate(repos):
             bar = tqdm(
-                total=100,
+                total=1,
                 desc=repo["repo_name"].split("/")[-1],
-                unit="%",
+                unit="page",
                 position=i,
                 ascii=" >=",
                 leave=True,  # Keep progress bars after completion
@@ -77,10 +149,21 @@ def fetch_commits(input_file, output_folder):
         # Ensure the output folder exists
         os.makedirs(output_folder, exist_ok=True)
 
+        fetch_repo = fetch_commits_graphql_for_repo if mode == "graphql" else fetch_commits_for_repo
+
         # Use ThreadPoolExecutor for parallel processing
-        with ThreadPoolExecutor() as executor:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
             future_to_repo = {
-                executor.submit(fetch_commits_for_repo, repo, bar, output_folder): (
+                executor.submit(
+                    fetch_repo,
+                    repo,
+                    bar,
+                    output_folder,
+                    api_url,
+                    per_page,
+                    max_retries,
+                    retry_backoff,
+                ): (
                     repo,
                     bar,
                 )
@@ -103,19 +186,97 @@ def fetch_commits(input_file, output_folder):
             else:
                 click.echo(f"ERROR: {message}")
         click.echo("\n")
+    except click.ClickException:
+        raise
     except FileNotFoundError:
-        click.echo("Input file not found. Please provide a valid file path.")
+        raise click.ClickException("Input file not found. Please provide a valid file path.")
     except json.JSONDecodeError:
-        click.echo(
+        raise click.ClickException(
             "Failed to parse the JSON file. Please ensure it is properly formatted."
         )
     except Exception as e:
-        click.echo(f"An unexpected error occurred: {e}")
+        raise click.ClickException(f"An unexpected error occurred: {e}") from e
+
+    # A partial fetch must fail, or the pipeline would cache it as a success
+    failed = sum(not is_success for _, is_success in results)
+    if failed:
+        raise click.ClickException(f"{failed} of {total_repos} repositories failed to fetch")
+
+
+def retry_delay(response, attempt, retry_backoff):
+    """
+    Seconds to wait before retrying a response, or None when it should not be
+    retried: secondary limits honour Retry-After plus up to 50% jitter, so
+    throttled workers do not wake in lockstep, an exhausted primary limit
+    waits for X-RateLimit-Reset and server errors back off exponentially.
+    """
+    if response.status_code in (403, 429):
+        if response.headers.get("Retry-After"):
+            return float(response.headers["Retry-After"]) * random.uniform(1.0, 1.5)
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = float(response.headers.get("X-RateLimit-Reset", time.time()))
+            return max(reset - time.time(), 0) + random.uniform(0.5, 1.0)
+        return None
+    if response.status_code >= 500:
+        return retry_backoff * 2**attempt
+    return None
+
+
+def get_with_retries(url, headers, params=None, max_retries=5, retry_backoff=1.0):
+    """
+    GET with retries on rate limits, server errors and dropped connections.
+    """
+    return send_with_retries(
+        lambda: requests.get(url, headers=headers, params=params, timeout=30),
+        max_retries,
+        retry_backoff,
+    )
 
 
-def fetch_commits_for_repo(repo_info, progress_bar, output_folder):
+def send_with_retries(send, max_retries=5, retry_backoff=1.0):
     """
-    Fetch commits for a single repository and update its progress bar.
+    Calls send() until its response needs no retry (see retry_delay), retrying
+    dropped connections and timeouts with exponential backoff. Only errors
+    count against max_retries; rate limit waits are capped separately by
+    MAX_RATE_LIMIT_WAITS.
+    """
+    attempt = waits = 0
+    while True:
+        try:
+            response = send()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == max_retries:
+                raise
+            time.sleep(retry_backoff * 2**attempt)
+            attempt += 1
+            continue
+        delay = retry_delay(response, attempt, retry_backoff)
+        if delay is None:
+            return response
+        if response.status_code in (403, 429):
+            if waits == MAX_RATE_LIMIT_WAITS:
+                return response
+            waits += 1
+        elif attempt == max_retries:
+            return response
+        else:
+            attempt += 1
+        time.sleep(delay)
+
+
+def fetch_commits_for_repo(
+    repo_info,
+    progress_bar,
+    output_folder,
+    api_url=GITHUB_API_URL,
+    per_page=100,
+    max_retries=5,
+    retry_backoff=1.0,
+):
+    """
+    Fetch every page of commits for a single repository and update its
+    progress bar. The ETag of the first page is kept next to the output file,
+    so an unchanged repository costs one conditional request on the next run.
     """
     repo_name = repo_info.get("repo_name")
     owner = repo_info.get("owner")
@@ -133,24 +294,54 @@ def fetch_commits_for_repo(repo_info, progress_bar, output_folder):
     try:
         # Extract the actual repo name from the URL
         repo_name_short = repo_name.split("/")[-1]
-        url = f"https://api.github.com/repos/{owner}/{repo_name_short}/commits"
+        url = f"{api_url.rstrip('/')}/repos/{owner}/{repo_name_short}/commits"
+        output_file = os.path.join(output_folder, f"{repo_name_short}.json")
+        etag_file = output_file + ".etag"
 
-        # Simulate progress stages
-        response = requests.get(url, headers=headers, stream=True)
-        response.raise_for_status()
+        first_page_headers = dict(headers)
+        if os.path.exists(output_file) and os.path.exists(etag_file):
+            with open(etag_file) as f:
+                first_page_headers["If-None-Match"] = f.read().strip()
 
-        # Simulated progress update
-        for _ in range(10):  # Simulating 10 progress steps
-            time.sleep(0.2)  # Simulate a delay
-            progress_bar.update(10)  # Update 10% of the progress
+        commits = []
+        etag = None
+        params = {"per_page": per_page}
+        while url:
+            response = get_with_retries(
+                url,
+                first_page_headers if etag is None else headers,
+                params,
+                max_retries,
+                retry_backoff,
+            )
+            if response.status_code == 304:
+                progress_bar.set_description(f"Unchanged {repo_name_short}")
+                progress_bar.n = progress_bar.total
+                progress_bar.refresh()
+                return f"Commits for {repo_name} are up to date in {output_file}", True
+            response.raise_for_status()
 
-        commits = response.json()
+            if etag is None:
+                etag = response.headers.get("ETag") or ""
+                last_page = _page_number(response.links.get("last", {}).get("url"))
+                if last_page:
+                    progress_bar.total = last_page
+                    progress_bar.refresh()
+            commits.extend(response.json())
+            progress_bar.update(1)
+            # The next link already carries the query string
+            url = response.links.get("next", {}).get("url")
+            params = None
 
         # Save commits to a JSON file in the output folder
         os.makedirs(output_folder, exist_ok=True)
-        output_file = os.path.join(output_folder, f"{repo_name_short}.json")
         with open(output_file, "w") as outfile:
             json.dump(commits, outfile, indent=4)
+        if etag:
+            with open(etag_file, "w") as f:
+                f.write(etag)
+        elif os.path.exists(etag_file):
+            os.remove(etag_file)
 
         progress_bar.set_description(f"Completed {repo_name_short}")
         progress_bar.n = progress_bar.total  # Mark as complete
@@ -168,3 +359,137 @@ def fetch_commits_for_repo(repo_info, progress_bar, output_folder):
         progress_bar.n = progress_bar.total  # Mark as complete
         progress_bar.refresh()
         return f"Unexpected error for {repo_name}: {e}", False
+
+
+def graphql_url(api_url):
+    """
+    The GraphQL endpoint next to a REST base URL; GitHub Enterprise serves
+    REST under /api/v3 and GraphQL under /api/graphql.
+    """
+    api_url = api_url.rstrip("/")
+    if api_url.endswith("/api/v3"):
+        return api_url[: -len("/v3")] + "/graphql"
+    return api_url + "/graphql"
+
+
+def query_history(url, headers, variables, max_retries=5, retry_backoff=1.0):
+    """
+    Runs HISTORY_QUERY and returns the commit history connection. GraphQL
+    reports an exhausted rate limit in the body, so that is retried here.
+    """
+    for attempt in range(max_retries + 1):
+        response = send_with_retries(
+            lambda: requests.post(
+                url,
+                headers=headers,
+                json={"query": HISTORY_QUERY, "variables": variables},
+                timeout=30,
+            ),
+            max_retries,
+            retry_backoff,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        errors = payload.get("errors") or []
+        if any(error.get("type") == "RATE_LIMITED" for error in errors) and attempt < max_retries:
+            reset = float(response.headers.get("X-RateLimit-Reset", time.time()))
+            time.sleep(max(reset - time.time(), 0) + 0.5)
+            continue
+        if errors:
+            raise RuntimeError("; ".join(error.get("message", str(error)) for error in errors))
+        repository = payload["data"]["repository"]
+        if not repository or not repository.get("defaultBranchRef"):
+            raise RuntimeError("repository has no default branch")
+        return repository["defaultBranchRef"]["target"]["history"]
+    raise RuntimeError("GraphQL rate limit still exceeded after retries")
+
+
+def fetch_commits_graphql_for_repo(
+    repo_info,
+    progress_bar,
+    output_folder,
+    api_url=GITHUB_API_URL,
+    per_page=100,
+    max_retries=5,
+    retry_backoff=1.0,
+):
+    """
+    Fetch the default-branch history of a single repository through the
+    GraphQL API, requesting only oid, message, dates and author, and save it
+    as compact JSON in the REST layout extract-raw-commit-messages reads.
+    """
+    repo_name = repo_info.get("repo_name")
+    owner = repo_info.get("owner")
+    token = repo_info.get("token")
+
+    if not repo_name or not owner or not token:
+        return f"Invalid entry found: {repo_info}", False
+
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Accept-Encoding": "gzip",
+    }
+
+    try:
+        repo_name_short = repo_name.split("/")[-1]
+        url = graphql_url(api_url)
+        variables = {"owner": owner, "name": repo_name_short, "first": per_page, "cursor": None}
+
+        commits = []
+        while True:
+            history = query_history(url, headers, variables, max_retries, retry_backoff)
+            if variables["cursor"] is None:
+                progress_bar.total = max(-(-history["totalCount"] // per_page), 1)
+                progress_bar.refresh()
+            for node in history["nodes"]:
+                author = node.get("author") or {}
+                commits.append(
+                    {
+                        "sha": node["oid"],
+                        "commit": {
+                            "author": {
+                                "name": author.get("name"),
+                                "email": author.get("email"),
+                                "date": node["authoredDate"],
+                            },
+                            "committer": {"date": node["committedDate"]},
+                            "message": node["message"],
+                        },
+                    }
+                )
+            progress_bar.update(1)
+            if not history["pageInfo"]["hasNextPage"]:
+                break
+            variables["cursor"] = history["pageInfo"]["endCursor"]
+
+        os.makedirs(output_folder, exist_ok=True)
+        output_file = os.path.join(output_folder, f"{repo_name_short}.json")
+        with open(output_file, "w") as outfile:
+            json.dump(commits, outfile, separators=(",", ":"))
+        # A REST ETag no longer describes this file
+        if os.path.exists(output_file + ".etag"):
+            os.remove(output_file + ".etag")
+
+        progress_bar.set_description(f"Completed {repo_name_short}")
+        progress_bar.n = progress_bar.total
+        progress_bar.refresh()
+        return f"Commits for {repo_name} saved to {output_file}", True
+
+    except requests.exceptions.RequestException as e:
+        progress_bar.set_description(f"Failed {repo_name_short}")
+        progress_bar.n = progress_bar.total
+        progress_bar.refresh()
+        return f"Failed to fetch commits for {repo_name}: {e}", False
+
+    except Exception as e:
+        progress_bar.set_description(f"Error {repo_name_short}")
+        progress_bar.n = progress_bar.total
+        progress_bar.refresh()
+        return f"Unexpected error for {repo_name}: {e}", False
+
+
+def _page_number(url):
+    if not url:
+        return None
+    page = parse_qs(urlsplit(url).query).get("page")
+    return int(page[0]) if page else None
@@ -0,0 +1,56 @@
+import json
+import os
+
+import click
+
+from utils.instrumentation import instrumented, record_rows
+from utils.synthetic import commit_messages, commit_records, write_raw_commit_csv
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--n-commits",
+    default=10000,
+    show_default=True,
+    help="Number of synthetic commit messages to generate.",
+)
+@click.option(
+    "--conventional-ratio",
+    default=0.6,
+    show_default=True,
+    help="Share of messages following the conventional-commit format.",
+)
+@click.option("--seed", default=0, show_default=True, help="Random seed of the generator.")
+@click.option(
+    "--output-file",
+    default="data/csv_data/synthetic_raw_commit_messages.csv",
+    type=click.Path(),
+    help="CSV in the layout written by extract-raw-commit-messages.",
+)
+@click.option(
+    "--raw-output-file",
+    default=None,
+    type=click.Path(),
+    help="Optionally also write GitHub API-shaped commit JSON (input of extract-raw-commit-messages).",
+)
+def generate_synthetic_commits(n_commits, conventional_ratio, seed, output_file, raw_output_file):
+    """
+    Generates a deterministic synthetic commit corpus for benchmarks and load tests.
+    """
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    click.echo(f"🧪 Generating {n_commits} synthetic commit messages (seed {seed})...")
+    n_written = write_raw_commit_csv(output_file, n_commits, conventional_ratio, seed)
+    record_rows(rows_out=n_written)
+    click.echo(f"✅ Synthetic commit messages saved to: {output_file}")
+
+    if raw_output_file:
+        os.makedirs(os.path.dirname(raw_output_file) or ".", exist_ok=True)
+        records = commit_records(commit_messages(n_commits, conventional_ratio, seed))
+        with open(raw_output_file, "w") as f:
+            json.dump(records, f)
+        click.echo(f"✅ Raw commit JSON saved to: {raw_output_file}")
+
+
+if __name__ == "__main__":
+    generate_synthetic_commits()
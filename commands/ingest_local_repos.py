@@ -0,0 +1,244 @@
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import click
+
+from utils.instrumentation import instrumented, record_rows
+
+# One commit per NUL-terminated record (-z), fields split by the ASCII unit
+# separator. The message goes last so it may contain anything but NUL.
+LOG_FIELDS = (
+    "sha",
+    "parents",
+    "author_name",
+    "author_email",
+    "author_date",
+    "committer_name",
+    "committer_email",
+    "committer_date",
+    "message",
+)
+LOG_FORMAT = "%x1f".join(["%H", "%P", "%an", "%ae", "%ad", "%cn", "%ce", "%cd", "%B"])
+GITHUB_REMOTE = re.compile(r"github\.com[:/]([^/]+/[^/]+?)(?:\.git)?/?$")
+
+
+def find_repositories(mirrors_dir):
+    """
+    Git repositories directly inside mirrors_dir: bare mirrors (*.git) and
+    working clones.
+    """
+    repos = []
+    for name in sorted(os.listdir(mirrors_dir)):
+        path = os.path.join(mirrors_dir, name)
+        if os.path.isdir(os.path.join(path, ".git")) or (
+            os.path.isfile(os.path.join(path, "HEAD")) and os.path.isdir(os.path.join(path, "objects"))
+        ):
+            repos.append(path)
+    return repos
+
+
+def repository_name(path):
+    name = os.path.basename(os.path.normpath(path))
+    return name[: -len(".git")] if name.endswith(".git") else name
+
+
+def output_names(paths):
+    """
+    Maps each repository path to the name of its output file. Repositories
+    sharing a name are told apart by their GitHub owner; names that still
+    collide raise a UsageError instead of overwriting each other's file.
+    """
+    by_name = {}
+    for path in dict.fromkeys(os.path.realpath(path) for path in paths):
+        by_name.setdefault(repository_name(path), []).append(path)
+
+    names = {}
+    for name, group in by_name.items():
+        if len(group) == 1:
+            names[group[0]] = name
+            continue
+        slugs = [_github_slug(path) for path in group]
+        owned = [f"{slug.split('/')[0]}_{name}" if slug else None for slug in slugs]
+        if None in owned or len(set(owned)) < len(owned):
+            raise click.UsageError(
+                f"several repositories would be written to {name}.json: {', '.join(group)}"
+            )
+        names.update(zip(group, owned))
+    return names
+
+
+def _github_slug(path):
+    result = subprocess.run(
+        ["git", "-C", path, "config", "--get", "remote.origin.url"], capture_output=True, text=True
+    )
+    match = GITHUB_REMOTE.search(result.stdout.strip())
+    return match[1] if match else None
+
+
+def iter_git_log(path, revisions=("HEAD",), since=None, chunk_size=1 << 20):
+    """
+    Streams the commits of a local repository, newest first, as dicts of
+    LOG_FIELDS. Dates are rendered in UTC like the GitHub API.
+    """
+    command = ["git", "-C", path, "log", "-z", f"--format={LOG_FORMAT}"]
+    command.append("--date=format-local:%Y-%m-%dT%H:%M:%SZ")
+    if since:
+        command.append(f"--since={since}")
+    command += [*revisions, "--"]
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={**os.environ, "TZ": "UTC", "LC_ALL": "C"},
+    )
+    pending = b""
+    completed = False
+    try:
+        for chunk in iter(lambda: process.stdout.read(chunk_size), b""):
+            records = (pending + chunk).split(b"\0")
+            pending = records.pop()
+            for record in records:
+                fields = record.decode("utf-8", errors="replace").split("\x1f", len(LOG_FIELDS) - 1)
+                yield dict(zip(LOG_FIELDS, fields))
+        completed = True
+    finally:
+        # A consumer that stops early must not leave git blocked on the pipe.
+        if not completed:
+            process.kill()
+            process.wait()
+    stderr = process.stderr.read().decode(errors="replace")
+    if process.wait():
+        raise RuntimeError(stderr.strip() or f"git log failed in {path}")
+
+
+def to_api_record(entry, slug=None):
+    """
+    Shapes a git log entry like a commit of the GitHub REST commits API.
+    """
+    record = {
+        "sha": entry["sha"],
+        "commit": {
+            "author": {
+                "name": entry["author_name"],
+                "email": entry["author_email"],
+                "date": entry["author_date"],
+            },
+            "committer": {
+                "name": entry["committer_name"],
+                "email": entry["committer_email"],
+                "date": entry["committer_date"],
+            },
+            # The API strips the trailing newline git stores
+            "message": entry["message"].rstrip("\n"),
+        },
+        "parents": [{"sha": sha} for sha in entry["parents"].split()],
+    }
+    if slug:
+        record["html_url"] = f"https://github.com/{slug}/commit/{entry['sha']}"
+    return record
+
+
+def ingest_repository(path, output_folder, revisions=("HEAD",), since=None, name=None):
+    """
+    Writes the history of one repository to <output_folder>/<name>.json as a
+    JSON array of API-shaped commits, streaming so memory stays flat.
+    Returns the number of commits written.
+    """
+    slug = _github_slug(path)
+    output_file = os.path.join(output_folder, f"{name or repository_name(path)}.json")
+    tmp_file = output_file + ".tmp"
+    count = 0
+    try:
+        with open(tmp_file, "w") as outfile:
+            outfile.write("[")
+            for entry in iter_git_log(path, revisions, since):
+                outfile.write(",\n" if count else "\n")
+                outfile.write(json.dumps(to_api_record(entry, slug)))
+                count += 1
+            outfile.write("\n]\n")
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+    os.replace(tmp_file, output_file)
+    return count
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--mirrors-dir",
+    type=click.Path(exists=True, file_okay=False),
+    help="Folder of bare mirrors or clones; every repository directly inside is ingested.",
+)
+@click.option(
+    "--repo-path",
+    "repo_paths",
+    multiple=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="A local repository to ingest (repeatable).",
+)
+@click.option(
+    "--output-folder",
+    default="data/raw_data",
+    show_default=True,
+    help="Folder where the commit JSON files are written, one per repository.",
+)
+@click.option(
+    "--all-refs",
+    is_flag=True,
+    help="Walk every branch and tag instead of only HEAD (the default branch, like the API).",
+)
+@click.option("--since", default=None, help="Only commits after this date, e.g. 2024-01-01.")
+@click.option(
+    "--workers",
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="Repositories read in parallel.",
+)
+def ingest_local_repos(mirrors_dir, repo_paths, output_folder, all_refs, since, workers):
+    """
+    Ingests commit history straight from local git clones or mirrors with
+    git log, writing the same raw commit files as fetch-commits without
+    using any API quota.
+
+    Example Usage:
+    $ python main_cli.py data ingest-local-repos --mirrors-dir /srv/mirrors
+    """
+    paths = list(repo_paths)
+    if mirrors_dir:
+        paths += find_repositories(mirrors_dir)
+    if not paths:
+        click.echo("❌ No repositories given. Use --mirrors-dir or --repo-path.")
+        return
+
+    names = output_names(paths)
+    os.makedirs(output_folder, exist_ok=True)
+    revisions = ("--all",) if all_refs else ("HEAD",)
+    record_rows(rows_in=len(names))
+    click.echo(f"📂 Ingesting {len(names)} local repositories with {workers} workers...")
+
+    total = 0
+    # git does the work in child processes, so threads are enough here.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(ingest_repository, path, output_folder, revisions, since, name): name
+            for path, name in names.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                count = future.result()
+                total += count
+                click.echo(f"✅ {name}: {count} commits")
+            except Exception as e:
+                click.echo(f"❌ {name}: {e}")
+
+    record_rows(rows_out=total)
+    click.echo(f"📦 {total} commits saved to: {output_folder}")
+
+
+if __name__ == "__main__":
+    ingest_local_repos()
@@ -7,12 +7,13 @@ from sklearn.preprocessing import MultiLabelBinarizer
 from tqdm import tqdm
 
 from constants import dempe_conv_commit_mapping
+from utils.instrumentation import instrumented, record_rows
 
 console = Console()
 
 
 class MultiLabelCommitClassifier:
-    def __init__(self, file_path, output_file, commit_column="Commit Message"):
+    def __init__(self, file_path=None, output_file=None, commit_column="Commit Message"):
         self.file_path = file_path
         self.output_file = output_file
         self.commit_column = commit_column
@@ -20,22 +21,33 @@ class MultiLabelCommitClassifier:
             k: v if isinstance(v, list) else [v]
             for k, v in dempe_conv_commit_mapping.items()
         }
+        # Compiled once: "tag:", "tag(scope):" or "tag!:" anywhere in the message
+        self.tag_patterns = {
+            tag: re.compile(rf"\b{re.escape(tag)}(?:\(.+?\))?!?:|{re.escape(tag)}:")
+            for tag in self.mapping
+        }
+        # A message that opens with one of the known types is unambiguous
+        self.prefix_pattern = re.compile(
+            rf"^\s*(?:{'|'.join(re.escape(tag) for tag in self.mapping)})(?:\([^)]*\))?!?:"
+        )
 
     def extract_commit_tags(self, commit_msg):
         tags = set()
         commit_msg = commit_msg.lower()
-        for tag in self.mapping:
-            if (
-                re.search(rf"\b{re.escape(tag)}(?:\(.+?\))?!?:", commit_msg)
-                or f"{tag}:" in commit_msg
-            ):
-                value = self.mapping[tag]
-                if isinstance(value, list):
-                    tags.update(value)
-                else:
-                    tags.add(value)
+        for tag, pattern in self.tag_patterns.items():
+            if pattern.search(commit_msg):
+                tags.update(self.mapping[tag])
         return sorted(tags)
 
+    def conventional_prefix_tags(self, commit_msg):
+        """
+        Returns the DEMPE classes of a message that starts with a conventional
+        commit prefix, or None when the message needs the ML model.
+        """
+        if not self.prefix_pattern.match(commit_msg.lower()):
+            return None
+        return self.extract_commit_tags(commit_msg)
+
     def process_commits(self):
         try:
             console.print(
@@ -86,6 +98,7 @@ class MultiLabelCommitClassifier:
             )
 
             result_df.to_csv(self.output_file, index=False)
+            record_rows(rows_in=len(df), rows_out=len(result_df))
 
             console.print(
                 f"\n✅ [bold cyan]Multi-label classification complete![/bold cyan] Results saved to: [bold green]{self.output_file}[/bold green]"
@@ -97,6 +110,7 @@ class MultiLabelCommitClassifier:
             console.print(f"❌ [bold red]Error processing the file:[/bold red] {e}")
 
 
+@instrumented
 @click.command()
 @click.option(
     "--input-file",
@@ -119,6 +133,7 @@ def label_commits_multi(input_file, output_file):
     classifier.process_commits()
 
 
+@instrumented
 @click.command()
 @click.option(
     "--input-file",
@@ -6,7 +6,10 @@ import pandas as pd
 import seaborn as sns
 from sklearn.metrics import classification_report
 
+from utils.instrumentation import instrumented
 
+
+@instrumented
 @click.command()
 @click.option(
     "--report-file",
@@ -1,56 +1,306 @@
 import os
 import json
+from datetime import datetime, timezone
+
 import click
-import joblib
 import numpy as np
 import pandas as pd
 from rich.console import Console
 from rich.prompt import Prompt, IntPrompt
-from tensorflow.keras.models import load_model
-from sentence_transformers import SentenceTransformer
-
-# Friendly class names
-DEMPE_CLASSES = [
-    "Development",
-    "Enhancement",
-    "Maintenance",
-    "Protection",
-    "Exploitation"
-]
-
-# Model options
-MODELS = {
-    1: ("Logistic Regression (OvR)", "data/models/logreg_ovr_model.pkl"),
-    2: ("Random Forest (OvR)", "data/models/rf_ovr_model.pkl"),
-    3: ("XGBoost/LightGBM (OvR)", "data/models/gbm_ovr_model.pkl"),
-    4: ("Neural Network", "data/models/nn_multilabel_model.h5"),
-    5: ("Classifier Chain", "data/models/classifier_chain_model.pkl"),
-}
 
+from commands.cleaned_commits import clean_text
+from commands.label_commits import MultiLabelCommitClassifier
+from constants import dempe_class_names
+from utils.commit_store import CommitStore
+from utils.encoding import DEFAULT_TOKEN_BUDGET
+from utils.ensemble import COMBINE_METHODS, WEIGHTINGS, EnsemblePredictor
+from utils.instrumentation import instrumented, record_rows
+from utils.registry import get_encoding_service, get_model, load_manifest, model_choices
+from utils.thresholds import load_thresholds, predict_labels
+
+
+def rule_first_predict(messages, rules, predict_messages, label_columns):
+    """
+    Labels messages that open with a conventional-commit prefix through the rule
+    engine and sends only the rest to predict_messages (encoder + model).
+    Returns the 0/1 label matrix and the route ("rules" or "model") of each message.
+    """
+    column_of = {label: i for i, label in enumerate(label_columns)}
+    y_pred = np.zeros((len(messages), len(label_columns)), dtype=int)
+    routes = []
+    model_rows = []
+    for i, message in enumerate(messages):
+        tags = rules.conventional_prefix_tags(message)
+        if tags is None:
+            routes.append("model")
+            model_rows.append(i)
+            continue
+        routes.append("rules")
+        for tag in tags:
+            if f"DEMPE_Class_{tag}" in column_of:
+                y_pred[i, column_of[f"DEMPE_Class_{tag}"]] = 1
+
+    if model_rows:
+        y_pred[model_rows] = predict_messages([messages[i] for i in model_rows])
+    return y_pred, routes
+
+
+def split_segments(message):
+    """
+    Splits a commit message into lines cleaned like the training data,
+    dropping lines that end up empty.
+    """
+    return [segment for segment in map(clean_text, message.split("\n")) if segment]
+
+
+def segment_predict(messages, predict_texts, n_labels):
+    """
+    Encodes every distinct segment of the batch once, in token-length batches
+    taken longest first, and gives each commit every label predicted for any
+    of its segments.
+    Returns the 0/1 label matrix plus the total and distinct segment counts.
+    """
+    segment_ids = {}
+    owners = []
+    for i, message in enumerate(messages):
+        for segment in split_segments(message):
+            owners.append((i, segment_ids.setdefault(segment, len(segment_ids))))
+
+    y_pred = np.zeros((len(messages), n_labels), dtype=int)
+    if not owners:
+        return y_pred, 0, 0
+
+    # Handed over by character length; the encoding service re-sorts them by
+    # token length, longest first, so each encoder call pads to similar lengths
+    segments = list(segment_ids)
+    order = np.argsort([len(segment) for segment in segments], kind="stable")
+    segment_pred = np.empty((len(segments), n_labels), dtype=int)
+    segment_pred[order] = predict_texts([segments[j] for j in order])
+
+    rows, ids = np.array(owners).T
+    np.maximum.at(y_pred, rows, segment_pred[ids])
+    return y_pred, len(owners), len(segments)
+
+
+@instrumented
 @click.command()
-@click.option("--model-choice", type=int, default=None, help="Optional model choice (1-5)")
-def predict_dempe(model_choice):
-    """Interactive tool to classify commit messages into DEMPE classes."""
+@click.option("--model-choice", type=int, default=None, help="Optional model choice (menu number)")
+@click.option(
+    "--input-file",
+    type=click.Path(exists=True),
+    default=None,
+    help="CSV of commit messages to classify in batch instead of interactively.",
+)
+@click.option(
+    "--output-file",
+    default="data/csv_data/dempe_predictions.csv",
+    type=click.Path(),
+    help="Where batch predictions are written.",
+)
+@click.option(
+    "--message-column",
+    default="Commit Message",
+    help="Column of the input CSV holding the commit messages.",
+)
+@click.option(
+    "--store",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Commit store whose commits without a prediction from this model are classified.",
+)
+@click.option("--batch-size", default=256, help="Maximum messages encoded per batch.")
+@click.option(
+    "--token-budget",
+    default=DEFAULT_TOKEN_BUDGET,
+    help="Padded tokens per encoder batch; batches of short messages grow up to --batch-size.",
+)
+@click.option(
+    "--ensemble",
+    is_flag=True,
+    help="Combine every model in the manifest on one shared encoding.",
+)
+@click.option(
+    "--combine",
+    default="vote",
+    type=click.Choice(COMBINE_METHODS),
+    help="How ensemble predictions are combined.",
+)
+@click.option(
+    "--weighting",
+    default="equal",
+    type=click.Choice(WEIGHTINGS),
+    help="Ensemble model weights: equal, or proportional to each model's test macro F1.",
+)
+@click.option(
+    "--rules-first",
+    is_flag=True,
+    help="Label conventional commits (feat:, fix:, ci: ...) by rule and only encode the rest.",
+)
+@click.option(
+    "--segment",
+    is_flag=True,
+    help="Classify each cleaned line of multi-line messages separately and merge the labels.",
+)
+@click.option(
+    "--vote-threshold",
+    default=0.5,
+    help="Weighted share of ensemble votes a label needs (vote mode).",
+)
+def predict_dempe(
+    model_choice,
+    input_file,
+    output_file,
+    message_column,
+    store,
+    batch_size,
+    token_budget,
+    ensemble,
+    combine,
+    weighting,
+    vote_threshold,
+    rules_first,
+    segment,
+):
+    """Classifies commit messages into DEMPE classes, interactively or from a CSV."""
     console = Console()
     console.rule("[bold green]DEMPE Class Predictor")
 
-    # Model selection
-    if model_choice is None:
-        console.print("\n[bold yellow]Select a trained model to use:[/bold yellow]")
-        for k, v in MODELS.items():
-            console.print(f"[cyan]{k}.[/cyan] {v[0]}")
-        model_choice = IntPrompt.ask("\nEnter model number", choices=[str(k) for k in MODELS])
-
-    model_name, model_path = MODELS[int(model_choice)]
-    console.print(f"\n📦 Loading model: [green]{model_name}[/green]")
+    # Only models present in the manifest are offered
+    manifest = load_manifest()
+    choices = model_choices(manifest)
+    if not choices:
+        console.print("[bold red]❌ No trained models found in data/models.[/bold red]")
+        return
 
-    if "Neural Network" in model_name:
-        model = load_model(model_path)
+    if ensemble:
+        entries = manifest["models"]
+        console.print(
+            f"\n📦 Loading ensemble of {len(entries)} model(s) "
+            f"([green]{combine}[/green], {weighting} weights)"
+        )
+        for entry in entries.values():
+            console.print(f"   • {entry['name']}")
+        encoders = {entry["encoder"] for entry in entries.values()}
+        if len(encoders) != 1:
+            raise click.UsageError("ensembled models were trained on different encoders")
+        try:
+            predictor = EnsemblePredictor(
+                entries,
+                combine=combine,
+                weighting=weighting,
+                vote_threshold=vote_threshold,
+            )
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        predict = predictor.predict
+        entry = next(iter(entries.values()))
+        # Stored predictions of different member sets or weightings must not mix
+        model_key = f"ensemble:{combine}:{weighting}:{'+'.join(sorted(entries))}"
     else:
-        model = joblib.load(model_path)
+        # Model selection
+        if model_choice is None:
+            console.print("\n[bold yellow]Select a trained model to use:[/bold yellow]")
+            for k, key in choices.items():
+                console.print(f"[cyan]{k}.[/cyan] {manifest['models'][key]['name']}")
+            model_choice = IntPrompt.ask(
+                "\nEnter model number", choices=[str(k) for k in choices]
+            )
+        elif int(model_choice) not in choices:
+            raise click.BadParameter(
+                f"model {model_choice} is not available, choose from {sorted(choices)}",
+                param_hint="--model-choice",
+            )
 
-    # SentenceBERT for encoding
-    sbert_model = SentenceTransformer("all-MiniLM-L6-v2")
+        model_key = choices[int(model_choice)]
+        entry = manifest["models"][model_key]
+        console.print(f"\n📦 Loading model: [green]{entry['name']}[/green]")
+
+        model = get_model(entry["model_file"])
+        # Read from disk, not the manifest, so recalibrated thresholds apply at once
+        thresholds = load_thresholds(entry["model_file"])
+        if thresholds is None:
+            console.print("[yellow]⚠️ No calibrated thresholds found, using defaults.[/yellow]")
+        else:
+            console.print("🎯 Using calibrated per-label thresholds.")
+
+        def predict(X):
+            return predict_labels(model, X, thresholds)
+
+    class_names = [dempe_class_names.get(label, label) for label in entry["label_columns"]]
+
+    def predict_texts(texts):
+        # SentenceBERT encoder the models were trained on, loaded on first use
+        # and run once per batch
+        X = get_encoding_service(entry["encoder"]).encode(
+            texts, token_budget=token_budget, max_batch_size=batch_size
+        )
+        return predict(X.astype(entry["feature_dtype"]))
+
+    segment_counts = [0, 0]
+
+    def predict_messages(messages):
+        if not segment:
+            return predict_texts(messages)
+        y_pred, n_segments, n_unique = segment_predict(
+            messages, predict_texts, len(entry["label_columns"])
+        )
+        segment_counts[0] += n_segments
+        segment_counts[1] += n_unique
+        return y_pred
+
+    def classify(messages):
+        if rules_first:
+            return rule_first_predict(
+                messages, rules, predict_messages, entry["label_columns"]
+            )
+        return predict_messages(messages), ["model"] * len(messages)
+
+    rules = MultiLabelCommitClassifier() if rules_first else None
+
+    if input_file:
+        df = pd.read_csv(input_file)
+        messages = df[message_column].fillna("").astype(str).tolist()
+        console.print(f"🧮 Classifying {len(messages)} commit messages...")
+        y_pred, routes = classify(messages)
+        record_rows(rows_in=len(messages), rows_out=len(y_pred))
+        for i, label in enumerate(class_names):
+            df[label] = y_pred[:, i]
+        if rules_first:
+            df["Prediction Source"] = routes
+            n_rules = routes.count("rules")
+            console.print(
+                f"⚡ Rules: {n_rules} ({n_rules / max(len(routes), 1):.1%}) | "
+                f"🧠 Model: {len(routes) - n_rules} "
+                f"({(len(routes) - n_rules) / max(len(routes), 1):.1%})"
+            )
+        if segment:
+            console.print(
+                f"✂️ Segments: {segment_counts[0]} | encoded after dedup: {segment_counts[1]}"
+            )
+        df.to_csv(output_file, index=False)
+        console.print(f"[bold green]✅ Predictions saved to:[/bold green] {output_file}")
+        return
+
+    if store:
+        # Bit k of a stored prediction is DEMPE class k
+        bits = np.array([1 << int(label.rsplit("_", 1)[1]) for label in entry["label_columns"]])
+        n_classified = 0
+        with CommitStore(store) as commit_store:
+            for batch in commit_store.unpredicted(model_key):
+                y_pred, routes = classify([message for _, _, message in batch])
+                predicted_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                commit_store.upsert_predictions(
+                    (repo, sha, model_key, int(mask), route, predicted_at)
+                    for (repo, sha, _), mask, route in zip(batch, y_pred @ bits, routes)
+                )
+                commit_store.commit()
+                n_classified += len(batch)
+                console.print(f"🧮 {n_classified} new commits classified...")
+        record_rows(rows_in=n_classified, rows_out=n_classified)
+        console.print(
+            f"[bold green]✅ {n_classified} predictions of {model_key} stored in:[/bold green] {store}"
+        )
+        return
 
     while True:
         console.print("\n📝 Enter a commit message to classify (or type 'exit' to quit):")
@@ -59,14 +309,11 @@ def predict_dempe(model_choice):
             console.print("[bold red]Exiting...[/bold red]")
             break
 
-        X = sbert_model.encode([commit])
-
-        if "Neural Network" in model_name:
-            y_pred = (model.predict(X) > 0.5).astype(int)
-        else:
-            y_pred = model.predict(X)
+        y_pred, routes = classify([commit])
+        if routes[0] == "rules":
+            console.print("⚡ Labeled by the conventional-commit rules.")
 
-        result_labels = [label for pred, label in zip(y_pred[0], DEMPE_CLASSES) if pred == 1]
+        result_labels = [label for pred, label in zip(y_pred[0], class_names) if pred == 1]
         if result_labels:
             console.print(f"[bold green]✅ Predicted DEMPE Classes:[/bold green] {', '.join(result_labels)}")
         else:
@@ -0,0 +1,219 @@
+import csv
+import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import chain
+
+import click
+
+from commands.cleaned_commits import clean_text
+from commands.label_commits import MultiLabelCommitClassifier
+from utils.instrumentation import instrumented, record_rows
+
+# Strings pandas.read_csv reads as missing by default. The staged pipeline
+# round-trips every line through CSV, so clean-commits drops these lines;
+# the fused pass drops them too to produce identical outputs.
+CSV_NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+def iter_json_array(path, block_size=1 << 20):
+    """
+    Yields the elements of a top-level JSON array one at a time, reading the
+    file in blocks, so a large raw commit file never sits in memory whole.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r") as file:
+        buffer = file.read(block_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError("expected a JSON array")
+        pos = 1
+        eof = False
+        while True:
+            # Skip separators, refilling the buffer when it runs dry
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                buffer, pos = file.read(block_size), 0
+                eof = not buffer
+            if pos >= len(buffer):
+                raise ValueError("unterminated JSON array")
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = file.read(block_size)
+                eof = not more
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield item
+            pos = end
+
+
+def iter_raw_messages(input_folder):
+    """
+    Yields (serial number, commit message) from the raw JSON files in the
+    order extract-raw-commit-messages numbers them. Files that fail to parse
+    are reported and skipped.
+    """
+    serial = 0
+    for json_file in [f for f in os.listdir(input_folder) if f.endswith(".json")]:
+        # Messages of a file are only passed on once it parsed completely,
+        # like extract-raw-commit-messages, which skips broken files whole.
+        messages = []
+        try:
+            for commit in iter_json_array(os.path.join(input_folder, json_file)):
+                if "commit" in commit and "message" in commit["commit"]:
+                    messages.append(commit["commit"]["message"])
+        except (OSError, ValueError) as e:
+            click.echo(f"❌ Skipping {json_file}: {e}")
+            continue
+        for message in messages:
+            serial += 1
+            yield serial, message
+
+
+def iter_preprocessed_chunks(messages, classifier, chunk_size=10_000):
+    """
+    Splits messages into lines, tags and cleans them, and yields
+    (cleaned rows, non-conventional rows) per chunk_size input messages, so
+    memory is bounded by the chunk rather than the corpus.
+    """
+    classes = sorted(set(chain.from_iterable(classifier.mapping.values())))
+    cleaned, non_conventional = [], []
+    for i, (serial, message) in enumerate(messages, start=1):
+        for line in str(message).split("\n"):
+            line = line.strip()
+            if line in CSV_NA_VALUES:
+                continue
+            tags = classifier.extract_commit_tags(line)
+            if tags:
+                cleaned.append([serial, clean_text(line), *(int(c in tags) for c in classes)])
+            else:
+                non_conventional.append([serial, line, *(0 for _ in classes)])
+        if i % chunk_size == 0:
+            yield cleaned, non_conventional
+            cleaned, non_conventional = [], []
+    if cleaned or non_conventional:
+        yield cleaned, non_conventional
+
+
+def _write_rows(csvfile, header, rows_queue):
+    # Keeps draining after a write error so the producer never blocks on a
+    # full queue; the error is raised once the stream ends. The file is opened
+    # by the caller, so a bad path fails before any writer thread starts.
+    error = None
+    count = 0
+    writer = csv.writer(csvfile, lineterminator="\n")
+    try:
+        writer.writerow(header)
+    except Exception as e:
+        error = e
+    while (rows := rows_queue.get()) is not None:
+        if error is None:
+            try:
+                writer.writerows(rows)
+                count += len(rows)
+            except Exception as e:
+                error = e
+    if error:
+        raise error
+    return count
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--input-folder",
+    default="data/raw_data",
+    type=click.Path(exists=True, file_okay=False),
+    help="Folder of raw commit JSON files written by fetch-commits or ingest-local-repos.",
+)
+@click.option(
+    "--output-file",
+    default="data/csv_data/cleaned_commits.csv",
+    type=click.Path(),
+    help="Path to save the cleaned, labeled conventional commits.",
+)
+@click.option(
+    "--nonconv-output",
+    default="data/csv_data/non_conventional_commits.csv",
+    type=click.Path(),
+    help="Path to save the non-conventional commits (all labels 0).",
+)
+@click.option(
+    "--chunk-size",
+    default=10_000,
+    show_default=True,
+    help="Raw messages processed per chunk; bounds memory use.",
+)
+def preprocess_commits(input_folder, output_file, nonconv_output, chunk_size):
+    """
+    Fused extract → label → clean: streams the raw commits once, splitting,
+    tagging and cleaning lines chunk by chunk, while two writer threads save
+    the cleaned and non-conventional outputs. The outputs match running
+    extract-raw-commit-messages, label-commits and clean-commits in turn.
+    """
+    classifier = MultiLabelCommitClassifier()
+    classes = sorted(set(chain.from_iterable(classifier.mapping.values())))
+    header_cols = ["Raw Serial Number", "Commit Message", *(f"DEMPE_Class_{c}" for c in classes)]
+    for path in (output_file, nonconv_output):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    click.echo(f"📂 Streaming raw commits from {input_folder}...")
+    n_messages = 0
+
+    def counted(messages):
+        nonlocal n_messages
+        for item in messages:
+            n_messages += 1
+            yield item
+
+    # Two chunks in flight per writer at most
+    cleaned_queue, nonconv_queue = queue.Queue(maxsize=2), queue.Queue(maxsize=2)
+    label_counts = [0] * len(classes)
+    with ExitStack() as files:
+        outputs = []
+        for path in (output_file, nonconv_output):
+            try:
+                outputs.append(files.enter_context(open(path, "w", newline="", encoding="utf-8")))
+            except OSError as e:
+                raise click.FileError(path, hint=e.strerror)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            cleaned_writer = executor.submit(_write_rows, outputs[0], header_cols, cleaned_queue)
+            nonconv_writer = executor.submit(_write_rows, outputs[1], header_cols, nonconv_queue)
+            try:
+                chunks = iter_preprocessed_chunks(
+                    counted(iter_raw_messages(input_folder)), classifier, chunk_size
+                )
+                for cleaned, non_conventional in chunks:
+                    for row in cleaned:
+                        for j, value in enumerate(row[2:]):
+                            label_counts[j] += value
+                    cleaned_queue.put(cleaned)
+                    nonconv_queue.put(non_conventional)
+            finally:
+                cleaned_queue.put(None)
+                nonconv_queue.put(None)
+            n_cleaned = cleaned_writer.result()
+            n_nonconv = nonconv_writer.result()
+
+    record_rows(rows_in=n_messages, rows_out=n_cleaned)
+    click.echo(f"✅ Cleaned multi-label commits saved to {output_file}")
+    click.echo(f"⚠️ Non-conventional commits saved to {nonconv_output}")
+    click.echo(f"📊 {n_messages} messages → {n_cleaned} labeled and {n_nonconv} non-conventional lines")
+    for col, count in zip(header_cols[2:], label_counts):
+        click.echo(f"   {col}: {count}")
+
+
+if __name__ == "__main__":
+    preprocess_commits()
@@ -0,0 +1,187 @@
+import json
+import os
+import time
+
+import click
+import joblib
+
+from utils.embedding_store import load_sample_weights, save_embedding_store
+from utils.helper import load_features_labels
+from utils.instrumentation import instrumented
+from utils.linear_head import RidgeMultilabelHead
+from utils.metrics import compute_multilabel_metrics
+from utils.projection import (
+    PROJECTION_FILE,
+    PROJECTION_METHODS,
+    STORAGE_DTYPES,
+    EmbeddingProjection,
+    projection_fingerprint,
+)
+
+
+def probe_features(X_train, y_train, X_test, y_test, sample_weight=None):
+    """
+    Fits the ridge head on one feature set and scores it on the test split.
+    Returns test macro F1, subset accuracy and fit time.
+    """
+    start = time.perf_counter()
+    head = RidgeMultilabelHead().fit(X_train, y_train, sample_weight=sample_weight)
+    fit_sec = time.perf_counter() - start
+    summary = compute_multilabel_metrics(y_test, head.predict(X_test))["summary"]
+    return {
+        "macro_f1": summary["macro_f1"],
+        "subset_accuracy": summary["subset_accuracy"],
+        "fit_sec": round(fit_sec, 3),
+    }
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--train-file",
+    default="data/csv_data/train_re_sampled_mlsmote.csv",
+    type=click.Path(exists=True),
+    help="Training features: an MLSMOTE CSV or an embed-corpus directory.",
+)
+@click.option(
+    "--test-file",
+    default="data/csv_data/test_re_sampled_mlsmote.csv",
+    type=click.Path(exists=True),
+    help="Test features: an MLSMOTE CSV or an embed-corpus directory.",
+)
+@click.option(
+    "--method",
+    default="pca",
+    type=click.Choice(PROJECTION_METHODS),
+    show_default=True,
+    help="Dimensionality reduction fitted on the training features.",
+)
+@click.option(
+    "--n-components",
+    default=128,
+    show_default=True,
+    help="Dimensions kept by pca/random.",
+)
+@click.option(
+    "--dtype",
+    default="float16",
+    type=click.Choice(STORAGE_DTYPES),
+    show_default=True,
+    help="Storage dtype of the projected features.",
+)
+@click.option(
+    "--output-dir",
+    default="data/embeddings/projected",
+    type=click.Path(),
+    help="Directory receiving the projected train/ and test/ feature stores.",
+)
+@click.option(
+    "--projection-file",
+    default=PROJECTION_FILE,
+    type=click.Path(),
+    help="Where the fitted projection is saved; models trained on its features load it at prediction.",
+)
+@click.option(
+    "--report-file",
+    default="data/reports/projection_impact.json",
+    type=click.Path(),
+    help="JSON collecting the accuracy and size impact of each projection setting.",
+)
+def project_embeddings(
+    train_file,
+    test_file,
+    method,
+    n_components,
+    dtype,
+    output_dir,
+    projection_file,
+    report_file,
+):
+    """
+    Compresses the Sentence-BERT features with PCA or a random projection and
+    float16 storage, and reports the accuracy cost on the test split.
+    """
+    click.echo(f"📥 Loading training data from {train_file}...")
+    X_train, y_train, label_cols = load_features_labels(train_file)
+    w_train = load_sample_weights(train_file)
+    click.echo(f"📥 Loading test data from {test_file}...")
+    X_test, y_test, _ = load_features_labels(test_file)
+
+    if method != "none" and n_components >= X_train.shape[1]:
+        raise click.BadParameter(
+            f"must be below the feature dimension ({X_train.shape[1]})",
+            param_hint="--n-components",
+        )
+
+    click.echo(f"🗜️ Fitting {method} projection ({X_train.shape[1]} → {n_components} dims, {dtype})...")
+    start = time.perf_counter()
+    projection = EmbeddingProjection(method=method, n_components=n_components, dtype=dtype)
+    projection.fit(X_train)
+    P_train = projection.transform(X_train)
+    P_test = projection.transform(X_test)
+    project_sec = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(projection_file) or ".", exist_ok=True)
+    joblib.dump(projection, projection_file)
+    # Trainers copy these into the model's projection record
+    fingerprint = projection_fingerprint(projection_file)
+    for name, source, P, y in (
+        ("train", train_file, P_train, y_train),
+        ("test", test_file, P_test, y_test),
+    ):
+        save_embedding_store(
+            os.path.join(output_dir, name),
+            P,
+            y,
+            label_cols,
+            sample_weight=load_sample_weights(source),
+            source=source,
+            projection=method,
+            projection_file=projection_file,
+            projection_sha256=fingerprint,
+        )
+    click.echo(f"✅ Projected features saved to: {output_dir}")
+    click.echo(f"✅ Projection saved to: {projection_file}")
+
+    click.echo("📏 Measuring accuracy impact with a ridge probe...")
+    original = probe_features(X_train, y_train, X_test, y_test, w_train)
+    projected = probe_features(P_train, y_train, P_test, y_test, w_train)
+    original_bytes = X_train.shape[0] * X_train.shape[1] * 4
+    result = {
+        "method": method,
+        "n_components": projection.n_components_,
+        "dtype": dtype,
+        "project_sec": round(project_sec, 3),
+        "original": {**original, "train_bytes": original_bytes},
+        "projected": {**projected, "train_bytes": int(P_train.nbytes)},
+        "macro_f1_delta": projected["macro_f1"] - original["macro_f1"],
+        "subset_accuracy_delta": projected["subset_accuracy"] - original["subset_accuracy"],
+        "size_ratio": round(P_train.nbytes / original_bytes, 4),
+    }
+
+    click.echo(
+        f"   Original : macro F1 {original['macro_f1']:.4f} | "
+        f"subset acc {original['subset_accuracy']:.4f} | fit {original['fit_sec']:.2f}s"
+    )
+    click.echo(
+        f"   Projected: macro F1 {projected['macro_f1']:.4f} | "
+        f"subset acc {projected['subset_accuracy']:.4f} | fit {projected['fit_sec']:.2f}s"
+    )
+    click.echo(
+        f"   Δ macro F1 {result['macro_f1_delta']:+.4f} | "
+        f"storage {result['size_ratio']:.1%} of float32"
+    )
+
+    report = {}
+    if os.path.exists(report_file):
+        with open(report_file) as f:
+            report = json.load(f)
+    report[f"{method}-{projection.n_components_}-{dtype}"] = result
+    os.makedirs(os.path.dirname(report_file) or ".", exist_ok=True)
+    with open(report_file, "w") as f:
+        json.dump(report, f, indent=2)
+    click.echo(f"📝 Impact report updated: {report_file}")
+
+
+if __name__ == "__main__":
+    project_embeddings()
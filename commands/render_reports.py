@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+
+from utils.helper import EVALUATION_SUFFIX, render_report_plots
+from utils.instrumentation import instrumented
+
+
+def find_evaluations(reports_dir):
+    """
+    Lists (output_dir, model_name) pairs for every saved evaluation under reports_dir.
+    """
+    evaluations = []
+    for root, _, files in os.walk(reports_dir):
+        for name in sorted(files):
+            if name.endswith(EVALUATION_SUFFIX):
+                evaluations.append((root, name[: -len(EVALUATION_SUFFIX)]))
+    return evaluations
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--reports-dir",
+    default="data/reports",
+    type=click.Path(exists=True),
+    help="Directory searched recursively for saved model evaluations.",
+)
+@click.option(
+    "--workers",
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="Number of processes rendering plots in parallel.",
+)
+def render_reports(reports_dir, workers):
+    """
+    Renders PRF charts, confusion heatmaps and Jaccard histograms for every
+    evaluation saved by the training commands.
+    """
+    evaluations = find_evaluations(reports_dir)
+    if not evaluations:
+        click.echo(f"⚠️ No saved evaluations found in {reports_dir}")
+        return
+
+    click.echo(f"🖼️ Rendering plots for {len(evaluations)} model(s)...")
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(evaluations)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = {
+            executor.submit(render_report_plots, output_dir, model_name): model_name
+            for output_dir, model_name in evaluations
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                click.echo(f"❌ Failed to render {futures[future]}: {e}")
+
+    click.echo(f"✅ Report plots rendered in: {reports_dir}")
+
+
+if __name__ == "__main__":
+    render_reports()
@@ -0,0 +1,339 @@
+import os
+import time
+
+import click
+
+from commands.apply_mlsmote import apply_mlsmote
+from commands.cleaned_commits import clean_commits
+from commands.dedup_commits import dedup_commits
+from commands.extract_raw_commits import extract_raw_commit_messages
+from commands.fetch_commits import fetch_commits
+from commands.label_commits import label_commits
+from commands.preprocess_commits import preprocess_commits
+from commands.split_train_test import split_dataset
+from commands.train_all import MODEL_FAMILIES, train_all_models
+from commands.visualize_cleaned_commits import visualize_cleaned_commits
+from commands.visualize_mlsmote_distribution import visualize_mlsmote_distribution
+from utils.instrumentation import RUNS_DIR, instrumented, run_manifest
+from utils.pipeline import PIPELINE_CACHE_FILE, PipelineRunner, Stage
+from utils.registry import MANIFEST_FILE
+
+STAGE_NAMES = (
+    "fetch",
+    "extract",
+    "label",
+    "clean",
+    "preprocess",
+    "dedup",
+    "visualize-cleaned",
+    "mlsmote",
+    "split",
+    "visualize-mlsmote",
+    "train",
+)
+
+
+def build_stages(
+    repos_file,
+    models=(),
+    cpus=None,
+    samples_per_class=200,
+    encoder="all-MiniLM-L6-v2",
+    fused=False,
+    dedup=False,
+):
+    """
+    The data and training pipeline of run_data_pipeline.sh, followed by
+    train-all, with the same file layout. With fused, one streaming
+    preprocess stage replaces extract, label and clean. With dedup, mlsmote
+    reads the deduplicated, weighted commits instead of all cleaned ones.
+    """
+    raw_dir = "data/raw_data"
+    raw_csv = "data/csv_data/raw_commit_messages.csv"
+    labeled_csv = "data/csv_data/labeled_commits.csv"
+    cleaned_csv = "data/csv_data/cleaned_commits.csv"
+    nonconv_csv = "data/csv_data/non_conventional_commits.csv"
+    deduped_csv = "data/csv_data/deduplicated_commits.csv"
+    dedup_report = "data/reports/dedup_report.json"
+    resampled_csv = "data/csv_data/resampled_mlsmote.csv"
+    encoder_file = "data/models/sentence_bert_model_name.txt"
+    train_csv = "data/csv_data/train_re_sampled_mlsmote.csv"
+    test_csv = "data/csv_data/test_re_sampled_mlsmote.csv"
+    comparison_file = "data/reports/model_comparison.json"
+
+    if fused:
+        preprocessing = [
+            Stage(
+                "preprocess",
+                preprocess_commits,
+                {"input_folder": raw_dir, "output_file": cleaned_csv, "nonconv_output": nonconv_csv},
+                inputs=[raw_dir],
+                outputs=[cleaned_csv, nonconv_csv],
+            ),
+        ]
+    else:
+        preprocessing = [
+            Stage(
+                "extract",
+                extract_raw_commit_messages,
+                {"input_folder": raw_dir, "output_file": raw_csv},
+                inputs=[raw_dir],
+                outputs=[raw_csv],
+            ),
+            Stage(
+                "label",
+                label_commits,
+                {"input_file": raw_csv, "output_file": labeled_csv},
+                inputs=[raw_csv],
+                outputs=[labeled_csv],
+            ),
+            Stage(
+                "clean",
+                clean_commits,
+                {"input_file": labeled_csv, "output_file": cleaned_csv, "nonconv_output": nonconv_csv},
+                inputs=[labeled_csv],
+                outputs=[cleaned_csv, nonconv_csv],
+            ),
+        ]
+
+    mlsmote_input = cleaned_csv
+    if dedup:
+        mlsmote_input = deduped_csv
+        preprocessing.append(
+            Stage(
+                "dedup",
+                dedup_commits,
+                {"input_file": cleaned_csv, "output_file": deduped_csv, "report_file": dedup_report},
+                inputs=[cleaned_csv],
+                outputs=[deduped_csv, dedup_report],
+            )
+        )
+
+    return [
+        Stage(
+            "fetch",
+            fetch_commits,
+            {"input_file": repos_file, "output_folder": raw_dir},
+            inputs=[repos_file],
+            outputs=[raw_dir],
+            # New upstream commits are not visible in repos.json; the ETags
+            # keep unchanged repositories at one request each.
+            always_run=True,
+        ),
+        *preprocessing,
+        Stage(
+            "visualize-cleaned",
+            visualize_cleaned_commits,
+            {"input_file": cleaned_csv, "output_dir": "data/plots"},
+            inputs=[cleaned_csv],
+            outputs=["data/plots"],
+            resource="matplotlib",
+        ),
+        Stage(
+            "mlsmote",
+            apply_mlsmote,
+            {
+                "input_file": mlsmote_input,
+                "output_file": resampled_csv,
+                "vectorizer_file": encoder_file,
+                "model_name": encoder,
+                "samples_per_class": samples_per_class,
+            },
+            inputs=[mlsmote_input],
+            outputs=[resampled_csv, encoder_file],
+        ),
+        Stage(
+            "split",
+            split_dataset,
+            {"input_file": resampled_csv, "train_output": train_csv, "test_output": test_csv},
+            inputs=[resampled_csv],
+            outputs=[train_csv, test_csv],
+        ),
+        Stage(
+            "visualize-mlsmote",
+            visualize_mlsmote_distribution,
+            {
+                "resampled_file": resampled_csv,
+                "output_image": "data/plots/resampled_label_distribution.png",
+            },
+            inputs=[resampled_csv],
+            outputs=["data/plots/resampled_label_distribution.png"],
+            resource="matplotlib",
+        ),
+        Stage(
+            "train",
+            train_all_models,
+            {
+                "train_file": train_csv,
+                "test_file": test_csv,
+                "models": list(models),
+                "cpus": cpus,
+                "comparison_file": comparison_file,
+            },
+            # The encoder name file is an input: models follow the encoder.
+            inputs=[train_csv, test_csv, encoder_file],
+            outputs=[comparison_file, MANIFEST_FILE],
+        ),
+    ]
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--repos-file",
+    default="repos.json",
+    show_default=True,
+    help="JSON list of repositories to fetch commits from.",
+)
+@click.option(
+    "--stage",
+    "stages",
+    multiple=True,
+    type=click.Choice(STAGE_NAMES),
+    help="Run only these stages (repeatable); their inputs must already exist.",
+)
+@click.option(
+    "--skip-stage",
+    multiple=True,
+    type=click.Choice(STAGE_NAMES),
+    help="Leave these stages out (repeatable).",
+)
+@click.option(
+    "--models",
+    "-m",
+    multiple=True,
+    type=click.Choice(list(MODEL_FAMILIES)),
+    help="Model families trained by the train stage (default: all).",
+)
+@click.option(
+    "--cpus",
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="CPU budget of the train stage.",
+)
+@click.option(
+    "--samples-per-class",
+    default=200,
+    show_default=True,
+    help="MLSMOTE synthetic samples per minority class.",
+)
+@click.option(
+    "--encoder",
+    default="all-MiniLM-L6-v2",
+    show_default=True,
+    help="Sentence-BERT model used by the mlsmote stage.",
+)
+@click.option(
+    "--workers",
+    default=2,
+    show_default=True,
+    help="Stages allowed to run at the same time.",
+)
+@click.option(
+    "--fused",
+    is_flag=True,
+    help="Replace extract, label and clean with one streaming preprocess stage.",
+)
+@click.option(
+    "--dedup",
+    is_flag=True,
+    help="Collapse duplicate and near-duplicate commits before mlsmote, weighting the rest.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Rerun every selected stage even if its inputs are unchanged.",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Only show which stages are up to date and which would run.",
+)
+@click.option(
+    "--runs-dir",
+    default=RUNS_DIR,
+    type=click.Path(),
+    help="Directory receiving one JSON run manifest (per-stage metrics) per execution.",
+)
+@click.option(
+    "--trace-memory",
+    is_flag=True,
+    help="Record tracemalloc allocation deltas per stage (slows pure-Python stages).",
+)
+@click.option(
+    "--profile-dir",
+    default=None,
+    type=click.Path(),
+    help="Write a cProfile dump of every stage that runs into this directory.",
+)
+@click.option(
+    "--cache-file",
+    default=PIPELINE_CACHE_FILE,
+    type=click.Path(),
+    help="Where stage input hashes of successful runs are kept.",
+)
+def run_pipeline(
+    repos_file,
+    stages,
+    skip_stage,
+    models,
+    cpus,
+    samples_per_class,
+    encoder,
+    workers,
+    fused,
+    dedup,
+    force,
+    dry_run,
+    runs_dir,
+    trace_memory,
+    profile_dir,
+    cache_file,
+):
+    """
+    Runs fetch → extract → label → clean → visualize → mlsmote → split → train
+    in one process, skipping stages whose inputs and options are unchanged.
+    """
+    selected = [
+        stage
+        for stage in build_stages(
+            repos_file, models, cpus, samples_per_class, encoder, fused, dedup
+        )
+        if (not stages or stage.name in stages) and stage.name not in skip_stage
+    ]
+    if not selected:
+        click.echo("⚠️ No stages selected.")
+        return
+
+    runner = PipelineRunner(
+        selected,
+        cache_file=cache_file,
+        workers=workers,
+        force=force,
+        profile_dir=profile_dir,
+    )
+
+    if dry_run:
+        for name, status in runner.plan().items():
+            icon = "♻️" if status == "cached" else "🔸"
+            click.echo(f"{icon} {name}: {status}")
+        return
+
+    click.echo(f"🔵 Running {len(selected)} stage(s) with up to {workers} at a time")
+    start = time.perf_counter()
+    with run_manifest("pipeline", runs_dir, trace_memory=trace_memory) as run:
+        results = runner.run()
+        run["pipeline"] = results
+    total = time.perf_counter() - start
+
+    n_ran = sum(result["status"] == "ran" for result in results.values())
+    n_cached = sum(result["status"] == "cached" for result in results.values())
+    failed = [name for name, result in results.items() if result["status"] in ("failed", "blocked")]
+    click.echo(f"⏱️ Pipeline finished in {total:.1f}s: {n_ran} ran, {n_cached} skipped")
+    if failed:
+        raise click.ClickException(f"stages not completed: {', '.join(failed)}")
+    click.echo("✅ All stages completed!")
+
+
+if __name__ == "__main__":
+    run_pipeline()
@@ -0,0 +1,97 @@
+import json
+import os
+
+import click
+
+from utils.github_standin import GitHubStandIn
+from utils.instrumentation import instrumented
+
+
+@instrumented
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to bind.")
+@click.option("--port", default=8765, show_default=True, help="Port to listen on.")
+@click.option("--n-repos", default=4, show_default=True, help="Number of synthetic repositories.")
+@click.option(
+    "--commits-per-repo", default=10000, show_default=True, help="Synthetic commits per repository."
+)
+@click.option(
+    "--rate-limit", default=5000, show_default=True, help="Requests allowed per rate-limit window."
+)
+@click.option(
+    "--rate-window", default=3600, show_default=True, help="Rate-limit window in seconds."
+)
+@click.option(
+    "--secondary-limit",
+    default=None,
+    type=int,
+    help="Concurrent requests above which a secondary rate limit (403 + Retry-After) is returned.",
+)
+@click.option(
+    "--retry-after", default=1.0, show_default=True, help="Retry-After of secondary limits, in seconds."
+)
+@click.option("--latency", default=0.0, show_default=True, help="Seconds added to every response.")
+@click.option("--jitter", default=0.0, show_default=True, help="Extra random latency, up to this many seconds.")
+@click.option(
+    "--error-rate", default=0.0, show_default=True, help="Share of requests answered with a 502."
+)
+@click.option("--seed", default=0, show_default=True, help="Seed of the commits, latency and errors.")
+@click.option(
+    "--repos-file",
+    default="data/standin_repos.json",
+    show_default=True,
+    type=click.Path(),
+    help="Where to write the repos.json to pass to fetch-commits.",
+)
+def serve_github_standin(
+    host,
+    port,
+    n_repos,
+    commits_per_repo,
+    rate_limit,
+    rate_window,
+    secondary_limit,
+    retry_after,
+    latency,
+    jitter,
+    error_rate,
+    seed,
+    repos_file,
+):
+    """
+    Serves synthetic repositories through a local stand-in of the GitHub
+    commits API, so fetch-commits can be benchmarked and tuned offline.
+    """
+    server = GitHubStandIn.synthetic(
+        n_repos=n_repos,
+        commits_per_repo=commits_per_repo,
+        seed=seed,
+        host=host,
+        port=port,
+        rate_limit=rate_limit,
+        rate_window=rate_window,
+        secondary_limit=secondary_limit,
+        retry_after=retry_after,
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+    )
+    os.makedirs(os.path.dirname(repos_file) or ".", exist_ok=True)
+    with open(repos_file, "w") as f:
+        json.dump(server.repos_config(), f, indent=2)
+
+    click.echo(f"🛰️ GitHub stand-in serving {n_repos} repos at {server.url}")
+    click.echo(
+        f"👉 python main_cli.py data fetch-commits --input-file {repos_file} --api-url {server.url}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        click.echo(f"📊 Requests served: {json.dumps(server.stats)}")
+
+
+if __name__ == "__main__":
+    serve_github_standin()
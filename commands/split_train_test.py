@@ -2,7 +2,11 @@ import click
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from utils.embedding_store import SAMPLE_WEIGHT_COLUMN
+from utils.instrumentation import instrumented, record_rows
 
+
+@instrumented
 @click.command()
 @click.option(
     "--input-file",
@@ -27,16 +31,33 @@ from sklearn.model_selection import train_test_split
     default=0.2,
     help="Proportion of the dataset to include in the test split.",
 )
-def split_dataset(input_file, train_output, test_output, test_size):
+@click.option(
+    "--validation-output",
+    default="data/csv_data/validation_re_sampled_mlsmote.csv",
+    type=click.Path(),
+    help="Path to save the validation set used for threshold calibration.",
+)
+@click.option(
+    "--validation-size",
+    default=0.0,
+    help="Proportion of the dataset held out for threshold calibration (0 disables it).",
+)
+def split_dataset(
+    input_file, train_output, test_output, test_size, validation_output, validation_size
+):
     """
     Splits multi-label dataset into training and test sets.
     Keeps all DEMPE_Class_* columns as labels.
     """
     click.echo(f"📥 Reading multi-label data from {input_file}...")
     df = pd.read_csv(input_file)
+    record_rows(rows_in=len(df), rows_out=len(df))
 
     label_cols = [col for col in df.columns if col.startswith("DEMPE_Class_")]
     feature_cols = [col for col in df.columns if col.startswith("f_")]
+    # Sample weights of deduplicated data travel with their rows.
+    if SAMPLE_WEIGHT_COLUMN in df:
+        feature_cols.append(SAMPLE_WEIGHT_COLUMN)
 
     X = df[feature_cols]
     y = df[label_cols]
@@ -45,6 +66,16 @@ def split_dataset(input_file, train_output, test_output, test_size):
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=test_size, random_state=42
     )
+    if validation_size > 0:
+        # Carve the validation rows out of the training split, sized on the full dataset.
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_train, y_train, test_size=validation_size / (1 - test_size), random_state=42
+        )
+        val_df = pd.concat(
+            [X_val.reset_index(drop=True), y_val.reset_index(drop=True)], axis=1
+        )
+        val_df.to_csv(validation_output, index=False)
+        click.echo(f"✅ Validation set saved to {validation_output}")
 
     # Combine features and labels
     train_df = pd.concat(
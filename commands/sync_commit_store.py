@@ -0,0 +1,110 @@
+import os
+
+import click
+
+from commands.cleaned_commits import clean_text
+from commands.label_commits import MultiLabelCommitClassifier
+from commands.preprocess_commits import CSV_NA_VALUES, iter_json_array
+from utils.commit_store import DEFAULT_STORE, CommitStore, commit_record
+from utils.instrumentation import instrumented, record_rows
+
+
+def commit_lines(repo, sha, message, classifier):
+    """
+    Splits a commit message into lines like preprocess-commits and returns the
+    (label rows, cleaned rows) of the store. Lines with conventional tags are
+    cleaned and labeled; the others are kept as written, without labels.
+    """
+    label_rows, cleaned_rows = [], []
+    for line_number, line in enumerate(str(message).split("\n")):
+        line = line.strip()
+        if line in CSV_NA_VALUES:
+            continue
+        tags = classifier.extract_commit_tags(line)
+        if tags:
+            label_rows.append((repo, sha, line_number, sum(1 << int(tag) for tag in tags)))
+            cleaned_rows.append((repo, sha, line_number, clean_text(line), 1))
+        else:
+            cleaned_rows.append((repo, sha, line_number, line, 0))
+    return label_rows, cleaned_rows
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--input-folder",
+    default="data/raw_data",
+    type=click.Path(exists=True, file_okay=False),
+    help="Folder of raw commit JSON files written by fetch-commits or ingest-local-repos.",
+)
+@click.option(
+    "--store",
+    default=DEFAULT_STORE,
+    type=click.Path(),
+    help="SQLite commit store to update.",
+)
+@click.option(
+    "--chunk-size",
+    default=10_000,
+    show_default=True,
+    help="New commits written per transaction.",
+)
+def sync_commit_store(input_folder, store, chunk_size):
+    """
+    Upserts the raw commits into the commit store with their rule labels and
+    cleaned lines. Commits already stored are skipped, so only new commits
+    are split, tagged and cleaned.
+    """
+    classifier = MultiLabelCommitClassifier()
+    json_files = sorted(f for f in os.listdir(input_folder) if f.endswith(".json"))
+    click.echo(f"📂 Syncing {len(json_files)} raw commit file(s) into {store}...")
+
+    n_seen = n_new = n_lines = 0
+    with CommitStore(store) as commit_store:
+        for json_file in json_files:
+            repo = os.path.splitext(json_file)[0]
+            known = commit_store.known_shas(repo)
+            commits, labels, cleaned = [], [], []
+
+            def flush():
+                nonlocal n_new, n_lines
+                n_new += commit_store.upsert_commits(commits)
+                commit_store.upsert_labels(labels)
+                n_lines += commit_store.upsert_cleaned(cleaned)
+                commit_store.commit()
+                for rows in (commits, labels, cleaned):
+                    rows.clear()
+
+            try:
+                for commit in iter_json_array(os.path.join(input_folder, json_file)):
+                    record = commit_record(repo, commit)
+                    if record is None:
+                        continue
+                    n_seen += 1
+                    if record[1] in known:
+                        continue
+                    known.add(record[1])
+                    commits.append(record)
+                    label_rows, cleaned_rows = commit_lines(repo, record[1], record[4], classifier)
+                    labels.extend(label_rows)
+                    cleaned.extend(cleaned_rows)
+                    if len(commits) >= chunk_size:
+                        flush()
+                flush()
+            except (OSError, ValueError) as e:
+                # Chunks written before the error stay; they are valid commits.
+                commit_store.conn.rollback()
+                click.echo(f"❌ Skipping the rest of {json_file}: {e}")
+
+        totals = {table: commit_store.count(table) for table in ("commits", "labels", "cleaned")}
+
+    record_rows(rows_in=n_seen, rows_out=n_new)
+    click.echo(f"✅ {n_new} new of {n_seen} commits stored, {n_lines} new lines")
+    click.echo(
+        f"🗄️ Store holds {totals['commits']} commits, {totals['cleaned']} lines, "
+        f"{totals['labels']} labeled"
+    )
+
+
+if __name__ == "__main__":
+    sync_commit_store()
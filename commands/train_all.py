@@ -0,0 +1,226 @@
+import importlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from utils.embedding_store import load_sample_weights
+from utils.helper import load_train_test
+from utils.instrumentation import instrumented
+from utils.projection import record_projection
+from utils.registry import MANIFEST_FILE, build_manifest, write_manifest
+
+# Model family -> (trainer module, model file, params file, relative CPU weight)
+MODEL_FAMILIES = {
+    "lg_ovr": (
+        "commands.train_one_vs_rest_lg",
+        "data/models/logreg_ovr_model.pkl",
+        "data/models/logreg_ovr_params.json",
+        1,
+    ),
+    "rf_ovr": (
+        "commands.train_one_vs_rest_random_forest",
+        "data/models/rf_ovr_model.pkl",
+        "data/models/rf_ovr_params.json",
+        3,
+    ),
+    "gbm_ovr": (
+        "commands.train_gbm_ovr",
+        "data/models/gbm_ovr_model.pkl",
+        "data/models/gbm_ovr_params.json",
+        3,
+    ),
+    "nn": (
+        "commands.train_nn",
+        "data/models/nn_multilabel_model.h5",
+        "data/models/nn_multilabel_params.json",
+        2,
+    ),
+    "classifier_chain": (
+        "commands.train_classification_chain",
+        "data/models/classifier_chain_model.pkl",
+        "data/models/classifier_chain_params.json",
+        1,
+    ),
+    "linear_head": (
+        "commands.train_linear_head",
+        "data/models/linear_head_model.pkl",
+        "data/models/linear_head_params.json",
+        1,
+    ),
+}
+
+
+def allocate_cpus(families, total_cpus):
+    """
+    Splits a CPU budget across model families proportionally to their weights,
+    giving every family at least one core.
+    """
+    weights = {name: MODEL_FAMILIES[name][3] for name in families}
+    total_weight = sum(weights.values())
+    return {
+        name: max(1, int(total_cpus * weight / total_weight))
+        for name, weight in weights.items()
+    }
+
+
+def _train_family(name, data, cpus, extra_kwargs):
+    # Runs inside a fresh worker process, but unpickling this function already
+    # imported NumPy and pandas, so their BLAS/OpenMP pools exist by now. The
+    # environment only reaches libraries the trainer loads later (e.g.
+    # TensorFlow); threadpool_limits caps the pools that are already running.
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(cpus)
+
+    module_path, model_file, params_file, _ = MODEL_FAMILIES[name]
+    module = importlib.import_module(module_path)
+
+    X_train, y_train, X_test, y_test, label_cols = data
+    start = time.perf_counter()
+    with threadpool_limits(limits=cpus):
+        summary = module.fit_model(
+            X_train,
+            y_train,
+            X_test,
+            y_test,
+            label_cols,
+            model_file,
+            params_file,
+            n_jobs=cpus,
+            **extra_kwargs,
+        )
+    return summary, time.perf_counter() - start
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--train-file",
+    default="data/csv_data/train_re_sampled_mlsmote.csv",
+    type=click.Path(exists=True),
+    help="Path to the training CSV file.",
+)
+@click.option(
+    "--test-file",
+    default="data/csv_data/test_re_sampled_mlsmote.csv",
+    type=click.Path(exists=True),
+    help="Path to the test CSV file.",
+)
+@click.option(
+    "--models",
+    "-m",
+    multiple=True,
+    type=click.Choice(list(MODEL_FAMILIES)),
+    help="Model families to train (default: all).",
+)
+@click.option(
+    "--cpus",
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="Total CPU budget shared across the model families.",
+)
+@click.option(
+    "--booster",
+    default="xgboost",
+    type=click.Choice(["xgboost", "lightgbm"]),
+    help="Gradient boosting library to use for the gbm_ovr family.",
+)
+@click.option(
+    "--comparison-file",
+    default="data/reports/model_comparison.json",
+    type=click.Path(),
+    help="Path to store the combined metrics and wall times of all models.",
+)
+@click.option(
+    "--no-plots",
+    is_flag=True,
+    help="Skip rendering report plots (render them later with render-reports).",
+)
+def train_all_models(
+    train_file, test_file, models, cpus, booster, comparison_file, no_plots
+):
+    """
+    Trains every model family concurrently from a single load of the train/test data.
+    """
+    families = list(models) or list(MODEL_FAMILIES)
+
+    click.echo(f"📥 Loading training data from {train_file}...")
+    click.echo(f"📥 Loading test data from {test_file}...")
+    data = load_train_test(train_file, test_file)
+    click.echo(f"🔢 Features: {data[0].shape[1]} | Labels: {len(data[4])}")
+    sample_weight = load_sample_weights(train_file)
+    if sample_weight is not None:
+        click.echo(f"⚖️ Training rows weighted by duplicate count ({int(sample_weight.sum())} commits)")
+
+    budgets = allocate_cpus(families, cpus)
+    for name, budget in budgets.items():
+        click.echo(f"🧮 {name}: {budget} CPU(s)")
+
+    results = {}
+    start = time.perf_counter()
+    # Spawned workers keep TensorFlow/OpenMP state out of the parent process.
+    with ProcessPoolExecutor(
+        max_workers=len(families),
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as executor:
+        futures = {
+            executor.submit(
+                _train_family,
+                name,
+                data,
+                budgets[name],
+                {
+                    # Each family already has its own process; a background plot
+                    # process would be killed when the worker exits.
+                    "plots": "none" if no_plots else "sync",
+                    **({"booster": booster} if name == "gbm_ovr" else {}),
+                    **({"sample_weight": sample_weight} if sample_weight is not None else {}),
+                },
+            ): name
+            for name in families
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                summary, wall_time = future.result()
+                record_projection(MODEL_FAMILIES[name][1], train_file)
+                results[name] = {
+                    "status": "ok",
+                    "cpus": budgets[name],
+                    "wall_time_sec": round(wall_time, 2),
+                    **summary,
+                }
+                click.echo(f"✅ {name} finished in {wall_time:.1f}s")
+            except Exception as e:
+                results[name] = {"status": "failed", "error": str(e)}
+                click.echo(f"❌ {name} failed: {e}")
+
+    total_time = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(comparison_file), exist_ok=True)
+    with open(comparison_file, "w") as f:
+        json.dump(
+            {"total_wall_time_sec": round(total_time, 2), "models": results},
+            f,
+            indent=2,
+        )
+
+    click.echo("📊 Model comparison:")
+    comparison = pd.DataFrame(results).T
+    columns = ["status", "cpus", "wall_time_sec", "subset_accuracy", "macro_f1"]
+    click.echo(comparison.reindex(columns=columns).to_string())
+    click.echo(f"⏱️ All models finished in {total_time:.1f}s")
+    click.echo(f"✅ Comparison saved to: {comparison_file}")
+
+    write_manifest(build_manifest(), MANIFEST_FILE)
+    click.echo(f"🗂️ Model manifest refreshed: {MANIFEST_FILE}")
+
+
+if __name__ == "__main__":
+    train_all_models()
@@ -4,16 +4,19 @@ import os
 import click
 import joblib
 import numpy as np
-import pandas as pd
 from sklearn.metrics import classification_report
 from sklearn.model_selection import GridSearchCV
 from sklearn.multiclass import OneVsRestClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
-from utils.helper import evaluate_and_save_metrics
+from utils.embedding_store import load_sample_weights
+from utils.helper import evaluate_and_save_metrics, fit_search, load_train_test
+from utils.instrumentation import instrumented
+from utils.projection import record_projection
 
 
+@instrumented
 @click.command()
 @click.option(
     "--train-file",
@@ -45,24 +48,56 @@ from utils.helper import evaluate_and_save_metrics
     type=click.Choice(["xgboost", "lightgbm"]),
     help="Gradient boosting library to use (xgboost or lightgbm).",
 )
-def train_gbm_model(train_file, test_file, model_file, params_file, booster):
+@click.option(
+    "--no-plots",
+    is_flag=True,
+    help="Skip rendering report plots (render them later with render-reports).",
+)
+def train_gbm_model(
+    train_file, test_file, model_file, params_file, booster, no_plots
+):
     """
     Trains a OneVsRestClassifier using XGBoost or LightGBM for multilabel classification.
     """
     click.echo(f"📥 Loading training data from {train_file}...")
-    df_train = pd.read_csv(train_file)
-    df_test = pd.read_csv(test_file)
-
-    label_cols = [col for col in df_train.columns if col.startswith("DEMPE_Class_")]
-    feature_cols = [col for col in df_train.columns if col.startswith("f_")]
-
-    X_train = df_train[feature_cols].values
-    y_train = df_train[label_cols].values
-    X_test = df_test[feature_cols].values
-    y_test = df_test[label_cols].values
-
-    click.echo(f"🔢 Features: {len(feature_cols)} | Labels: {len(label_cols)}")
+    X_train, y_train, X_test, y_test, label_cols = load_train_test(
+        train_file, test_file
+    )
 
+    click.echo(f"🔢 Features: {X_train.shape[1]} | Labels: {len(label_cols)}")
+
+    fit_model(
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        label_cols,
+        model_file,
+        params_file,
+        booster,
+        sample_weight=load_sample_weights(train_file),
+        plots="none" if no_plots else "background",
+    )
+    record_projection(model_file, train_file)
+
+
+def fit_model(
+    X_train,
+    y_train,
+    X_test,
+    y_test,
+    label_cols,
+    model_file,
+    params_file,
+    booster="xgboost",
+    n_jobs=1,
+    sample_weight=None,
+    plots="background",
+):
+    """
+    Runs the grid search, evaluates the best estimator and persists it.
+    Returns the summary metrics of the test set evaluation.
+    """
     if booster == "xgboost":
         from xgboost import XGBClassifier
 
@@ -98,10 +133,10 @@ def train_gbm_model(train_file, test_file, model_file, params_file, booster):
         scoring="f1_micro",
         cv=3,
         verbose=1,
-        n_jobs=1,
+        n_jobs=n_jobs,
     )
 
-    grid.fit(X_train, y_train)
+    fit_search(grid, X_train, y_train, sample_weight)
     best_model = grid.best_estimator_
 
     # Evaluate on test set
@@ -111,12 +146,13 @@ def train_gbm_model(train_file, test_file, model_file, params_file, booster):
     eval_dir = "data/reports/gbm_ovr"
     os.makedirs(eval_dir, exist_ok=True)
 
-    evaluate_and_save_metrics(
+    summary = evaluate_and_save_metrics(
         y_true=y_test,
         y_pred=y_pred,
         label_names=label_cols,
         output_dir=eval_dir,
         model_name="XGBoost",
+        plots=plots,
     )
 
     joblib.dump(best_model, model_file)
@@ -136,6 +172,8 @@ def train_gbm_model(train_file, test_file, model_file, params_file, booster):
         )
     click.echo(f"✅ Training details saved to: {params_file}")
 
+    return summary
+
 
 if __name__ == "__main__":
     train_gbm_model()
@@ -0,0 +1,150 @@
+import json
+import os
+import time
+
+import click
+import joblib
+
+from utils.embedding_store import load_sample_weights
+from utils.helper import evaluate_and_save_metrics, load_train_test
+from utils.instrumentation import instrumented
+from utils.linear_head import RidgeMultilabelHead
+from utils.projection import record_projection
+from utils.thresholds import save_thresholds
+
+
+@instrumented
+@click.command()
+@click.option(
+    "--train-file",
+    default="data/csv_data/train_re_sampled_mlsmote.csv",
+    type=click.Path(exists=True),
+    help="Path to the training CSV file.",
+)
+@click.option(
+    "--test-file",
+    default="data/csv_data/test_re_sampled_mlsmote.csv",
+    type=click.Path(exists=True),
+    help="Path to the test CSV file.",
+)
+@click.option(
+    "--model-file",
+    default="data/models/linear_head_model.pkl",
+    type=click.Path(),
+    help="Path to store the trained model.",
+)
+@click.option(
+    "--params-file",
+    default="data/models/linear_head_params.json",
+    type=click.Path(),
+    help="Path to store the chosen regularisation and per-label thresholds.",
+)
+@click.option(
+    "--alpha",
+    "alphas",
+    multiple=True,
+    type=float,
+    default=(0.01, 0.1, 1.0, 10.0, 100.0),
+    show_default=True,
+    help="Ridge strengths to choose from on the held-out split (repeatable).",
+)
+@click.option(
+    "--no-plots",
+    is_flag=True,
+    help="Skip rendering report plots (render them later with render-reports).",
+)
+def train_linear_head_model(
+    train_file, test_file, model_file, params_file, alphas, no_plots
+):
+    """
+    Trains a closed-form ridge multi-label head on the Sentence-BERT features.
+    """
+    click.echo(f"📥 Loading training data from {train_file}...")
+    click.echo(f"📥 Loading test data from {test_file}...")
+    X_train, y_train, X_test, y_test, label_cols = load_train_test(
+        train_file, test_file
+    )
+
+    click.echo(f"🔢 Features: {X_train.shape[1]} | Labels: {len(label_cols)}")
+
+    fit_model(
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        label_cols,
+        model_file,
+        params_file,
+        alphas=alphas,
+        sample_weight=load_sample_weights(train_file),
+        plots="none" if no_plots else "background",
+    )
+    record_projection(model_file, train_file)
+
+
+def fit_model(
+    X_train,
+    y_train,
+    X_test,
+    y_test,
+    label_cols,
+    model_file,
+    params_file,
+    n_jobs=1,
+    alphas=(0.01, 0.1, 1.0, 10.0, 100.0),
+    sample_weight=None,
+    plots="background",
+):
+    """
+    Solves the ridge head, evaluates it and persists it.
+    Returns the summary metrics of the test set evaluation.
+    """
+    click.echo("🧮 Solving ridge head from the Gram matrix...")
+    start = time.perf_counter()
+    model = RidgeMultilabelHead(alphas=tuple(alphas)).fit(
+        X_train, y_train, sample_weight=sample_weight
+    )
+    fit_time = time.perf_counter() - start
+    click.echo(f"⏱️ Fitted in {fit_time:.2f}s (alpha={model.alpha_})")
+
+    # Evaluate on test set
+    click.echo("📊 Classification report on test set:")
+    y_pred = model.predict(X_test)
+
+    eval_dir = "data/reports/linear_head"
+    os.makedirs(eval_dir, exist_ok=True)
+
+    summary = evaluate_and_save_metrics(
+        y_true=y_test,
+        y_pred=y_pred,
+        label_names=label_cols,
+        output_dir=eval_dir,
+        model_name="Linear Head",
+        plots=plots,
+    )
+
+    joblib.dump(model, model_file)
+    click.echo(f"✅ Trained model saved to: {model_file}")
+    save_thresholds(model_file, model.thresholds_, label_cols, model.val_f1_)
+
+    with open(params_file, "w") as f:
+        json.dump(
+            {
+                "alpha": model.alpha_,
+                "validation_mse": model.val_errors_,
+                "thresholds": model.thresholds_.tolist(),
+                "validation_f1": model.val_f1_.tolist(),
+                "fit_time_sec": round(fit_time, 3),
+                "label_columns": label_cols,
+            },
+            f,
+            indent=2,
+        )
+
+    click.echo(f"✅ Training details saved to: {params_file}")
+
+    return summary
+
+
+if __name__ == "__main__":
+    train_linear_head_model()
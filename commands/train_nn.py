@@ -1,21 +1,371 @@
 import json
+import multiprocessing
 import os
+import shutil
+import socket
+import threading
+import time
+from contextlib import contextmanager
 
 import click
 import joblib
 import numpy as np
-import pandas as pd
 import tensorflow as tf
-from keras_tuner import RandomSearch
+from keras_tuner import BayesianOptimization, HyperModel, Hyperband, RandomSearch
 from sklearn.metrics import classification_report
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.callbacks import Callback, EarlyStopping
 from tensorflow.keras.layers import Dense, Dropout
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.optimizers import Adam
 
-from utils.helper import evaluate_and_save_metrics
+from utils.embedding_store import load_sample_weights
+from utils.helper import evaluate_and_save_metrics, load_train_test
+from utils.instrumentation import instrumented
+from utils.projection import record_projection
+from utils.thresholds import (
+    apply_thresholds,
+    best_f1_thresholds,
+    predict_scores,
+    save_thresholds,
+)
+
+
+def split_indices(n_rows, validation_split=0.1, seed=42):
+    """
+    Returns the fixed (train, validation) row indices used by every trial.
+    """
+    rng = np.random.default_rng(seed)
+    indices = rng.permutation(n_rows)
+    n_val = int(n_rows * validation_split)
+    return indices[n_val:], indices[:n_val]
+
+
+def make_datasets(X, y, validation_split=0.1, seed=42, sample_weight=None):
+    """
+    Splits the training arrays once into fixed train/validation tf.data datasets.
+    Both are cast to float32 and cached, so tuner trials never re-slice the arrays.
+    With sample_weight, elements are (x, y, weight) and Keras weights the loss.
+    """
+    train_idx, val_idx = split_indices(len(X), validation_split, seed)
+
+    def to_dataset(idx):
+        tensors = (X[idx].astype(np.float32), y[idx].astype(np.float32))
+        if sample_weight is not None:
+            tensors += (np.asarray(sample_weight, dtype=np.float32)[idx],)
+        return tf.data.Dataset.from_tensor_slices(tensors).cache()
+
+    return to_dataset(train_idx), to_dataset(val_idx), len(train_idx)
+
+
+class MultilabelHyperModel(HyperModel):
+    """
+    Feedforward multilabel network whose batch size is tuned alongside the layers.
+    """
+
+    def __init__(self, n_features, n_labels, batch_sizes):
+        super().__init__()
+        self.n_features = n_features
+        self.n_labels = n_labels
+        self.batch_sizes = list(batch_sizes)
+
+    def build(self, hp):
+        model = Sequential()
+        model.add(
+            Dense(
+                hp.Int("units1", 128, 512, step=64),
+                activation="relu",
+                input_shape=(self.n_features,),
+            )
+        )
+        model.add(Dropout(hp.Float("dropout1", 0.2, 0.5, step=0.1)))
+        model.add(Dense(hp.Int("units2", 64, 256, step=64), activation="relu"))
+        model.add(Dropout(hp.Float("dropout2", 0.2, 0.5, step=0.1)))
+        model.add(Dense(self.n_labels, activation="sigmoid"))
+
+        model.compile(
+            optimizer=Adam(learning_rate=hp.Choice("lr", [0.001, 0.0005])),
+            loss="binary_crossentropy",
+            metrics=["accuracy"],
+        )
+        return model
+
+    def fit(
+        self,
+        hp,
+        model,
+        train_ds,
+        validation_data,
+        train_size,
+        trial_dir=None,
+        checkpoint_every=0,
+        **kwargs,
+    ):
+        batch_size = hp.Choice("batch_size", self.batch_sizes)
+        train_batches = (
+            train_ds.shuffle(train_size, seed=42)
+            .batch(batch_size)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+        val_batches = validation_data.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+        if trial_dir and checkpoint_every:
+            progress = TrialProgressCheckpoint(trial_dir, checkpoint_every)
+            resume_epoch = progress.restore(model)
+            if resume_epoch > kwargs.get("initial_epoch", 0):
+                kwargs["initial_epoch"] = resume_epoch
+            kwargs["callbacks"] = list(kwargs.get("callbacks", [])) + [progress]
+
+        return model.fit(train_batches, validation_data=val_batches, **kwargs)
+
+
+class TrialProgressCheckpoint(Callback):
+    """
+    Periodically saves the weights of the running trial, so a trial interrupted
+    mid-way restarts from its last checkpoint instead of epoch zero.
+    """
+
+    def __init__(self, trial_dir, every_n_epochs):
+        super().__init__()
+        self.every_n_epochs = every_n_epochs
+        self.weights_file = os.path.join(trial_dir, "progress.weights.h5")
+        self.state_file = os.path.join(trial_dir, "progress.json")
+
+    def restore(self, model):
+        """
+        Loads saved weights into the model and returns the epoch to continue from.
+        """
+        if not os.path.exists(self.state_file):
+            return 0
+        with open(self.state_file) as f:
+            state = json.load(f)
+        model.load_weights(self.weights_file)
+        click.echo(f"♻️ Resuming trial from epoch {state['epoch'] + 1}")
+        return state["epoch"] + 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        if (epoch + 1) % self.every_n_epochs == 0:
+            self.model.save_weights(self.weights_file)
+            # The state file is written last, so it never points at partial weights.
+            with open(self.state_file, "w") as f:
+                json.dump({"epoch": epoch}, f)
+
+
+class TimedTunerMixin:
+    """
+    Records the wall time of every trial next to the trial's checkpoint, so
+    timings survive multi-process searches where trials run in other workers.
+    """
+
+    def run_trial(self, trial, *args, **kwargs):
+        kwargs["trial_dir"] = self.get_trial_dir(trial.trial_id)
+        return super().run_trial(trial, *args, **kwargs)
+
+    def on_trial_begin(self, trial):
+        self._trial_start = time.perf_counter()
+        super().on_trial_begin(trial)
+
+    def on_trial_end(self, trial):
+        wall_time = time.perf_counter() - self._trial_start
+        super().on_trial_end(trial)
+        trial_dir = self.get_trial_dir(trial.trial_id)
+        with open(os.path.join(trial_dir, "timing.json"), "w") as f:
+            json.dump({"wall_time_sec": round(wall_time, 2)}, f)
+
+        # The trial finished, so its mid-trial restart point is no longer needed.
+        for name in ("progress.json", "progress.weights.h5"):
+            if os.path.exists(os.path.join(trial_dir, name)):
+                os.remove(os.path.join(trial_dir, name))
+
+        self._save_best_checkpoint(trial)
+
+    def _save_best_checkpoint(self, trial):
+        # Keep a copy of the best weights so far outside the trial folders.
+        best_trials = self.oracle.get_best_trials(1)
+        if not best_trials or best_trials[0].trial_id != trial.trial_id:
+            return
+        checkpoint = self._get_checkpoint_fname(trial.trial_id)
+        if not os.path.exists(checkpoint):
+            return
+        shutil.copyfile(
+            checkpoint, os.path.join(self.project_dir, "best_checkpoint.weights.h5")
+        )
+        with open(os.path.join(self.project_dir, "best_trial.json"), "w") as f:
+            json.dump(
+                {
+                    "trial_id": trial.trial_id,
+                    "score": trial.score,
+                    "hyperparameters": trial.hyperparameters.values,
+                },
+                f,
+                indent=2,
+            )
+
+
+class TimedRandomSearch(TimedTunerMixin, RandomSearch):
+    pass
+
+
+class TimedHyperband(TimedTunerMixin, Hyperband):
+    pass
+
+
+class TimedBayesianOptimization(TimedTunerMixin, BayesianOptimization):
+    pass
+
+
+class DeadlineCallback(Callback):
+    """
+    Stops training at the end of an epoch once the search deadline has passed.
+    """
+
+    def __init__(self, deadline=None):
+        super().__init__()
+        self.deadline = deadline
+
+    def on_epoch_end(self, epoch, logs=None):
+        if self.deadline and time.time() >= self.deadline:
+            self.model.stop_training = True
+
+
+SEARCH_MODES = {
+    "random": TimedRandomSearch,
+    "hyperband": TimedHyperband,
+    "bayesian": TimedBayesianOptimization,
+}
+
+
+def build_tuner(search, hypermodel, max_trials, max_epochs, overwrite=True):
+    """
+    Creates the Keras Tuner for the requested search mode.
+    Hyperband allocates epochs per trial itself and discards weak trials early.
+    """
+    kwargs = dict(
+        objective="val_accuracy",
+        executions_per_trial=1,
+        overwrite=overwrite,
+        directory="tuner_logs",
+        project_name="multilabel_nn",
+    )
+    if search == "hyperband":
+        return TimedHyperband(
+            hypermodel, max_epochs=max_epochs, factor=3, hyperband_iterations=1, **kwargs
+        )
+    return SEARCH_MODES[search](hypermodel, max_trials=max_trials, **kwargs)
+
+
+def search_callbacks(deadline=None):
+    return [
+        EarlyStopping(monitor="val_loss", patience=10, restore_best_weights=True),
+        DeadlineCallback(deadline),
+    ]
 
 
+def collect_trial_timings(tuner):
+    """
+    Gathers status, score, hyperparameters and wall time for every finished trial.
+    """
+    trials = []
+    for trial_id, trial in sorted(tuner.oracle.trials.items()):
+        timing_file = os.path.join(tuner.get_trial_dir(trial_id), "timing.json")
+        wall_time = None
+        if os.path.exists(timing_file):
+            with open(timing_file) as f:
+                wall_time = json.load(f)["wall_time_sec"]
+        trials.append(
+            {
+                "trial_id": trial_id,
+                "status": trial.status,
+                "score": trial.score,
+                "wall_time_sec": wall_time,
+                "hyperparameters": trial.hyperparameters.values,
+            }
+        )
+    return trials
+
+
+def _start_budget_timer(tuner, deadline):
+    """
+    Caps the oracle at the trials created so far once the deadline passes,
+    which makes it stop handing out new trials.
+    """
+    if not deadline:
+        return None
+
+    def stop_search():
+        tuner.oracle.max_trials = max(1, len(tuner.oracle.trials))
+
+    timer = threading.Timer(max(0, deadline - time.time()), stop_search)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+@contextmanager
+def _oracle_env(tuner_id, port):
+    # Keras Tuner reads its distribution settings from these variables.
+    env = {
+        "KERASTUNER_TUNER_ID": tuner_id,
+        "KERASTUNER_ORACLE_IP": "127.0.0.1",
+        "KERASTUNER_ORACLE_PORT": str(port),
+    }
+    previous = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _search_worker(
+    tuner_id,
+    port,
+    threads,
+    search,
+    batch_sizes,
+    max_trials,
+    max_epochs,
+    deadline,
+    checkpoint_every,
+    X_train,
+    y_train,
+    n_labels,
+    sample_weight=None,
+):
+    # Runs in a spawned process and pulls trials from the chief oracle.
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    train_ds, val_ds, train_size = make_datasets(X_train, y_train, sample_weight=sample_weight)
+
+    with _oracle_env(tuner_id, port):
+        tuner = build_tuner(
+            search,
+            MultilabelHyperModel(X_train.shape[1], n_labels, batch_sizes),
+            max_trials,
+            max_epochs,
+            overwrite=False,
+        )
+        tuner.search(
+            train_ds,
+            validation_data=val_ds,
+            train_size=train_size,
+            epochs=max_epochs,
+            callbacks=search_callbacks(deadline),
+            checkpoint_every=checkpoint_every,
+            verbose=0,
+        )
+
+
+@instrumented
 @click.command()
 @click.option(
     "--train-file",
@@ -41,93 +391,284 @@ from utils.helper import evaluate_and_save_metrics
     type=click.Path(),
     help="Path to store training parameters and summary.",
 )
-def train_nn_model(train_file, test_file, model_file, params_file):
+@click.option(
+    "--batch-size",
+    "batch_sizes",
+    multiple=True,
+    type=int,
+    default=(32,),
+    show_default=True,
+    help="Batch size for training. Repeat the option to let the tuner choose among several.",
+)
+@click.option(
+    "--search",
+    default="random",
+    show_default=True,
+    type=click.Choice(list(SEARCH_MODES)),
+    help="Hyperparameter search strategy. Hyperband stops weak trials early.",
+)
+@click.option(
+    "--max-trials",
+    default=10,
+    show_default=True,
+    help="Number of trials for random and bayesian search.",
+)
+@click.option(
+    "--max-epochs",
+    default=None,
+    type=int,
+    help="Epochs per trial (default: 1000, or 100 for hyperband).",
+)
+@click.option(
+    "--time-budget",
+    default=None,
+    type=float,
+    help="Total search budget in minutes. No new trials start once it is spent.",
+)
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    help="Number of local worker processes running trials in parallel.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue the previous search in tuner_logs, reusing completed trials.",
+)
+@click.option(
+    "--checkpoint-every",
+    default=10,
+    show_default=True,
+    help="Save the running trial's weights every N epochs (0 disables).",
+)
+@click.option(
+    "--intra-op-threads",
+    default=0,
+    show_default=True,
+    help="Threads used inside a single TensorFlow op (0 lets TensorFlow decide).",
+)
+@click.option(
+    "--inter-op-threads",
+    default=0,
+    show_default=True,
+    help="Threads used to run independent TensorFlow ops (0 lets TensorFlow decide).",
+)
+@click.option(
+    "--no-plots",
+    is_flag=True,
+    help="Skip rendering report plots (render them later with render-reports).",
+)
+def train_nn_model(
+    train_file,
+    test_file,
+    model_file,
+    params_file,
+    batch_sizes,
+    search,
+    max_trials,
+    max_epochs,
+    time_budget,
+    workers,
+    resume,
+    checkpoint_every,
+    intra_op_threads,
+    inter_op_threads,
+    no_plots,
+):
     """
     Trains a feedforward neural network for multilabel classification using Keras with Keras Tuner.
     """
     click.echo(f"📥 Loading training data from {train_file}...")
-    df_train = pd.read_csv(train_file)
-    df_test = pd.read_csv(test_file)
+    X_train, y_train, X_test, y_test, label_cols = load_train_test(
+        train_file, test_file
+    )
 
-    label_cols = [col for col in df_train.columns if col.startswith("DEMPE_Class_")]
-    feature_cols = [col for col in df_train.columns if col.startswith("f_")]
+    click.echo(f"🔢 Features: {X_train.shape[1]} | Labels: {len(label_cols)}")
 
-    X_train = df_train[feature_cols].values
-    y_train = df_train[label_cols].values
-    X_test = df_test[feature_cols].values
-    y_test = df_test[label_cols].values
+    fit_model(
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        label_cols,
+        model_file,
+        params_file,
+        n_jobs=intra_op_threads,
+        inter_op_threads=inter_op_threads,
+        batch_sizes=batch_sizes,
+        search=search,
+        max_trials=max_trials,
+        max_epochs=max_epochs,
+        time_budget=time_budget,
+        workers=workers,
+        resume=resume,
+        checkpoint_every=checkpoint_every,
+        sample_weight=load_sample_weights(train_file),
+        plots="none" if no_plots else "background",
+    )
+    record_projection(model_file, train_file)
 
-    click.echo(f"🔢 Features: {len(feature_cols)} | Labels: {len(label_cols)}")
 
-    def build_model(hp):
-        model = Sequential()
-        model.add(
-            Dense(
-                hp.Int("units1", 128, 512, step=64),
-                activation="relu",
-                input_shape=(X_train.shape[1],),
-            )
-        )
-        model.add(Dropout(hp.Float("dropout1", 0.2, 0.5, step=0.1)))
-        model.add(Dense(hp.Int("units2", 64, 256, step=64), activation="relu"))
-        model.add(Dropout(hp.Float("dropout2", 0.2, 0.5, step=0.1)))
-        model.add(Dense(len(label_cols), activation="sigmoid"))
+def fit_model(
+    X_train,
+    y_train,
+    X_test,
+    y_test,
+    label_cols,
+    model_file,
+    params_file,
+    n_jobs=None,
+    inter_op_threads=None,
+    batch_sizes=(32,),
+    search="random",
+    max_trials=10,
+    max_epochs=None,
+    time_budget=None,
+    workers=1,
+    resume=False,
+    checkpoint_every=10,
+    sample_weight=None,
+    plots="background",
+):
+    """
+    Runs the Keras Tuner search, evaluates the best model and persists it.
+    Returns the summary metrics of the test set evaluation.
+    """
+    # Thread pools can only be configured before TensorFlow runs its first op.
+    if n_jobs:
+        tf.config.threading.set_intra_op_parallelism_threads(n_jobs)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads or 1)
+    elif inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
 
-        model.compile(
-            optimizer=Adam(learning_rate=hp.Choice("lr", [0.001, 0.0005])),
-            loss="binary_crossentropy",
-            metrics=["accuracy"],
-        )
-        return model
+    if max_epochs is None:
+        max_epochs = 100 if search == "hyperband" else 1000
+    deadline = time.time() + time_budget * 60 if time_budget else None
 
-    tuner = RandomSearch(
-        build_model,
-        objective="val_accuracy",
-        max_trials=10,
-        executions_per_trial=1,
-        overwrite=True,
-        directory="tuner_logs",
-        project_name="multilabel_nn",
-    )
+    click.echo(f"🧮 Batch size(s): {', '.join(str(b) for b in batch_sizes)}")
+    if resume:
+        click.echo("♻️ Resuming previous search, completed trials are reused.")
+    click.echo(f"🔍 Searching for best hyperparameters ({search}, {workers} worker(s))...")
+    search_start = time.perf_counter()
 
-    early_stop = EarlyStopping(monitor="val_loss", patience=10, restore_best_weights=True)
+    if workers > 1:
+        port = _free_port()
+        threads = max(1, (n_jobs or os.cpu_count() or 1) // workers)
+        with _oracle_env("chief", port):
+            tuner = build_tuner(
+                search,
+                MultilabelHyperModel(X_train.shape[1], len(label_cols), batch_sizes),
+                max_trials,
+                max_epochs,
+                overwrite=not resume,
+            )
+            timer = _start_budget_timer(tuner, deadline)
+            context = multiprocessing.get_context("spawn")
+            processes = [
+                context.Process(
+                    target=_search_worker,
+                    args=(
+                        f"tuner{i}",
+                        port,
+                        threads,
+                        search,
+                        batch_sizes,
+                        max_trials,
+                        max_epochs,
+                        deadline,
+                        checkpoint_every,
+                        X_train,
+                        y_train,
+                        len(label_cols),
+                        sample_weight,
+                    ),
+                )
+                for i in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            # The chief only serves the oracle and returns when all trials ended.
+            tuner.search()
+            for process in processes:
+                process.join()
+    else:
+        train_ds, val_ds, train_size = make_datasets(X_train, y_train, sample_weight=sample_weight)
+        tuner = build_tuner(
+            search,
+            MultilabelHyperModel(X_train.shape[1], len(label_cols), batch_sizes),
+            max_trials,
+            max_epochs,
+            overwrite=not resume,
+        )
+        timer = _start_budget_timer(tuner, deadline)
+        tuner.search(
+            train_ds,
+            validation_data=val_ds,
+            train_size=train_size,
+            epochs=max_epochs,
+            callbacks=search_callbacks(deadline),
+            checkpoint_every=checkpoint_every,
+            verbose=1,
+        )
 
-    click.echo("🔍 Searching for best hyperparameters...")
-    tuner.search(
-        X_train,
-        y_train,
-        validation_split=0.1,
-        epochs=1000,
-        batch_size=32,
-        callbacks=[early_stop],
-        verbose=1,
-    )
+    if timer:
+        timer.cancel()
+    search_time = time.perf_counter() - search_start
+    trials = collect_trial_timings(tuner)
+    click.echo(f"⏱️ {len(trials)} trial(s) finished in {search_time:.1f}s")
 
     best_model = tuner.get_best_models(num_models=1)[0]
     best_hp = tuner.get_best_hyperparameters(1)[0]
 
+    # Calibrate per-label thresholds on the validation split the tuner held out
+    _, val_idx = split_indices(len(X_train))
+    thresholds, val_f1 = None, None
+    if len(val_idx):
+        val_scores = predict_scores(
+            best_model, X_train[val_idx].astype(np.float32), max(batch_sizes)
+        )
+        val_weight = sample_weight[val_idx] if sample_weight is not None else None
+        thresholds, val_f1 = best_f1_thresholds(
+            y_train[val_idx], val_scores, sample_weight=val_weight
+        )
+        click.echo(
+            "🎯 Calibrated thresholds: "
+            + ", ".join(f"{t:.3f}" for t in thresholds)
+        )
+
     # Evaluate on test set
     click.echo("📊 Classification report on test set:")
-    y_pred = (best_model.predict(X_test) > 0.5).astype(int)
+    y_pred = apply_thresholds(
+        predict_scores(best_model, X_test.astype(np.float32), max(batch_sizes)),
+        thresholds,
+    )
     eval_dir = "data/reports/nn"
     os.makedirs(eval_dir, exist_ok=True)
 
-    evaluate_and_save_metrics(
+    summary = evaluate_and_save_metrics(
         y_true=y_test,
         y_pred=y_pred,
         label_names=label_cols,
         output_dir=eval_dir,
         model_name="Neural Network",
+        plots=plots,
     )
 
     tf.keras.models.save_model(best_model, model_file)
     click.echo(f"✅ Keras model saved to: {model_file}")
+    if thresholds is not None:
+        path = save_thresholds(model_file, thresholds, label_cols, val_f1, len(val_idx))
+        click.echo(f"✅ Thresholds saved to: {path}")
 
     with open(params_file, "w") as f:
         json.dump(
             {
                 "best_hyperparameters": best_hp.values,
                 "label_columns": label_cols,
+                "search": search,
+                "search_wall_time_sec": round(search_time, 2),
+                "trials": trials,
             },
             f,
             indent=2,
@@ -135,6 +676,8 @@ def train_nn_model(train_file, test_file, model_file, params_file):
 
     click.echo(f"✅ Training details saved to: {params_file}")
 
+    return summary
+
 
 if __name__ == "__main__":
     train_nn_model()
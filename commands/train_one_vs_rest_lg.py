@@ -4,7 +4,6 @@ import os
 import click
 import joblib
 import numpy as np
-import pandas as pd
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report
 from sklearn.model_selection import GridSearchCV, StratifiedKFold
@@ -13,9 +12,13 @@ from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from skmultilearn.problem_transform import BinaryRelevance
 
-from utils.helper import evaluate_and_save_metrics
+from utils.embedding_store import load_sample_weights
+from utils.helper import evaluate_and_save_metrics, fit_search, load_train_test
+from utils.instrumentation import instrumented
+from utils.projection import record_projection
 
 
+@instrumented
 @click.command()
 @click.option(
     "--train-file",
@@ -41,26 +44,55 @@ from utils.helper import evaluate_and_save_metrics
     type=click.Path(),
     help="Path to store model training parameters and best score.",
 )
-def train_one_vs_rest_lg_model(train_file, test_file, model_file, params_file):
+@click.option(
+    "--no-plots",
+    is_flag=True,
+    help="Skip rendering report plots (render them later with render-reports).",
+)
+def train_one_vs_rest_lg_model(
+    train_file, test_file, model_file, params_file, no_plots
+):
     """
     Trains OneVsRestClassifier with LogisticRegression and evaluates on test set.
     """
     click.echo(f"📥 Loading training data from {train_file}...")
-    df_train = pd.read_csv(train_file)
-
     click.echo(f"📥 Loading test data from {test_file}...")
-    df_test = pd.read_csv(test_file)
-
-    label_cols = [col for col in df_train.columns if col.startswith("DEMPE_Class_")]
-    feature_cols = [col for col in df_train.columns if col.startswith("f_")]
-
-    X_train = df_train[feature_cols].values
-    y_train = df_train[label_cols].values
-    X_test = df_test[feature_cols].values
-    y_test = df_test[label_cols].values
-
-    click.echo(f"🔢 Features: {len(feature_cols)} | Labels: {len(label_cols)}")
+    X_train, y_train, X_test, y_test, label_cols = load_train_test(
+        train_file, test_file
+    )
 
+    click.echo(f"🔢 Features: {X_train.shape[1]} | Labels: {len(label_cols)}")
+
+    fit_model(
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        label_cols,
+        model_file,
+        params_file,
+        sample_weight=load_sample_weights(train_file),
+        plots="none" if no_plots else "background",
+    )
+    record_projection(model_file, train_file)
+
+
+def fit_model(
+    X_train,
+    y_train,
+    X_test,
+    y_test,
+    label_cols,
+    model_file,
+    params_file,
+    n_jobs=1,
+    sample_weight=None,
+    plots="background",
+):
+    """
+    Runs the grid search, evaluates the best estimator and persists it.
+    Returns the summary metrics of the test set evaluation.
+    """
     pipeline = Pipeline(
         [
             ("scaler", StandardScaler()),
@@ -80,10 +112,10 @@ def train_one_vs_rest_lg_model(train_file, test_file, model_file, params_file):
         scoring="f1_micro",
         cv=3,
         verbose=1,
-        n_jobs=1,
+        n_jobs=n_jobs,
     )
 
-    grid.fit(X_train, y_train)
+    fit_search(grid, X_train, y_train, sample_weight)
     best_model = grid.best_estimator_
 
     # Evaluate on test set
@@ -93,12 +125,13 @@ def train_one_vs_rest_lg_model(train_file, test_file, model_file, params_file):
     eval_dir = "data/reports/lg_ovr"
     os.makedirs(eval_dir, exist_ok=True)
 
-    evaluate_and_save_metrics(
+    summary = evaluate_and_save_metrics(
         y_true=y_test,
         y_pred=y_pred,
         label_names=label_cols,
         output_dir=eval_dir,
         model_name="Logistic Regression",
+        plots=plots,
     )
 
     joblib.dump(best_model, model_file)
@@ -118,6 +151,8 @@ def train_one_vs_rest_lg_model(train_file, test_file, model_file, params_file):
 
     click.echo(f"✅ Training details saved to: {params_file}")
 
+    return summary
+
 
 if __name__ == "__main__":
     train_one_vs_rest_lg_model()
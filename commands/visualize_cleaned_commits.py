@@ -7,8 +7,10 @@ import seaborn as sns
 from sklearn.feature_extraction.text import CountVectorizer
 
 from constants import dempe_class_names
+from utils.instrumentation import instrumented, record_rows
 
 
+@instrumented
 @click.command()
 @click.option(
     "--input-file",
@@ -32,6 +34,7 @@ def visualize_cleaned_commits(input_file, output_dir):
     """
     os.makedirs(output_dir, exist_ok=True)
     df = pd.read_csv(input_file)
+    record_rows(rows_in=len(df))
     class_cols = [col for col in df.columns if col.startswith("DEMPE_Class_")]
 
     # Melt for class-wise analysis
@@ -5,6 +5,8 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
 
+from utils.instrumentation import instrumented, record_rows
+
 # Friendly DEMPE class names
 dempe_class_names = {
     "DEMPE_Class_0": "Development",
@@ -15,6 +17,7 @@ dempe_class_names = {
 }
 
 
+@instrumented
 @click.command()
 @click.option(
     "--resampled-file",
@@ -34,6 +37,7 @@ def visualize_mlsmote_distribution(resampled_file, output_image):
     """
     click.echo(f"📥 Loading resampled data from: {resampled_file}")
     df = pd.read_csv(resampled_file)
+    record_rows(rows_in=len(df))
     label_cols = [col for col in df.columns if col.startswith("DEMPE_Class_")]
     label_counts = df[label_cols].sum().rename(index=dempe_class_names)
 
@@ -2,11 +2,20 @@ import click
 
 from commands.apply_mlsmote import apply_mlsmote
 from commands.cleaned_commits import clean_commits
+from commands.dedup_commits import dedup_commits
+from commands.embed_corpus import embed_corpus
 from commands.extract_raw_commits import extract_raw_commit_messages
 from commands.fetch_commits import fetch_commits
+from commands.generate_synthetic_commits import generate_synthetic_commits
+from commands.ingest_local_repos import ingest_local_repos
 from commands.label_commits import label_commits
 from commands.plot_classification_report import plot_classification_report
+from commands.preprocess_commits import preprocess_commits
+from commands.project_embeddings import project_embeddings
+from commands.render_reports import render_reports
+from commands.serve_github_standin import serve_github_standin
 from commands.split_train_test import split_dataset
+from commands.sync_commit_store import sync_commit_store
 from commands.train_classification_chain import train_classifier_chain_model
 from commands.train_gbm_ovr import train_gbm_model
 from commands.train_nn import train_nn_model
@@ -23,12 +32,21 @@ def data_cli():
 
 # Attach individual commands
 data_cli.add_command(fetch_commits, name="fetch-commits")
+data_cli.add_command(serve_github_standin, name="serve-github-standin")
+data_cli.add_command(ingest_local_repos, name="ingest-local-repos")
+data_cli.add_command(generate_synthetic_commits, name="generate-synthetic-commits")
 data_cli.add_command(extract_raw_commit_messages, name="extract-raw-commit-messages")
 data_cli.add_command(label_commits, name="label-commits")
 data_cli.add_command(split_dataset, name="split-dataset")
 data_cli.add_command(clean_commits, name="clean-commits")
+data_cli.add_command(preprocess_commits, name="preprocess-commits")
+data_cli.add_command(dedup_commits, name="dedup-commits")
+data_cli.add_command(sync_commit_store, name="sync-commit-store")
 data_cli.add_command(visualize_cleaned_commits, name="visualize-cleaned-commits")
 data_cli.add_command(plot_classification_report, name="plot-classification-report")
+data_cli.add_command(render_reports, name="render-reports")
+data_cli.add_command(embed_corpus, name="embed-corpus")
+data_cli.add_command(project_embeddings, name="project-embeddings")
 data_cli.add_command(apply_mlsmote, name="apply-mlsmote")
 data_cli.add_command(
     visualize_mlsmote_distribution, name="visualize-mlsmote-distribution"
@@ -1,5 +1,6 @@
 import click
 
+from commands.dempe_allocation_report import dempe_allocation_report
 from commands.predict_dempe import predict_dempe
 
 
@@ -12,3 +13,4 @@ def dempe_cli():
 
 # Add commands to the CLI group
 dempe_cli.add_command(predict_dempe, name="predict-dempe")
+dempe_cli.add_command(dempe_allocation_report, name="allocation-report")
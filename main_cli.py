@@ -2,6 +2,7 @@ import click
 
 from data_cli import data_cli
 from dempe_cli import dempe_cli
+from pipeline_cli import pipeline_cli
 from training_cli import training_cli
 
 
@@ -14,6 +15,7 @@ def cli():
 cli.add_command(data_cli, name="data")
 cli.add_command(training_cli, name="train")
 cli.add_command(dempe_cli, name="dempe")
+cli.add_command(pipeline_cli, name="pipeline")
 
 if __name__ == "__main__":
     cli()
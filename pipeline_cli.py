@@ -0,0 +1,13 @@
+import click
+
+from commands.run_pipeline import run_pipeline
+
+
+@click.group()
+def pipeline_cli():
+    """
+    CLI for running the end-to-end pipeline.
+    """
+
+
+pipeline_cli.add_command(run_pipeline, name="run")
@@ -0,0 +1,63 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from commands.label_commits import MultiLabelCommitClassifier
+from utils.synthetic import commit_messages, write_raw_commit_csv
+
+try:
+    import pytest_benchmark
+except ImportError:
+    pytest_benchmark = None
+
+BENCH_DIR = Path(__file__).parent
+# Corpus size; raise to 1_000_000+ for soak runs, e.g. BENCH_COMMITS=1000000.
+N_COMMITS = int(os.environ.get("BENCH_COMMITS", 10_000))
+N_FEATURES = 384
+
+
+def pytest_collection_modifyitems(config, items):
+    # Benchmarks only run on request, so the functional suite stays fast.
+    if pytest_benchmark is None:
+        reason = "pytest-benchmark is not installed"
+    elif not config.getoption("benchmark_only"):
+        reason = "benchmarks run with --benchmark-only"
+    else:
+        return
+    for item in items:
+        if item.path.is_relative_to(BENCH_DIR):
+            item.add_marker(pytest.mark.skip(reason=reason))
+
+
+@pytest.fixture(scope="session")
+def messages():
+    """Deterministic synthetic commit messages, conventional and not."""
+    return commit_messages(N_COMMITS, seed=0)
+
+
+@pytest.fixture(scope="session")
+def raw_commit_csv(tmp_path_factory):
+    """The synthetic corpus in the extract-raw-commit-messages CSV layout."""
+    path = tmp_path_factory.mktemp("corpus") / "raw_commit_messages.csv"
+    write_raw_commit_csv(path, N_COMMITS, seed=0)
+    return path
+
+
+@pytest.fixture(scope="session")
+def labeled_features(messages):
+    """
+    Random embeddings of the labeled synthetic commits, shifted per label so
+    models have signal to fit. Label frequencies follow the rule labels.
+    """
+    classifier = MultiLabelCommitClassifier()
+    y = np.zeros((len(messages), 5), dtype=int)
+    for i, message in enumerate(messages):
+        y[i, classifier.extract_commit_tags(message)] = 1
+    y = y[y.sum(axis=1) > 0]
+
+    rng = np.random.default_rng(0)
+    shift = rng.normal(size=(5, N_FEATURES))
+    X = (rng.normal(size=(len(y), N_FEATURES)) + y @ shift).astype(np.float32)
+    return X, y
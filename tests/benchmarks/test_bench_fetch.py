@@ -0,0 +1,92 @@
+import json
+import os
+import random
+from unittest.mock import MagicMock
+
+import pytest
+from click.testing import CliRunner
+
+from commands.fetch_commits import fetch_commits, fetch_commits_for_repo
+from utils.github_standin import GitHubStandIn
+
+N_REPOS = 8
+COMMITS_PER_REPO = int(os.environ.get("BENCH_FETCH_COMMITS", 2000))
+# Per-request latency of the stand-in, roughly that of api.github.com.
+LATENCY = float(os.environ.get("BENCH_FETCH_LATENCY", 0.05))
+
+
+def _crawl(server, tmp_path, workers, mode="rest"):
+    input_file = tmp_path / "repos.json"
+    input_file.write_text(json.dumps(server.repos_config()))
+    # Same retry jitter draws in every round
+    random.seed(0)
+    result = CliRunner().invoke(
+        fetch_commits,
+        [
+            "--input-file", str(input_file),
+            "--output-folder", str(tmp_path / "raw_data"),
+            "--api-url", server.url,
+            "--workers", str(workers),
+            "--mode", mode,
+            "--retry-backoff", "0.05",
+        ],
+    )
+    # Drop the ETags, so every round crawls in full.
+    for name in os.listdir(tmp_path / "raw_data"):
+        if name.endswith(".etag"):
+            os.remove(tmp_path / "raw_data" / name)
+    return result
+
+
+@pytest.mark.parametrize("workers", [1, 4, 8])
+def test_fetch_commits_concurrency(benchmark, tmp_path, workers):
+    """Full crawl of eight repositories at a realistic per-request latency."""
+    server = GitHubStandIn.synthetic(N_REPOS, COMMITS_PER_REPO, latency=LATENCY)
+    benchmark.extra_info["rows"] = N_REPOS * COMMITS_PER_REPO
+    with server:
+        result = benchmark.pedantic(_crawl, args=(server, tmp_path, workers), rounds=3)
+    assert result.output.count("SUCCESS") == N_REPOS
+
+
+def test_fetch_commits_under_limits(benchmark, tmp_path):
+    """Crawl while the secondary limit, rate limit and 502s force retries."""
+    server = GitHubStandIn.synthetic(
+        N_REPOS,
+        COMMITS_PER_REPO,
+        latency=LATENCY,
+        secondary_limit=4,
+        retry_after=0.2,
+        rate_limit=100,
+        rate_window=1,
+        error_rate=0.05,
+    )
+    with server:
+        result = benchmark.pedantic(_crawl, args=(server, tmp_path, 8), rounds=3)
+    benchmark.extra_info.update(server.stats)
+    assert result.output.count("SUCCESS") == N_REPOS
+    assert server.stats["secondary_limited"] > 0 and server.stats["errors"] > 0
+
+
+def test_fetch_unchanged_repo(benchmark, tmp_path):
+    """Cost of re-checking an unchanged repository through its ETag."""
+    with GitHubStandIn.synthetic(1, COMMITS_PER_REPO, latency=LATENCY) as server:
+        repo_info = server.repos_config()[0]
+        fetch_commits_for_repo(repo_info, MagicMock(), tmp_path, server.url)
+        result, success = benchmark(
+            fetch_commits_for_repo, repo_info, MagicMock(), tmp_path, server.url
+        )
+    assert success and "up to date" in result
+
+
+@pytest.mark.parametrize("mode", ["rest", "graphql"])
+def test_fetch_commits_mode(benchmark, tmp_path, mode):
+    """REST against GraphQL crawl; extra_info records the bytes transferred."""
+    server = GitHubStandIn.synthetic(N_REPOS, COMMITS_PER_REPO, latency=LATENCY)
+    with server:
+        result = benchmark.pedantic(
+            _crawl, args=(server, tmp_path, 8), kwargs={"mode": mode}, rounds=3
+        )
+    benchmark.extra_info["bytes_per_commit"] = server.stats["bytes_sent"] / (
+        3 * N_REPOS * COMMITS_PER_REPO
+    )
+    assert result.output.count("SUCCESS") == N_REPOS
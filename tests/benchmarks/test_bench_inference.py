@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.multioutput import ClassifierChain
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from tests.conftest import make_random_encoder
+from utils.encoding import EncodingService
+from utils.linear_head import RidgeMultilabelHead
+from utils.thresholds import predict_scores
+
+N_ENCODE = int(os.environ.get("BENCH_ENCODE", 1000))
+PREDICT_ROWS = 1024
+
+
+def _build_model(name, X, y):
+    # Same estimator families as the trainers, with small hyperparameters.
+    if name == "lg_ovr":
+        clf = OneVsRestClassifier(LogisticRegression(solver="liblinear"))
+        return Pipeline([("scaler", StandardScaler()), ("clf", clf)]).fit(X, y)
+    if name == "rf_ovr":
+        from sklearn.ensemble import RandomForestClassifier
+
+        clf = OneVsRestClassifier(RandomForestClassifier(n_estimators=50, random_state=42))
+        return Pipeline([("scaler", StandardScaler()), ("clf", clf)]).fit(X, y)
+    if name == "gbm_ovr":
+        xgboost = pytest.importorskip("xgboost")
+        clf = OneVsRestClassifier(
+            xgboost.XGBClassifier(n_estimators=50, max_depth=4, verbosity=0, random_state=42)
+        )
+        return Pipeline([("scaler", StandardScaler()), ("clf", clf)]).fit(X, y)
+    if name == "classifier_chain":
+        return ClassifierChain(LogisticRegression(solver="liblinear")).fit(X, y)
+    if name == "linear_head":
+        return RidgeMultilabelHead().fit(X, y)
+    if name == "nn":
+        keras = pytest.importorskip("tensorflow.keras")
+        model = keras.Sequential(
+            [
+                keras.layers.Input(shape=(X.shape[1],)),
+                keras.layers.Dense(256, activation="relu"),
+                keras.layers.Dense(128, activation="relu"),
+                keras.layers.Dense(y.shape[1], activation="sigmoid"),
+            ]
+        )
+        model.compile(optimizer="adam", loss="binary_crossentropy")
+        model.fit(X, y, epochs=1, batch_size=256, verbose=0)
+        return model
+    raise ValueError(name)
+
+
+@pytest.fixture(scope="session")
+def bench_encoder(tmp_path_factory):
+    """A randomly initialised encoder shaped like all-MiniLM-L6-v2."""
+    return make_random_encoder(
+        tmp_path_factory.mktemp("minilm_shaped"),
+        hidden_size=384,
+        num_layers=6,
+        num_heads=12,
+        max_seq_length=128,
+    )
+
+
+@pytest.mark.parametrize(
+    "name", ["lg_ovr", "rf_ovr", "gbm_ovr", "classifier_chain", "linear_head", "nn"]
+)
+def test_model_predict(benchmark, labeled_features, name):
+    """Scoring a batch of embeddings with each model family."""
+    X, y = labeled_features
+    model = _build_model(name, X[:5000], y[:5000])
+    batch = X[:PREDICT_ROWS]
+    benchmark.extra_info["rows"] = len(batch)
+    scores = benchmark(predict_scores, model, batch)
+    assert np.shape(scores) == (len(batch), y.shape[1])
+
+
+def test_encoding_service_throughput(benchmark, bench_encoder, messages):
+    """Token-budgeted encoding of commit messages."""
+    texts = messages[:N_ENCODE]
+    service = EncodingService(bench_encoder)
+    benchmark.extra_info["rows"] = len(texts)
+    embeddings = benchmark.pedantic(service.encode, args=(texts,), rounds=3, iterations=1)
+    assert embeddings.shape == (len(texts), 384)
+
+
+def test_sentence_transformer_encode_throughput(benchmark, bench_encoder, messages):
+    """Plain SentenceTransformer.encode, the reference for the service above."""
+    texts = messages[:N_ENCODE]
+    benchmark.extra_info["rows"] = len(texts)
+    embeddings = benchmark.pedantic(
+        bench_encoder.encode, args=(texts,), kwargs={"batch_size": 32}, rounds=3, iterations=1
+    )
+    assert embeddings.shape == (len(texts), 384)
@@ -0,0 +1,37 @@
+import subprocess
+
+import pytest
+
+from commands.ingest_local_repos import ingest_repository
+from tests.benchmarks.conftest import N_COMMITS
+
+
+@pytest.fixture(scope="module")
+def synthetic_mirror(tmp_path_factory, messages):
+    """A bare repository holding the synthetic corpus as a linear history."""
+    path = tmp_path_factory.mktemp("mirrors") / "synthetic.git"
+    subprocess.run(["git", "init", "-q", "--bare", str(path)], check=True)
+    stream = []
+    for i, message in enumerate(messages):
+        data = message.encode()
+        stream.append(
+            b"commit refs/heads/main\n"
+            + f"committer Bench <bench@example.com> {1700000000 + i * 60} +0000\n".encode()
+            + f"data {len(data)}\n".encode()
+            + data
+            + b"\n"
+        )
+    subprocess.run(
+        ["git", "-C", str(path), "fast-import", "--quiet"], input=b"".join(stream), check=True
+    )
+    subprocess.run(["git", "-C", str(path), "symbolic-ref", "HEAD", "refs/heads/main"], check=True)
+    return path
+
+
+def test_ingest_local_repository(benchmark, synthetic_mirror, tmp_path):
+    """Full-history ingestion of a local mirror through git log."""
+    benchmark.extra_info["rows"] = N_COMMITS
+    count = benchmark.pedantic(
+        ingest_repository, args=(str(synthetic_mirror), str(tmp_path)), rounds=3
+    )
+    assert count == N_COMMITS
@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from commands.apply_mlsmote import mlsmote_samples
+from commands.cleaned_commits import clean_text
+from commands.dedup_commits import dedup_commits
+from commands.label_commits import MultiLabelCommitClassifier
+from commands.preprocess_commits import preprocess_commits
+from utils.helper import evaluate_and_save_metrics
+from utils.synthetic import commit_records
+
+
+def test_clean_text(benchmark, messages):
+    """Throughput of the training-data text normalisation."""
+    benchmark.extra_info["rows"] = len(messages)
+    cleaned = benchmark(lambda: [clean_text(message) for message in messages])
+    assert len(cleaned) == len(messages)
+
+
+def test_extract_commit_tags(benchmark, messages):
+    """Throughput of the conventional-commit rule labeler."""
+    classifier = MultiLabelCommitClassifier()
+    benchmark.extra_info["rows"] = len(messages)
+    tags = benchmark(lambda: [classifier.extract_commit_tags(message) for message in messages])
+    assert any(tags)
+
+
+def test_process_commits(benchmark, raw_commit_csv, tmp_path):
+    """End-to-end label-commits on the synthetic raw CSV."""
+    classifier = MultiLabelCommitClassifier(raw_commit_csv, tmp_path / "labeled.csv")
+    benchmark.pedantic(classifier.process_commits, rounds=3, iterations=1)
+    assert (tmp_path / "labeled.csv").exists()
+
+
+def test_preprocess_commits_fused(benchmark, messages, tmp_path):
+    """Fused streaming extract → label → clean from raw commit JSON."""
+    raw_dir = tmp_path / "raw_data"
+    raw_dir.mkdir()
+    (raw_dir / "synthetic.json").write_text(json.dumps(commit_records(messages)))
+    args = [
+        "--input-folder", str(raw_dir),
+        "--output-file", str(tmp_path / "cleaned.csv"),
+        "--nonconv-output", str(tmp_path / "nonconv.csv"),
+    ]
+    benchmark.extra_info["rows"] = len(messages)
+    benchmark.pedantic(
+        preprocess_commits.main, args=(args,), kwargs={"standalone_mode": False}, rounds=3
+    )
+    assert (tmp_path / "cleaned.csv").exists()
+
+
+def test_dedup_commits(benchmark, messages, tmp_path):
+    """Exact and MinHash-LSH near-duplicate collapse of a corpus where half the rows are bot bumps."""
+    rng = np.random.default_rng(0)
+    packages = rng.choice(["lodash", "react", "numpy", "requests", "eslint"], len(messages))
+    versions = rng.integers(0, 30, size=(len(messages), 2))
+    bumps = [f"build deps bump {p} from 1.{a}.{b} to 1.{a}.{b + 1}" for p, (a, b) in zip(packages, versions)]
+    texts = [clean_text(message) for message in messages] + bumps
+    cleaned = pd.DataFrame({"Raw Serial Number": range(len(texts)), "Commit Message": texts})
+    for i in range(5):
+        cleaned[f"DEMPE_Class_{i}"] = rng.integers(0, 2, len(texts)) if i else 1
+    cleaned.sample(frac=1, random_state=0).to_csv(tmp_path / "cleaned.csv", index=False)
+    args = [
+        "--input-file", str(tmp_path / "cleaned.csv"),
+        "--output-file", str(tmp_path / "deduplicated.csv"),
+        "--report-file", str(tmp_path / "dedup_report.json"),
+    ]
+    benchmark.extra_info["rows"] = len(texts)
+    benchmark.pedantic(dedup_commits.main, args=(args,), kwargs={"standalone_mode": False}, rounds=3)
+    assert len(pd.read_csv(tmp_path / "deduplicated.csv")) < len(texts)
+
+
+def test_mlsmote_generation(benchmark, labeled_features):
+    """Synthetic minority sample generation on sentence-sized features."""
+    X, y = labeled_features
+    benchmark.extra_info["rows"] = len(X)
+    synthetic_X, synthetic_y, _ = benchmark.pedantic(
+        mlsmote_samples, args=(X, y), kwargs={"samples_per_class": 200}, rounds=3, iterations=1
+    )
+    assert len(synthetic_X) == len(synthetic_y)
+
+
+def test_evaluate_and_save_metrics(benchmark, labeled_features, tmp_path):
+    """Metric computation and report writing, without plots."""
+    _, y = labeled_features
+    y_pred = y[::-1]
+    label_names = [f"DEMPE_Class_{i}" for i in range(y.shape[1])]
+    benchmark.extra_info["rows"] = len(y)
+    summary = benchmark(
+        evaluate_and_save_metrics, y, y_pred, label_names, str(tmp_path), "bench", plots="none"
+    )
+    assert 0 <= summary["macro_f1"] <= 1
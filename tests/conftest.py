@@ -0,0 +1,34 @@
+import string
+
+import pytest
+
+
+def make_random_encoder(path, hidden_size=16, num_layers=1, num_heads=2, max_seq_length=64):
+    """
+    Builds a randomly initialised Sentence-BERT model with a character vocabulary
+    in path, so encoder code runs offline.
+    """
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *string.ascii_lowercase]
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(vocab_file=str(path / "vocab.txt")).save_pretrained(path)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=num_heads,
+        intermediate_size=2 * hidden_size,
+        max_position_embeddings=max(512, max_seq_length),
+    )
+    BertModel(config).save_pretrained(path)
+    transformer = models.Transformer(str(path), max_seq_length=max_seq_length)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension())
+    return SentenceTransformer(modules=[transformer, pooling], device="cpu")
+
+
+@pytest.fixture(scope="module")
+def tiny_encoder(tmp_path_factory):
+    """A randomly initialised miniature Sentence-BERT model built offline."""
+    return make_random_encoder(tmp_path_factory.mktemp("tiny_bert"))
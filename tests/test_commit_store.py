@@ -0,0 +1,223 @@
+import json
+
+import numpy as np
+import pandas as pd
+from click.testing import CliRunner
+
+from commands.dempe_allocation_report import dempe_allocation_report
+from commands.sync_commit_store import sync_commit_store
+from utils.commit_store import CommitStore, pack_labels, unpack_labels
+
+
+def _raw_commit(sha, message, date="2024-01-01T00:00:00Z"):
+    return {
+        "sha": sha,
+        "commit": {"message": message, "author": {"name": "dev", "date": date}},
+    }
+
+
+def test_upserts_touch_only_new_or_changed_rows(tmp_path):
+    """Re-writing identical rows changes nothing; changed values are updated in place."""
+    with CommitStore(str(tmp_path / "commits.db")) as store:
+        rows = [("api", "a1", "2024-01-02T00:00:00Z", "dev", "feat: add"), ("api", "a2", None, None, "fix")]
+        assert store.upsert_commits(rows) == 2
+        assert store.upsert_commits(rows) == 0
+        assert store.upsert_commits([("api", "a2", "2024-03-01T00:00:00Z", "dev", "fix")]) == 1
+        assert store.count("commits") == 2
+        assert store.get_commit("api", "a2")[2] == "2024-03-01T00:00:00Z"
+
+        assert store.upsert_predictions([("api", "a1", "lg_ovr", 1, "model", "t0")]) == 1
+        assert store.upsert_predictions([("api", "a1", "lg_ovr", 1, "model", "t0")]) == 0
+        assert store.upsert_predictions([("api", "a1", "lg_ovr", 4, "model", "t1")]) == 1
+
+
+def test_commit_queries_by_repo_and_date_range(tmp_path):
+    """Commits filter by repository and half-open date range and come back in date order."""
+    with CommitStore(str(tmp_path / "commits.db")) as store:
+        store.upsert_commits(
+            [
+                ("api", "a3", "2024-03-05T00:00:00Z", "dev", "three"),
+                ("api", "a1", "2024-01-05T00:00:00Z", "dev", "one"),
+                ("api", "a2", "2024-02-05T00:00:00Z", "dev", "two"),
+                ("web", "w1", "2024-02-10T00:00:00Z", "dev", "web"),
+            ]
+        )
+        in_range = store.commits(repo="api", since="2024-01-01", until="2024-03-01")
+        assert [row[1] for row in in_range] == ["a1", "a2"]
+        assert [row[1] for row in store.commits(since="2024-02-01")] == ["a2", "a3", "w1"]
+        assert store.known_shas("web") == {"w1"}
+
+        plan = store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT sha FROM commits WHERE repo = ? AND date >= ?",
+            ("api", "2024-01-01"),
+        ).fetchall()
+        assert "commits_repo_date" in str(plan)
+
+
+def test_unpredicted_pages_through_commits_without_a_prediction(tmp_path):
+    """Batches skip commits the model already predicted, even when written between batches."""
+    with CommitStore(str(tmp_path / "commits.db")) as store:
+        store.upsert_commits([("api", f"s{i}", None, None, f"m{i}") for i in range(5)])
+        store.upsert_predictions([("api", "s1", "nn", 1, "model", "t")])
+        seen = []
+        for batch in store.unpredicted("nn", batch_size=2):
+            seen.extend(sha for _, sha, _ in batch)
+            store.upsert_predictions([(repo, sha, "nn", 0, "model", "t") for repo, sha, _ in batch])
+        assert seen == ["s0", "s2", "s3", "s4"]
+        assert list(store.unpredicted("nn")) == []
+        assert len(next(store.unpredicted("lg_ovr"))) == 5
+
+
+def test_label_bitmasks_round_trip():
+    """Packed label masks unpack to the original 0/1 matrix."""
+    y = np.array([[1, 0, 0, 0, 1], [0, 0, 0, 0, 0], [0, 1, 1, 0, 0]])
+    assert pack_labels(y).tolist() == [17, 0, 6]
+    np.testing.assert_array_equal(unpack_labels(pack_labels(y), 5), y)
+
+
+def test_sync_commit_store_only_processes_new_commits(tmp_path):
+    """A second sync adds only the commits appended to the raw files."""
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    commits = [
+        _raw_commit("a1", "feat: add parser\n\nRefresh docs"),
+        _raw_commit("a2", "ci: bump runner"),
+        {"sha": "broken"},
+    ]
+    (raw / "api.json").write_text(json.dumps(commits))
+    db = str(tmp_path / "commits.db")
+    runner = CliRunner()
+
+    result = runner.invoke(sync_commit_store, ["--input-folder", str(raw), "--store", db])
+    assert result.exit_code == 0, result.output
+    assert "2 new of 2 commits" in result.output
+    with CommitStore(db) as store:
+        assert store.conn.execute("SELECT line, labels FROM labels WHERE sha = 'a1'").fetchall() == [(0, 1)]
+        assert store.conn.execute(
+            "SELECT line, conventional FROM cleaned WHERE sha = 'a1' ORDER BY line"
+        ).fetchall() == [(0, 1), (2, 0)]
+        assert store.count("labels") == 2
+
+    commits.append(_raw_commit("a3", "test: cover parser", "2024-02-01T00:00:00Z"))
+    (raw / "api.json").write_text(json.dumps(commits))
+    result = runner.invoke(
+        sync_commit_store, ["--input-folder", str(raw), "--store", db, "--chunk-size", "1"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "1 new of 3 commits" in result.output
+    with CommitStore(db) as store:
+        assert store.get_commit("api", "a3")[2] == "2024-02-01T00:00:00Z"
+        assert store.count("commits") == 3
+
+
+def _allocation_store(path):
+    store = CommitStore(str(path))
+    store.upsert_commits(
+        [
+            ("api", "a1", "2024-01-10T00:00:00Z", "dev", "feat: add"),
+            ("api", "a2", "2024-02-10T00:00:00Z", "dev", "fix and test"),
+            ("api", "a3", "2024-04-10T00:00:00Z", "dev", "refresh"),
+            ("web", "w1", "2024-03-10T00:00:00Z", "dev", "ci: bump"),
+            ("web", "w2", None, "dev", "undated"),
+        ]
+    )
+    store.upsert_predictions(
+        [
+            ("api", "a1", "lg_ovr", 0b00001, "rules", "t"),
+            ("api", "a2", "lg_ovr", 0b01100, "model", "t"),
+            ("api", "a3", "lg_ovr", 0, "model", "t"),
+            ("web", "w1", "lg_ovr", 0b10000, "rules", "t"),
+            ("web", "w2", "lg_ovr", 0b00100, "model", "t"),
+            ("api", "a1", "nn", 0b00010, "model", "t"),
+        ]
+    )
+    return store
+
+
+def test_allocation_buckets_follow_prediction_upserts(tmp_path):
+    """Inserted, relabeled and deleted predictions update their buckets like a full rebuild."""
+    with _allocation_store(tmp_path / "commits.db") as store:
+        assert store.allocation("lg_ovr") == [
+            ("api", "2024-Q1", 2, 0, 1, 0, 1, 1, 0),
+            ("api", "2024-Q2", 1, 1, 0, 0, 0, 0, 0),
+            ("web", "", 1, 0, 0, 0, 1, 0, 0),
+            ("web", "2024-Q1", 1, 0, 0, 0, 0, 0, 1),
+        ]
+        store.upsert_predictions([("api", "a2", "lg_ovr", 0b00010, "model", "t")])
+        store.upsert_predictions([("api", "a4", "lg_ovr", 0b00001, "model", "t")])
+        store.conn.execute("DELETE FROM predictions WHERE repo = 'web' AND sha = 'w1'")
+        incremental = store.conn.execute("SELECT * FROM dempe_allocation ORDER BY 1, 2, 3").fetchall()
+        store.rebuild_allocation()
+        assert store.conn.execute("SELECT * FROM dempe_allocation ORDER BY 1, 2, 3").fetchall() == incremental
+
+        assert store.allocation("lg_ovr", "month", repos=["api"], since="2024-02-01", until="2024-04") == [
+            ("api", "2024-02", 1, 0, 0, 1, 0, 0, 0)
+        ]
+        assert [row[1] for row in store.allocation("nn", "year")] == ["2024"]
+        assert store.allocation_models() == ["lg_ovr", "nn"]
+
+
+def test_allocation_report_writes_counts_and_shares(tmp_path):
+    """The report lists commits and label shares per repository and quarter."""
+    with _allocation_store(tmp_path / "commits.db"):
+        pass
+    output = tmp_path / "allocation.csv"
+    runner = CliRunner()
+    args = ["--store", str(tmp_path / "commits.db"), "--output-file", str(output)]
+
+    result = runner.invoke(dempe_allocation_report, args)
+    assert result.exit_code != 0
+    assert "lg_ovr, nn" in result.output
+
+    result = runner.invoke(dempe_allocation_report, [*args, "--model", "lg_ovr", "--repo", "api"])
+    assert result.exit_code == 0, result.output
+    report = pd.read_csv(output)
+    assert report["Period"].tolist() == ["2024-Q1", "2024-Q2"]
+    first = report.iloc[0]
+    assert first["Commits"] == 2
+    shares = first[["Development Share", "Maintenance Share", "Protection Share"]]
+    assert shares.tolist() == [0.3333] * 3
+    assert report.iloc[1]["Non-conventional"] == 1
+    assert report.iloc[1]["Development Share"] == 0
+
+
+def test_allocation_buckets_follow_commit_date_changes(tmp_path):
+    """Predictions move buckets when their commit arrives, is re-dated or is removed."""
+    with _allocation_store(tmp_path / "commits.db") as store:
+        store.upsert_predictions([("api", "a9", "lg_ovr", 0b00010, "model", "t")])
+        assert ("api", "", 1, 0, 0, 1, 0, 0, 0) in store.allocation("lg_ovr", "month")
+
+        store.upsert_commits([("api", "a9", "2024-05-02T00:00:00Z", "dev", "late commit")])
+        store.upsert_commits([("api", "a1", "2024-06-10T00:00:00Z", "dev", "feat: add")])
+        store.upsert_commits([("web", "w2", "2024-03-01T00:00:00Z", "dev", "undated")])
+        store.upsert_predictions([("api", "a1", "lg_ovr", 0b00100, "model", "t")])
+        store.conn.execute("DELETE FROM commits WHERE repo = 'web' AND sha = 'w1'")
+        assert store.allocation("lg_ovr", "month") == [
+            ("api", "2024-02", 1, 0, 0, 0, 1, 1, 0),
+            ("api", "2024-04", 1, 1, 0, 0, 0, 0, 0),
+            ("api", "2024-05", 1, 0, 0, 1, 0, 0, 0),
+            ("api", "2024-06", 1, 0, 0, 0, 1, 0, 0),
+            ("web", "", 1, 0, 0, 0, 0, 0, 1),
+            ("web", "2024-03", 1, 0, 0, 0, 1, 0, 0),
+        ]
+        assert store.allocation("nn", "month") == [("api", "2024-06", 1, 0, 0, 1, 0, 0, 0)]
+
+        incremental = store.conn.execute("SELECT * FROM dempe_allocation ORDER BY 1, 2, 3").fetchall()
+        store.rebuild_allocation()
+        assert store.conn.execute("SELECT * FROM dempe_allocation ORDER BY 1, 2, 3").fetchall() == incremental
+
+
+def test_allocation_until_inside_a_month_keeps_that_month(tmp_path):
+    """A day-precision until rounds up to the next month instead of dropping its own."""
+    with _allocation_store(tmp_path / "commits.db") as store:
+        months = {
+            until: [row[1] for row in store.allocation("lg_ovr", "month", repos=["api"], until=until)]
+            for until in ("2024-02", "2024-02-01", "2024-02-01T00:00:00Z", "2024-02-05", "2024-02-01T09:00:00Z")
+        }
+    assert months == {
+        "2024-02": ["2024-01"],
+        "2024-02-01": ["2024-01"],
+        "2024-02-01T00:00:00Z": ["2024-01"],
+        "2024-02-05": ["2024-01", "2024-02"],
+        "2024-02-01T09:00:00Z": ["2024-01", "2024-02"],
+    }
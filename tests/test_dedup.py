@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from click.testing import CliRunner
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from commands.dedup_commits import dedup_commits
+from utils.dedup import MinHasher, NearDuplicateIndex, SortedKeyMap
+from utils.embedding_store import load_sample_weights, save_embedding_store
+from utils.helper import fit_search
+from utils.linear_head import gram_statistics
+from utils.thresholds import best_f1_thresholds
+
+BUMPS = [f"build deps bump lodash from 4.17.{i} to 4.17.{i + 1}" for i in range(10, 40)]
+
+
+def _cleaned_csv(path, rows):
+    df = pd.DataFrame(rows, columns=["Commit Message", "DEMPE_Class_0", "DEMPE_Class_1"])
+    df.insert(0, "Raw Serial Number", range(1, len(df) + 1))
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_minhash_similarity_tracks_text_overlap():
+    """Signatures agree fully on equal texts, mostly on near duplicates and rarely otherwise."""
+    hasher = MinHasher()
+    text = "fix parser crash on empty input in the commit loader"
+    signatures = hasher.signatures([text, text, text + "s", BUMPS[0], BUMPS[1], ""])
+    agreement = (signatures[0] == signatures).mean(axis=1)
+    assert agreement[1] == 1.0
+    assert agreement[2] > 0.8
+    assert agreement[3] < 0.2
+    # Digits are collapsed, so version bumps of one package look alike.
+    assert (signatures[3] == signatures[4]).all()
+    # Sub-batches sized by shingle count give the same signatures.
+    assert (hasher.signatures(BUMPS, batch_shingles=50) == hasher.signatures(BUMPS)).all()
+
+
+def test_sorted_key_map_lookup_and_insert():
+    """Absent keys read as -1 and inserted keys keep their values across inserts."""
+    keys = SortedKeyMap()
+    assert keys.lookup([5]).tolist() == [-1]
+    keys.insert(np.array([9, 3], dtype=np.uint64), [0, 1])
+    keys.insert(np.array([2**63 + 1, 4], dtype=np.uint64), [2, 3])
+    assert keys.lookup(np.array([3, 4, 7, 9, 2**63 + 1], dtype=np.uint64)).tolist() == [1, 3, -1, 0, 2]
+
+
+def test_near_duplicate_index_clusters_within_groups_in_row_order():
+    """Version bumps collapse into one cluster per label group; new ids follow row order."""
+    hasher = MinHasher()
+    texts = BUMPS + ["add retry to fetcher", BUMPS[0]]
+    groups = np.array([0] * len(BUMPS) + [0, 1], dtype=np.uint64)
+    clusters, created = NearDuplicateIndex().assign(hasher.signatures(texts), groups)
+    assert len(set(clusters[: len(BUMPS)])) == 1
+    assert clusters[-2] not in clusters[: len(BUMPS)]
+    assert clusters[-1] not in clusters[:-1]
+    assert clusters[created].tolist() == list(range(created.sum()))
+
+    # Clustering in two batches matches clustering in one.
+    index = NearDuplicateIndex()
+    first, _ = index.assign(hasher.signatures(texts[:7]), groups[:7])
+    second, _ = index.assign(hasher.signatures(texts[7:]), groups[7:])
+    assert np.concatenate([first, second]).tolist() == clusters.tolist()
+
+
+def test_dedup_commits_keeps_one_weighted_row_per_cluster(tmp_path):
+    """Exact and near duplicates collapse onto their first row, weighted by cluster size."""
+    rows = (
+        [[message, 1, 0] for message in BUMPS]
+        + [["fix parser crash on empty input", 0, 1]] * 3
+        + [["fix parser crash on empty input", 1, 0]]
+        + [["docs explain retry settings", 0, 1]]
+    )
+    _cleaned_csv(tmp_path / "cleaned.csv", rows)
+    runner = CliRunner()
+    for threshold in ("0.8", "1.0"):
+        output = tmp_path / f"deduped_{threshold}.csv"
+        result = runner.invoke(
+            dedup_commits,
+            [
+                "--input-file", str(tmp_path / "cleaned.csv"),
+                "--output-file", str(output),
+                "--report-file", str(tmp_path / "report.json"),
+                "--threshold", threshold,
+                "--chunk-size", "7",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        deduped = pd.read_csv(output)
+        assert deduped["Sample_Weight"].sum() == len(rows)
+        assert deduped["Raw Serial Number"].is_monotonic_increasing
+        crash = deduped[deduped["Commit Message"] == "fix parser crash on empty input"]
+        assert sorted(crash["Sample_Weight"]) == [1, 3]
+
+    assert len(pd.read_csv(tmp_path / "deduped_1.0.csv")) == len(BUMPS) + 3
+    assert len(pd.read_csv(tmp_path / "deduped_0.8.csv")) == 4
+
+    # Deduplicating again sums the existing weights.
+    result = runner.invoke(
+        dedup_commits,
+        [
+            "--input-file", str(tmp_path / "deduped_0.8.csv"),
+            "--output-file", str(tmp_path / "again.csv"),
+            "--report-file", str(tmp_path / "report.json"),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert pd.read_csv(tmp_path / "again.csv")["Sample_Weight"].sum() == len(rows)
+
+
+def test_load_sample_weights_from_csv_and_store(tmp_path):
+    """Weights come from the Sample_Weight column or the store file, else None."""
+    df = _cleaned_csv(tmp_path / "plain.csv", [["a", 1, 0]])
+    assert load_sample_weights(str(tmp_path / "plain.csv")) is None
+    df.assign(Sample_Weight=[4]).to_csv(tmp_path / "weighted.csv", index=False)
+    assert load_sample_weights(str(tmp_path / "weighted.csv")).tolist() == [4.0]
+
+    X, y = np.zeros((2, 3), dtype=np.float32), np.eye(2)
+    save_embedding_store(str(tmp_path / "store"), X, y, ["a", "b"], sample_weight=[2, 5])
+    assert load_sample_weights(str(tmp_path / "store")).tolist() == [2.0, 5.0]
+    save_embedding_store(str(tmp_path / "unweighted"), X, y, ["a", "b"])
+    assert load_sample_weights(str(tmp_path / "unweighted")) is None
+
+
+def test_weights_match_repeated_rows():
+    """Weighting a row by k gives the Gram statistics and thresholds of repeating it k times."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 4))
+    y = (rng.random((40, 3)) < 0.4).astype(int)
+    weights = rng.integers(1, 4, size=40)
+    repeated = np.repeat(np.arange(40), weights)
+
+    weighted_stats = gram_statistics(X, y, weights, chunk_size=16)
+    repeated_stats = gram_statistics(X[repeated], y[repeated], chunk_size=16)
+    for key in weighted_stats:
+        assert np.allclose(weighted_stats[key], repeated_stats[key])
+
+    scores = rng.random((40, 3))
+    weighted = best_f1_thresholds(y, scores, sample_weight=weights)
+    plain = best_f1_thresholds(y[repeated], scores[repeated])
+    assert np.allclose(weighted[1], plain[1])
+
+
+def test_fit_search_routes_weights_to_every_step():
+    """A weighted grid search refits like an unweighted one on repeated rows."""
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(60, 4))
+    y = (X[:, :2] + rng.normal(scale=0.5, size=(60, 2)) > 0).astype(int)
+    weights = rng.integers(1, 4, size=60)
+    repeated = np.repeat(np.arange(60), weights)
+
+    def search():
+        pipeline = Pipeline(
+            [("scaler", StandardScaler()), ("clf", OneVsRestClassifier(LogisticRegression()))]
+        )
+        return GridSearchCV(pipeline, {"clf__estimator__C": [1.0]}, scoring="f1_micro", cv=3)
+
+    weighted = fit_search(search(), X, y, weights).best_estimator_
+    plain = fit_search(search(), X[repeated], y[repeated]).best_estimator_
+    assert np.allclose(weighted.decision_function(X), plain.decision_function(X), atol=1e-4)
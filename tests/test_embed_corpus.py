@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from click.testing import CliRunner
+
+from commands.embed_corpus import embed_corpus
+from tests.conftest import make_random_encoder
+
+
+def _write_corpus(path, messages):
+    # The random encoder's vocabulary holds single letters only
+    pd.DataFrame(
+        {"Commit Message": messages, "DEMPE_Class_0": [1, 0, 1], "DEMPE_Class_1": [0, 1, 0]}
+    ).to_csv(path, index=False)
+
+
+def test_regenerated_input_with_the_same_row_count_is_re_embedded(tmp_path):
+    """Shards are only reused for the exact input they were embedded from."""
+    (tmp_path / "bert").mkdir()
+    make_random_encoder(tmp_path / "bert").save(str(tmp_path / "encoder"))
+    input_file = tmp_path / "cleaned_commits.csv"
+    output_dir = tmp_path / "embeddings"
+    args = [
+        "--input-file", str(input_file),
+        "--output-dir", str(output_dir),
+        "--model-name", str(tmp_path / "encoder"),
+        "--workers", "1",
+    ]
+    runner = CliRunner()
+
+    _write_corpus(input_file, ["a d d", "f i x", "d o c s"])
+    result = runner.invoke(embed_corpus, args)
+    assert result.exit_code == 0, result.output
+    first = np.load(output_dir / "embeddings.npy")
+
+    result = runner.invoke(embed_corpus, args)
+    assert "already complete" in result.output
+
+    _write_corpus(input_file, ["b u m p", "r e f", "p y"])
+    result = runner.invoke(embed_corpus, args)
+    assert result.exit_code == 0, result.output
+    assert "already complete" not in result.output
+    assert not np.allclose(np.load(output_dir / "embeddings.npy"), first)
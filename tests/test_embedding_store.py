@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+
+from utils.embedding_store import (
+    LABELS_FILE,
+    assemble_shards,
+    shard_path,
+    write_meta,
+    write_shard,
+)
+from utils.helper import load_features_labels
+
+
+def test_shards_assemble_into_a_memory_mapped_store(tmp_path):
+    """Shards are stitched in order, removed, and loadable like a training CSV."""
+    store = str(tmp_path)
+    shards = [np.full((3, 4), i, dtype=np.float64) for i in range(3)]
+    shards[-1] = shards[-1][:2]
+    for index, shard in enumerate(shards):
+        write_shard(shard_path(store, index), shard)
+    np.save(os.path.join(store, LABELS_FILE), np.eye(8, 2, dtype=np.int8))
+    write_meta(store, {"label_columns": ["DEMPE_Class_0", "DEMPE_Class_1"]})
+
+    assemble_shards(store, n_shards=3, n_rows=8, dimension=4)
+    X, y, label_cols = load_features_labels(store)
+
+    assert isinstance(X, np.memmap) and X.dtype == np.float32
+    np.testing.assert_array_equal(X[:, 0], [0, 0, 0, 1, 1, 1, 2, 2])
+    assert y.shape == (8, 2)
+    assert label_cols == ["DEMPE_Class_0", "DEMPE_Class_1"]
+    assert not any(name.startswith("shard_") for name in os.listdir(store))
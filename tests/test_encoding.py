@@ -0,0 +1,29 @@
+import numpy as np
+
+from utils.encoding import EncodingService, token_budget_batches
+
+
+def test_token_budget_batches_cover_rows_within_budget():
+    """Every row lands in exactly one batch and padded batches fit the budget."""
+    lengths = np.random.default_rng(4).integers(1, 200, size=500)
+    batches = token_budget_batches(lengths, token_budget=1000, max_batch_size=64)
+
+    np.testing.assert_array_equal(np.sort(np.concatenate(batches)), np.arange(500))
+    for batch in batches:
+        assert len(batch) <= 64
+        assert len(batch) == 1 or len(batch) * lengths[batch].max() <= 1000
+
+
+def test_encoding_service_matches_plain_encode(tiny_encoder):
+    """Bucketed, budgeted encoding returns the same embeddings in input order."""
+    rng = np.random.default_rng(5)
+    texts = [
+        " ".join("abcdefgh"[i] for i in rng.integers(0, 8, size=n))
+        for n in rng.choice([1, 3, 10, 60], size=40)
+    ]
+    service = EncodingService(tiny_encoder, workers=3)
+    expected = tiny_encoder.encode(texts, batch_size=8)
+
+    embeddings = service.encode(texts, token_budget=64, max_batch_size=16)
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(embeddings, expected, atol=1e-5)
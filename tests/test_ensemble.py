@@ -0,0 +1,68 @@
+import joblib
+import numpy as np
+import pytest
+
+from utils.ensemble import EnsemblePredictor
+from utils.linear_head import RidgeMultilabelHead
+from utils.thresholds import save_thresholds
+
+LABELS = ["DEMPE_Class_0", "DEMPE_Class_1"]
+
+
+@pytest.fixture
+def head_entries(tmp_path):
+    """Manifest entries for two ridge heads fitted on different halves of the data."""
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(400, 6))
+    y = (X[:, :2] > 0).astype(int)
+    entries = {}
+    for i, rows in enumerate((slice(0, 200), slice(200, 400))):
+        model_file = str(tmp_path / f"head_{i}.pkl")
+        joblib.dump(RidgeMultilabelHead().fit(X[rows], y[rows]), model_file)
+        entries[f"head_{i}"] = {
+            "model_file": model_file,
+            "label_columns": LABELS,
+            "thresholds": None,
+            "metrics": {"macro_f1": 0.5 + i / 4},
+        }
+    return entries, X
+
+
+@pytest.mark.parametrize("combine", ["vote", "average"])
+def test_single_model_ensemble_matches_the_model(head_entries, combine):
+    """An ensemble of one model reproduces that model's own predictions."""
+    entries, X = head_entries
+    entry = {"head_0": entries["head_0"]}
+    predictor = EnsemblePredictor(entry, combine=combine)
+    model = joblib.load(entries["head_0"]["model_file"])
+    np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+
+
+def test_vote_keeps_labels_any_majority_agrees_on(head_entries):
+    """With two equal voters a label needs one vote; at threshold 1 it needs both."""
+    entries, X = head_entries
+    preds = [joblib.load(e["model_file"]).predict(X) for e in entries.values()]
+
+    either = EnsemblePredictor(entries, combine="vote").predict(X)
+    both = EnsemblePredictor(entries, combine="vote", vote_threshold=1.0).predict(X)
+    np.testing.assert_array_equal(either, preds[0] | preds[1])
+    np.testing.assert_array_equal(both, preds[0] & preds[1])
+
+
+def test_f1_weighting_and_label_checks(head_entries):
+    """F1 weights are normalised, and mismatched label columns are rejected."""
+    entries, _ = head_entries
+    predictor = EnsemblePredictor(entries, weighting="f1")
+    assert predictor.weights == pytest.approx({"head_0": 0.5 / 1.25, "head_1": 0.75 / 1.25})
+
+    entries["head_1"] = {**entries["head_1"], "label_columns": LABELS[:1]}
+    with pytest.raises(ValueError):
+        EnsemblePredictor(entries)
+
+
+def test_thresholds_come_from_disk_not_the_manifest(head_entries):
+    """Thresholds calibrated after the manifest was built are used straight away."""
+    entries, X = head_entries
+    entry = {"head_0": entries["head_0"]}
+    save_thresholds(entries["head_0"]["model_file"], [0.9, -0.9], LABELS)
+    np.testing.assert_array_equal(EnsemblePredictor(entry).thresholds["head_0"], [0.9, -0.9])
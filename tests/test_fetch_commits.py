@@ -3,7 +3,13 @@ import json
 import pytest
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
-from commands.fetch_commits import fetch_commits, fetch_commits_for_repo
+from commands.fetch_commits import (
+    fetch_commits,
+    fetch_commits_for_repo,
+    retry_delay,
+    send_with_retries,
+)
+from utils.github_standin import GitHubStandIn
 
 
 @pytest.fixture
@@ -30,7 +36,7 @@ def setup_test_environment(tmp_path):
 def test_missing_input_file(runner):
     """Test behavior when the input file does not exist."""
     result = runner.invoke(fetch_commits, ["--input-file", "non_existent.json"])
-    assert result.exit_code == 0
+    assert result.exit_code == 1
     assert "Input file not found" in result.output
 
 
@@ -43,7 +49,7 @@ def test_empty_input_file(runner, setup_test_environment):
         file.write("[]")
 
     result = runner.invoke(fetch_commits, ["--input-file", str(input_file)])
-    assert result.exit_code == 0
+    assert result.exit_code == 1
     assert "The input file is empty or does not contain a valid JSON array." in result.output
 
 
@@ -56,7 +62,7 @@ def test_invalid_json_format(runner, setup_test_environment):
         file.write("{invalid_json: true}")
 
     result = runner.invoke(fetch_commits, ["--input-file", str(input_file)])
-    assert result.exit_code == 0
+    assert result.exit_code == 1
     assert "Failed to parse the JSON file" in result.output
 
 
@@ -67,7 +73,7 @@ def test_fetch_commits_for_repo_success(mock_get, setup_test_environment):
     progress_bar = MagicMock()
 
     # Mock successful response
-    mock_response = MagicMock()
+    mock_response = MagicMock(status_code=200, headers={}, links={})
     mock_response.json.return_value = [{"commit": {"message": "Initial commit"}}]
     mock_response.raise_for_status = MagicMock()
     mock_get.return_value = mock_response
@@ -110,8 +116,9 @@ def test_fetch_commits_failure(mock_get, runner, setup_test_environment):
     mock_get.side_effect = Exception("Mocked request failure")
 
     result = runner.invoke(fetch_commits, ["--input-file", str(input_file)])
-    assert result.exit_code == 0
+    assert result.exit_code == 1
     assert "Unexpected error for https://github.com/owner/repo1" in result.output
+    assert "1 of 1 repositories failed to fetch" in result.output
 
 
 @patch("commands.fetch_commits.requests.get")
@@ -133,3 +140,125 @@ def test_fetch_commits_for_repo_failure(mock_get, setup_test_environment):
     assert not success
     assert "Unexpected error for https://github.com/owner/repo" in result
 
+
+def test_fetch_commits_for_repo_follows_pagination(tmp_path):
+    """All pages are fetched through the Link headers, in order."""
+    with GitHubStandIn.synthetic(n_repos=1, commits_per_repo=250) as server:
+        repo_info = server.repos_config()[0]
+        result, success = fetch_commits_for_repo(
+            repo_info, MagicMock(), tmp_path, server.url, per_page=100
+        )
+        expected = server.repos["standin/repo-0"]
+
+    assert success, result
+    with open(tmp_path / "repo-0.json") as file:
+        assert json.load(file) == expected
+    assert server.stats["ok"] == 3
+
+
+def test_fetch_commits_for_repo_skips_unchanged_repo(tmp_path):
+    """A second run only sends one conditional request answered with 304."""
+    with GitHubStandIn.synthetic(n_repos=1, commits_per_repo=150) as server:
+        repo_info = server.repos_config()[0]
+        fetch_commits_for_repo(repo_info, MagicMock(), tmp_path, server.url)
+        result, success = fetch_commits_for_repo(repo_info, MagicMock(), tmp_path, server.url)
+
+    assert success
+    assert "up to date" in result
+    assert server.stats["ok"] == 2
+    assert server.stats["not_modified"] == 1
+
+
+def test_fetch_commits_for_repo_retries_rate_limits_and_errors(tmp_path):
+    """Exhausted rate limits wait for the reset and 502s are retried."""
+    server = GitHubStandIn.synthetic(
+        n_repos=1, commits_per_repo=300, rate_limit=2, rate_window=1, error_rate=0.3, seed=1
+    )
+    with server:
+        repo_info = server.repos_config()[0]
+        result, success = fetch_commits_for_repo(
+            repo_info, MagicMock(), tmp_path, server.url, retry_backoff=0.01
+        )
+
+    assert success, result
+    with open(tmp_path / "repo-0.json") as file:
+        assert len(json.load(file)) == 300
+    assert server.stats["rate_limited"] >= 1
+    assert server.stats["errors"] >= 1
+
+
+def _response(status, headers=None):
+    return MagicMock(status_code=status, headers=headers or {})
+
+
+@patch("commands.fetch_commits.time.sleep")
+def test_secondary_limit_waits_are_jittered_and_do_not_use_retries(sleep):
+    """Retry-After waits get jitter and outlast --max-retries; server errors do not."""
+    delays = [retry_delay(_response(403, {"Retry-After": "2"}), 0, 1.0) for _ in range(50)]
+    assert all(2.0 <= delay <= 3.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+    limited = [_response(403, {"Retry-After": "1"}) for _ in range(5)]
+    responses = iter([*limited, _response(502), _response(200)])
+    assert send_with_retries(lambda: next(responses), max_retries=1).status_code == 200
+    assert sleep.call_count == 6
+
+    responses = iter([_response(502), _response(502), _response(200)])
+    assert send_with_retries(lambda: next(responses), max_retries=1).status_code == 502
+
+
+def test_fetch_commits_against_standin(runner, tmp_path):
+    """The CLI crawls every repository concurrently under a secondary limit."""
+    server = GitHubStandIn.synthetic(
+        n_repos=4, commits_per_repo=120, secondary_limit=2, retry_after=0.05, latency=0.05
+    )
+    input_file = tmp_path / "repos.json"
+    with server:
+        input_file.write_text(json.dumps(server.repos_config()))
+        result = runner.invoke(
+            fetch_commits,
+            [
+                "--input-file", str(input_file),
+                "--output-folder", str(tmp_path / "raw_data"),
+                "--api-url", server.url,
+                "--workers", "4",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert result.output.count("SUCCESS") == 4
+    assert server.stats["secondary_limited"] >= 1
+    assert server.stats["peak_concurrency"] > 2
+
+
+def test_fetch_commits_graphql_mode(runner, tmp_path):
+    """GraphQL mode pages with cursors and saves the same messages in far fewer bytes."""
+    sizes = {}
+    with GitHubStandIn.synthetic(n_repos=2, commits_per_repo=250) as server:
+        input_file = tmp_path / "repos.json"
+        input_file.write_text(json.dumps(server.repos_config()))
+        for mode in ("rest", "graphql"):
+            sent_before = server.stats["bytes_sent"]
+            result = runner.invoke(
+                fetch_commits,
+                [
+                    "--input-file", str(input_file),
+                    "--output-folder", str(tmp_path / mode),
+                    "--api-url", server.url,
+                    "--mode", mode,
+                ],
+            )
+            assert result.output.count("SUCCESS") == 2, result.output
+            sizes[mode] = (
+                server.stats["bytes_sent"] - sent_before,
+                os.path.getsize(tmp_path / mode / "repo-1.json"),
+            )
+
+    with open(tmp_path / "rest" / "repo-1.json") as file:
+        rest = json.load(file)
+    with open(tmp_path / "graphql" / "repo-1.json") as file:
+        graphql = json.load(file)
+    assert [c["commit"]["message"] for c in graphql] == [c["commit"]["message"] for c in rest]
+    assert [c["sha"] for c in graphql] == [c["sha"] for c in rest]
+    assert sizes["graphql"][0] < sizes["rest"][0] / 2
+    assert sizes["graphql"][1] < sizes["rest"][1] / 10
@@ -0,0 +1,98 @@
+import json
+import subprocess
+
+import pytest
+from click.testing import CliRunner
+
+from commands.extract_raw_commits import extract_raw_commit_messages
+from commands.ingest_local_repos import find_repositories, ingest_local_repos, iter_git_log, output_names
+
+MESSAGES = [
+    "feat(api): add endpoint",
+    "fix: handle ünïcode\n\n- first bullet\n- second bullet",
+    "Merge branch 'dev'",
+]
+
+
+def _git(*args, cwd):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def mirrors(tmp_path):
+    """A working clone with a GitHub remote and a bare mirror of it."""
+    clone = tmp_path / "mirrors" / "project"
+    clone.mkdir(parents=True)
+    _git("init", "-q", "-b", "main", cwd=clone)
+    _git("config", "user.name", "Alice", cwd=clone)
+    _git("config", "user.email", "alice@example.com", cwd=clone)
+    _git("remote", "add", "origin", "git@github.com:acme/project.git", cwd=clone)
+    for i, message in enumerate(MESSAGES):
+        env_date = f"2024-01-0{i + 1}T12:00:00+02:00"
+        subprocess.run(
+            ["git", "commit", "-q", "--allow-empty", "-m", message],
+            cwd=clone,
+            check=True,
+            env={"GIT_AUTHOR_DATE": env_date, "GIT_COMMITTER_DATE": env_date, "PATH": "/usr/bin:/bin"},
+        )
+    _git("clone", "-q", "--mirror", str(clone), str(tmp_path / "mirrors" / "library.git"), cwd=tmp_path)
+    return tmp_path / "mirrors"
+
+
+def test_iter_git_log_parses_messages_and_dates(mirrors):
+    """Multi-line messages survive and dates are converted to UTC."""
+    entries = list(iter_git_log(str(mirrors / "project")))
+    assert [entry["message"].rstrip("\n") for entry in entries] == MESSAGES[::-1]
+    assert entries[-1]["author_date"] == "2024-01-01T10:00:00Z"
+    assert entries[-1]["parents"] == ""
+    assert entries[0]["parents"] == entries[1]["sha"]
+
+
+def test_ingest_local_repos_writes_api_shaped_records(mirrors, tmp_path):
+    """Clones and bare mirrors are ingested into files extract can read."""
+    assert [path.split("/")[-1] for path in find_repositories(mirrors)] == ["library.git", "project"]
+    output_folder = tmp_path / "raw_data"
+    result = CliRunner().invoke(
+        ingest_local_repos, ["--mirrors-dir", str(mirrors), "--output-folder", str(output_folder)]
+    )
+    assert result.exit_code == 0, result.output
+
+    with open(output_folder / "project.json") as file:
+        commits = json.load(file)
+    assert commits[0]["commit"]["message"] == MESSAGES[-1]
+    assert commits[0]["commit"]["author"]["name"] == "Alice"
+    assert commits[0]["html_url"] == f"https://github.com/acme/project/commit/{commits[0]['sha']}"
+    assert (output_folder / "library.json").exists()
+
+    raw_csv = tmp_path / "raw_commit_messages.csv"
+    result = CliRunner().invoke(
+        extract_raw_commit_messages,
+        ["--input-folder", str(output_folder), "--output-file", str(raw_csv)],
+    )
+    assert result.exit_code == 0
+    assert "ünïcode" in raw_csv.read_text(encoding="utf-8")
+
+
+def test_repositories_sharing_a_name_never_overwrite_each_other(mirrors, tmp_path):
+    """Same-named repositories are told apart by GitHub owner, or rejected before anything is written."""
+    mirror = mirrors / "project.git"
+    _git("clone", "-q", "--mirror", str(mirrors / "project"), str(mirror), cwd=tmp_path)
+    output_folder = tmp_path / "raw_data"
+    args = ["--mirrors-dir", str(mirrors), "--output-folder", str(output_folder)]
+
+    result = CliRunner().invoke(ingest_local_repos, args)
+    assert result.exit_code != 0
+    assert "project.json" in result.output
+    assert not output_folder.exists()
+
+    _git("remote", "set-url", "origin", "https://github.com/fork/project.git", cwd=mirror)
+    result = CliRunner().invoke(ingest_local_repos, args)
+    assert result.exit_code == 0, result.output
+    assert sorted(path.name for path in output_folder.iterdir()) == [
+        "acme_project.json",
+        "fork_project.json",
+        "library.json",
+    ]
+
+    clone = str(mirrors / "project")
+    assert output_names([clone, clone + "/"]) == {clone: "project"}
@@ -0,0 +1,104 @@
+import json
+import pstats
+import threading
+import time
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from utils import instrumentation
+from utils.instrumentation import instrumented, measure, record_rows, run_manifest
+
+
+@instrumented
+@click.command()
+@click.option("--n", default=1000)
+def count_rows(n):
+    record_rows(rows_in=n, rows_out=n // 2)
+    click.echo(sum(range(n)))
+
+
+def test_instrumented_command_records_metrics_in_run_manifest(tmp_path):
+    """Metrics of commands run inside a run end up in its JSON manifest."""
+    with run_manifest("test", runs_dir=str(tmp_path), trace_memory=True) as run:
+        result = CliRunner().invoke(count_rows, ["--n", "5000"])
+    assert result.exit_code == 0, result.output
+    assert "📈 count-rows" in result.output
+
+    (manifest_file,) = tmp_path.glob("*.json")
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+    assert manifest["run_id"] == run["run_id"]
+    (stage,) = manifest["stages"]
+    assert stage["command"] == "count-rows"
+    assert stage["status"] == "ok"
+    assert (stage["rows_in"], stage["rows_out"]) == (5000, 2500)
+    assert stage["rows_per_sec"] > 0
+    assert stage["wall_sec"] >= 0 and stage["cpu_sec"] >= 0
+    assert "tracemalloc_peak_mb" in stage
+
+
+def test_profile_option_writes_cprofile_dump(tmp_path):
+    """--profile dumps cProfile stats readable by pstats."""
+    profile_file = tmp_path / "count.prof"
+    result = CliRunner().invoke(count_rows, ["--profile", str(profile_file)])
+    assert result.exit_code == 0, result.output
+    assert pstats.Stats(str(profile_file)).total_calls > 0
+
+
+def test_measure_marks_failures():
+    """A raised exception is recorded as a failed command and re-raised."""
+    try:
+        with measure("broken") as metrics:
+            raise ValueError("bad input")
+    except ValueError:
+        pass
+    assert metrics["status"] == "failed"
+    assert metrics["error"] == "bad input"
+    assert "rows_in" not in metrics
+
+
+def test_concurrent_profiled_stages_run_one_at_a_time(tmp_path):
+    """Profiled stages on parallel threads take turns and each writes its own dump."""
+    active, overlaps = [0], []
+
+    def stage(name):
+        with measure(name, str(tmp_path / f"{name}.prof")):
+            active[0] += 1
+            overlaps.append(active[0])
+            time.sleep(0.05)
+            sum(range(10_000))
+            active[0] -= 1
+
+    threads = [threading.Thread(target=stage, args=(f"stage{i}",)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == [1, 1]
+    for i in range(2):
+        assert pstats.Stats(str(tmp_path / f"stage{i}.prof")).total_calls > 0
+
+
+def test_profiler_start_failure_cleans_up(tmp_path, monkeypatch):
+    """A profiler that fails to start raises without leaking the sampler, stack entry or lock."""
+
+    class BusyProfile:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+        def disable(self):
+            pass
+
+        def dump_stats(self, path):
+            pass
+
+    monkeypatch.setattr(instrumentation.cProfile, "Profile", BusyProfile)
+    threads_before = threading.active_count()
+    with pytest.raises(ValueError):
+        with measure("busy", str(tmp_path / "busy.prof")):
+            pass
+    assert threading.active_count() == threads_before
+    assert instrumentation._local.stack == []
+    assert not instrumentation._profile_lock.locked()
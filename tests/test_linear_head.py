@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from utils.linear_head import RidgeMultilabelHead, gram_statistics
+from utils.thresholds import best_f1_thresholds
+
+
+@pytest.fixture
+def separable_data():
+    """Embeddings whose labels are a noisy linear function of the features."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 32))
+    W = rng.normal(size=(32, 4))
+    y = (X @ W > 0.5).astype(int)
+    return X, y
+
+
+def test_gram_statistics_matches_full_products(separable_data):
+    """Chunked accumulation gives the same Gram matrix as one product."""
+    X, y = separable_data
+    stats = gram_statistics(X, y, chunk_size=300)
+    assert stats["n"] == len(X)
+    np.testing.assert_allclose(stats["xx"], X.T @ X)
+    np.testing.assert_allclose(stats["xy"], X.T @ y)
+
+
+def test_ridge_head_learns_linear_labels(separable_data):
+    """The closed-form head predicts linearly separable labels well."""
+    X, y = separable_data
+    model = RidgeMultilabelHead().fit(X[:1500], y[:1500])
+    y_pred = model.predict(X[1500:])
+
+    assert y_pred.shape == y[1500:].shape
+    assert (y_pred == y[1500:]).mean() > 0.85
+    assert model.alpha_ in model.alphas
+    assert model.thresholds_.shape == (4,)
+
+
+def test_best_f1_thresholds_separates_perfectly_ranked_scores():
+    """A threshold between the positive and negative scores reaches F1 = 1."""
+    scores = np.array([[0.9, 0.2], [0.8, 0.1], [0.3, 0.7], [0.1, 0.6]])
+    y_true = np.array([[1, 0], [1, 0], [0, 1], [0, 1]])
+
+    thresholds, f1 = best_f1_thresholds(y_true, scores)
+
+    np.testing.assert_allclose(thresholds, [0.55, 0.4])
+    np.testing.assert_allclose(f1, [1.0, 1.0])
+    assert ((scores >= thresholds).astype(int) == y_true).all()
+
+
+def test_best_f1_thresholds_does_not_split_ties():
+    """Tied scores end up on the same side of the threshold."""
+    scores = np.array([[0.5], [0.5], [0.2]])
+    y_true = np.array([[1], [0], [0]])
+
+    thresholds, _ = best_f1_thresholds(y_true, scores)
+    predicted = scores[:, 0] >= thresholds[0]
+
+    assert predicted[0] == predicted[1]
+
+
+def test_best_f1_thresholds_falls_back_without_positives():
+    """Labels that never occur keep the default threshold."""
+    scores = np.array([[0.1], [0.4]])
+    thresholds, f1 = best_f1_thresholds(np.zeros((2, 1)), scores)
+    assert thresholds[0] == 0.5
+    assert f1[0] == 0.0
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    accuracy_score,
+    classification_report,
+    f1_score,
+    hamming_loss,
+    jaccard_score,
+    multilabel_confusion_matrix,
+    precision_score,
+    recall_score,
+)
+
+from utils.metrics import (
+    compute_multilabel_metrics,
+    format_classification_report,
+    multilabel_confusion_counts,
+)
+
+
+@pytest.fixture
+def predictions():
+    """Random multilabel predictions, including empty rows and an unused label."""
+    rng = np.random.default_rng(7)
+    y_true = (rng.random((500, 5)) < 0.3).astype(int)
+    y_pred = (rng.random((500, 5)) < 0.3).astype(int)
+    y_true[:, 4] = 0
+    y_true[:20] = 0
+    y_pred[:10] = 0
+    return y_true, y_pred
+
+
+def test_confusion_counts_match_sklearn(predictions):
+    """The confusion tensor has sklearn's [[TN, FP], [FN, TP]] layout."""
+    y_true, y_pred = predictions
+    np.testing.assert_array_equal(
+        multilabel_confusion_counts(y_true, y_pred),
+        multilabel_confusion_matrix(y_true, y_pred),
+    )
+
+
+def test_summary_matches_sklearn(predictions):
+    """Every summary metric equals the sklearn implementation."""
+    y_true, y_pred = predictions
+    summary = compute_multilabel_metrics(y_true, y_pred)["summary"]
+
+    expected = {
+        "subset_accuracy": accuracy_score(y_true, y_pred),
+        "hamming_loss": hamming_loss(y_true, y_pred),
+        "jaccard_score_samples": jaccard_score(
+            y_true, y_pred, average="samples", zero_division=0
+        ),
+        "jaccard_score_macro": jaccard_score(
+            y_true, y_pred, average="macro", zero_division=0
+        ),
+        "jaccard_score_micro": jaccard_score(y_true, y_pred, average="micro"),
+        "macro_precision": precision_score(
+            y_true, y_pred, average="macro", zero_division=0
+        ),
+        "macro_recall": recall_score(y_true, y_pred, average="macro", zero_division=0),
+        "macro_f1": f1_score(y_true, y_pred, average="macro", zero_division=0),
+    }
+    for key, value in expected.items():
+        assert summary[key] == pytest.approx(value), key
+
+
+def test_sample_jaccard_matches_sklearn(predictions):
+    """The vectorized per-sample Jaccard equals the per-row sklearn call."""
+    y_true, y_pred = predictions
+    expected = [
+        jaccard_score(y_true[i], y_pred[i], average="binary", zero_division=0)
+        for i in range(len(y_true))
+    ]
+    np.testing.assert_allclose(
+        compute_multilabel_metrics(y_true, y_pred)["sample_jaccard"], expected
+    )
+
+
+def test_report_matches_sklearn_text(predictions):
+    """The text report is identical to sklearn's classification_report."""
+    y_true, y_pred = predictions
+    names = ["Development", "Enhancement", "Maintenance", "Protection", "Exploitation"]
+    expected = classification_report(
+        y_true, y_pred, target_names=names, zero_division=0
+    )
+    report = format_classification_report(
+        compute_multilabel_metrics(y_true, y_pred), names
+    )
+    assert report == expected
+
+
+def test_report_digits_match_sklearn_across_random_cases():
+    """Averages round like sklearn's, so the text matches in every printed digit."""
+    rng = np.random.default_rng(11)
+    for case in range(200):
+        # Both the packed histogram and the direct counting path
+        n_rows, n_labels = int(rng.integers(5, 60)), 5 if case % 2 else 12
+        names = [f"L{k}" for k in range(n_labels)]
+        y_true = (rng.random((n_rows, n_labels)) < rng.random()).astype(int)
+        y_pred = (rng.random((n_rows, n_labels)) < rng.random()).astype(int)
+        for digits in (2, 4):
+            expected = classification_report(
+                y_true, y_pred, target_names=names, zero_division=0, digits=digits
+            )
+            report = format_classification_report(
+                compute_multilabel_metrics(y_true, y_pred), names, digits=digits
+            )
+            assert report == expected
+
+
+@pytest.mark.parametrize(
+    "y_true, y_pred",
+    [
+        (np.zeros((4, 3)), np.zeros((4, 2))),
+        (np.zeros(4), np.zeros(4)),
+        (np.zeros((4, 3)), np.full((4, 3), 2)),
+    ],
+)
+def test_rejects_mismatched_or_non_binary_labels(y_true, y_pred):
+    """Label matrices must be 2-D, equally shaped and hold only 0/1."""
+    with pytest.raises(ValueError):
+        compute_multilabel_metrics(y_true, y_pred)
@@ -0,0 +1,158 @@
+import click
+import pytest
+
+from utils.pipeline import PipelineRunner, Stage, stage_dependencies
+
+CALLS = []
+
+
+@click.command()
+@click.option("--input-file")
+@click.option("--output-file")
+@click.option("--suffix", default="")
+def copy_upper(input_file, output_file, suffix):
+    CALLS.append(output_file)
+    with open(input_file) as f:
+        text = f.read()
+    with open(output_file, "w") as f:
+        f.write(text.upper() + suffix)
+
+
+@click.command()
+@click.option("--input-file")
+def explode(input_file):
+    raise RuntimeError("boom")
+
+
+@pytest.fixture
+def chain(tmp_path):
+    """A source file feeding a -> b, plus c reading the source independently."""
+    CALLS.clear()
+    source, a, b, c = (str(tmp_path / name) for name in ("src.txt", "a.txt", "b.txt", "c.txt"))
+    with open(source, "w") as f:
+        f.write("hello")
+
+    def build(suffix=""):
+        return [
+            Stage("b", copy_upper, {"input_file": a, "output_file": b}, [a], [b]),
+            Stage("a", copy_upper, {"input_file": source, "output_file": a, "suffix": suffix}, [source], [a]),
+            Stage("c", copy_upper, {"input_file": source, "output_file": c}, [source], [c]),
+        ]
+
+    return build, source, tmp_path / "cache.json"
+
+
+def test_dependencies_follow_inputs_and_outputs(chain):
+    """Stages wait for the producers of their inputs, wherever they are listed."""
+    build, _, _ = chain
+    assert stage_dependencies(build()) == {"a": set(), "b": {"a"}, "c": set()}
+
+
+def test_unchanged_stages_are_skipped(chain):
+    """A second run with identical inputs and params runs nothing."""
+    build, _, cache_file = chain
+    first = PipelineRunner(build(), cache_file=str(cache_file)).run()
+    assert {result["status"] for result in first.values()} == {"ran"}
+
+    CALLS.clear()
+    second = PipelineRunner(build(), cache_file=str(cache_file)).run()
+    assert {result["status"] for result in second.values()} == {"cached"}
+    assert CALLS == []
+
+
+def test_changed_input_or_params_rerun_downstream(chain):
+    """New input content reruns its consumers; new params rerun only that stage onwards."""
+    build, source, cache_file = chain
+    PipelineRunner(build(), cache_file=str(cache_file)).run()
+
+    results = PipelineRunner(build(suffix="!"), cache_file=str(cache_file)).run()
+    assert {name: r["status"] for name, r in results.items()} == {
+        "a": "ran",
+        "b": "ran",
+        "c": "cached",
+    }
+
+    with open(source, "w") as f:
+        f.write("changed")
+    results = PipelineRunner(build(suffix="!"), cache_file=str(cache_file)).run()
+    assert {result["status"] for result in results.values()} == {"ran"}
+
+
+def test_failure_blocks_only_downstream(tmp_path, chain):
+    """A failing stage blocks its consumers while independent stages still run."""
+    _, source, cache_file = chain
+    a = str(tmp_path / "a.txt")
+    stages = [
+        Stage("a", explode, {"input_file": source}, [source], [a]),
+        Stage("b", copy_upper, {"input_file": a, "output_file": str(tmp_path / "b.txt")}, [a]),
+        Stage("c", copy_upper, {"input_file": source, "output_file": str(tmp_path / "c.txt")}, [source]),
+    ]
+    results = PipelineRunner(stages, cache_file=str(cache_file)).run()
+    assert results["a"]["status"] == "failed"
+    assert results["b"]["status"] == "blocked"
+    assert results["c"]["status"] == "ran"
+
+
+def test_build_stages_fused_replaces_text_stages():
+    """The fused pipeline feeds visualize and mlsmote from one preprocess stage."""
+    from commands.run_pipeline import build_stages
+
+    stages = build_stages("repos.json", fused=True)
+    names = [stage.name for stage in stages]
+    assert "preprocess" in names
+    assert not {"extract", "label", "clean"} & set(names)
+    dependencies = stage_dependencies(stages)
+    assert dependencies["preprocess"] == {"fetch"}
+    assert dependencies["mlsmote"] == {"preprocess"}
+
+
+def test_build_stages_dedup_feeds_mlsmote():
+    """With dedup, mlsmote reads the deduplicated commits written after cleaning."""
+    from commands.run_pipeline import build_stages
+
+    stages = build_stages("repos.json", dedup=True)
+    dependencies = stage_dependencies(stages)
+    assert dependencies["dedup"] == {"clean"}
+    assert dependencies["mlsmote"] == {"dedup"}
+    mlsmote = next(stage for stage in stages if stage.name == "mlsmote")
+    assert mlsmote.params["input_file"].endswith("deduplicated_commits.csv")
+
+
+def test_always_run_stage_reruns_but_unchanged_outputs_keep_downstream_cached(chain):
+    """An always-run stage runs every time; consumers rerun only when its output changed."""
+    build, source, cache_file = chain
+
+    def stages():
+        b, a, _ = build()
+        a.always_run = True
+        return [a, b]
+
+    PipelineRunner(stages(), cache_file=str(cache_file)).run()
+    CALLS.clear()
+    runner = PipelineRunner(stages(), cache_file=str(cache_file))
+    assert runner.plan() == {"a": "always", "b": "cached"}
+    results = runner.run()
+    assert {name: r["status"] for name, r in results.items()} == {"a": "ran", "b": "cached"}
+
+    with open(source, "w") as f:
+        f.write("upstream moved")
+    results = PipelineRunner(stages(), cache_file=str(cache_file)).run()
+    assert {name: r["status"] for name, r in results.items()} == {"a": "ran", "b": "ran"}
+
+
+def test_failed_stage_is_not_cached(tmp_path, chain):
+    """A stage that raised reruns on the next run instead of being skipped."""
+    _, source, cache_file = chain
+    stages = [Stage("a", explode, {"input_file": source}, [source])]
+    PipelineRunner(stages, cache_file=str(cache_file)).run()
+    results = PipelineRunner(stages, cache_file=str(cache_file)).run()
+    assert results["a"]["status"] == "failed"
+
+
+def test_build_stages_always_fetch():
+    """fetch reads the remote API, so it is never skipped on an unchanged repos file."""
+    from commands.run_pipeline import build_stages
+
+    stages = {stage.name: stage for stage in build_stages("repos.json")}
+    assert stages["fetch"].always_run
+    assert not any(stage.always_run for name, stage in stages.items() if name != "fetch")
@@ -0,0 +1,83 @@
+import json
+
+from click.testing import CliRunner
+
+from commands.cleaned_commits import clean_commits
+from commands.extract_raw_commits import extract_raw_commit_messages
+from commands.label_commits import label_commits
+from commands.preprocess_commits import iter_json_array, preprocess_commits
+from utils.synthetic import commit_messages, commit_records
+
+TRICKY_MESSAGES = [
+    "None",
+    "fix: a\nNA\n  \nnull\nfeat: \"quoted\", comma",
+    "chore: x\r\nCRLF line",
+    "",
+]
+
+
+def test_iter_json_array_streams_across_blocks(tmp_path):
+    """Elements split across read blocks are decoded whole."""
+    records = commit_records(["feat: ü" * 20, "fix: b\n\nbody", "x"], repo="a/b")
+    path = tmp_path / "commits.json"
+    path.write_text(json.dumps(records, indent=4))
+    assert list(iter_json_array(path, block_size=7)) == records
+
+
+def test_preprocess_commits_matches_staged_commands(tmp_path):
+    """The fused pass writes the same files as extract, label and clean in turn."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    messages = commit_messages(500, seed=3) + TRICKY_MESSAGES
+    (raw_dir / "b.json").write_text(json.dumps(commit_records(messages, repo="a/b")))
+    (raw_dir / "c.json").write_text(json.dumps(commit_records(commit_messages(200, seed=9))))
+    (raw_dir / "broken.json").write_text("[{")
+
+    runner = CliRunner()
+    steps = [
+        (extract_raw_commit_messages, ["--input-folder", raw_dir, "--output-file", tmp_path / "raw.csv"]),
+        (label_commits, ["--input-file", tmp_path / "raw.csv", "--output-file", tmp_path / "labeled.csv"]),
+        (
+            clean_commits,
+            [
+                "--input-file", tmp_path / "labeled.csv",
+                "--output-file", tmp_path / "cleaned.csv",
+                "--nonconv-output", tmp_path / "nonconv.csv",
+            ],
+        ),
+        (
+            preprocess_commits,
+            [
+                "--input-folder", raw_dir,
+                "--output-file", tmp_path / "fused_cleaned.csv",
+                "--nonconv-output", tmp_path / "fused_nonconv.csv",
+                "--chunk-size", "64",
+            ],
+        ),
+    ]
+    for command, args in steps:
+        result = runner.invoke(command, [str(arg) for arg in args])
+        assert result.exit_code == 0, result.output
+
+    assert (tmp_path / "fused_cleaned.csv").read_bytes() == (tmp_path / "cleaned.csv").read_bytes()
+    assert (tmp_path / "fused_nonconv.csv").read_bytes() == (tmp_path / "nonconv.csv").read_bytes()
+
+
+def test_preprocess_commits_fails_fast_on_unwritable_output(tmp_path):
+    """An output path that cannot be opened errors out instead of blocking the producer."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    (raw_dir / "b.json").write_text(json.dumps(commit_records(commit_messages(300, seed=1))))
+    (tmp_path / "outdir").mkdir()
+
+    result = CliRunner().invoke(
+        preprocess_commits,
+        [
+            "--input-folder", str(raw_dir),
+            "--output-file", str(tmp_path / "outdir"),
+            "--nonconv-output", str(tmp_path / "nonconv.csv"),
+            "--chunk-size", "10",
+        ],
+    )
+    assert result.exit_code != 0
+    assert "outdir" in result.output
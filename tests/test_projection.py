@@ -0,0 +1,101 @@
+import joblib
+import numpy as np
+import pytest
+
+from utils.embedding_store import save_embedding_store
+from utils.linear_head import RidgeMultilabelHead
+from utils.projection import (
+    EmbeddingProjection,
+    ProjectedModel,
+    projection_fingerprint,
+    record_projection,
+    with_projection,
+)
+from utils.registry import load_registered_model
+from utils.thresholds import predict_labels, predict_scores
+
+
+@pytest.fixture
+def embeddings():
+    """Low-rank embeddings with labels driven by a few directions."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 8)) @ rng.normal(size=(8, 48))
+    y = (X[:, :3] > 0).astype(int)
+    return X.astype(np.float32), y
+
+
+@pytest.mark.parametrize("method", ["pca", "random"])
+def test_projection_reduces_and_casts(embeddings, method):
+    """Projected features have the requested width and storage dtype."""
+    X, _ = embeddings
+    projection = EmbeddingProjection(method=method, n_components=16).fit(X)
+    projected = projection.transform(X, chunk_size=100)
+
+    assert projected.shape == (len(X), 16)
+    assert projected.dtype == np.float16
+    np.testing.assert_allclose(
+        projected[:100], projection.transform(X[:100]), rtol=0, atol=0
+    )
+
+
+def test_none_projection_only_changes_dtype(embeddings):
+    """Method "none" keeps every dimension and is never wrapped around models."""
+    X, y = embeddings
+    projection = EmbeddingProjection(method="none").fit(X)
+    np.testing.assert_array_equal(projection.transform(X), X.astype(np.float16))
+
+    model = RidgeMultilabelHead().fit(X, y)
+    assert with_projection(model, X.shape[1], projection) is model
+
+
+def test_projected_model_scores_raw_embeddings(embeddings):
+    """The wrapper turns raw embeddings into the inner model's projected scores."""
+    X, y = embeddings
+    projection = EmbeddingProjection(n_components=16).fit(X)
+    inner = RidgeMultilabelHead().fit(projection.transform(X), y)
+
+    wrapped = with_projection(inner, 16, projection)
+    assert isinstance(wrapped, ProjectedModel)
+    assert wrapped.n_features_in_ == X.shape[1]
+    np.testing.assert_allclose(
+        predict_scores(wrapped, X),
+        predict_scores(inner, projection.transform(X)),
+        atol=1e-6,
+    )
+    np.testing.assert_array_equal(
+        predict_labels(wrapped, X), inner.predict(projection.transform(X))
+    )
+    np.testing.assert_array_equal(wrapped.predict(X), inner.predict(projection.transform(X)))
+
+
+def test_models_load_the_exact_projection_they_were_trained_on(embeddings, tmp_path):
+    """A model gets its recorded projection, and refuses one re-fitted at the same width."""
+    X, y = embeddings
+    projection_file = str(tmp_path / "custom_projection.pkl")
+    projection = EmbeddingProjection(method="pca", n_components=16).fit(X)
+    joblib.dump(projection, projection_file)
+    store_dir = str(tmp_path / "projected" / "train")
+    P = projection.transform(X)
+    save_embedding_store(
+        store_dir,
+        P,
+        y,
+        ["DEMPE_Class_0", "DEMPE_Class_1", "DEMPE_Class_2"],
+        projection_file=projection_file,
+        projection_sha256=projection_fingerprint(projection_file),
+    )
+    model_file = str(tmp_path / "head_model.pkl")
+    joblib.dump(RidgeMultilabelHead().fit(P, y), model_file)
+
+    assert record_projection(model_file, store_dir)["file"] == projection_file
+    model = load_registered_model(model_file)
+    assert isinstance(model, ProjectedModel)
+    np.testing.assert_allclose(model.projection.transform(X), P, atol=1e-5)
+
+    joblib.dump(EmbeddingProjection(method="random", n_components=16).fit(X), projection_file)
+    with pytest.raises(ValueError, match="re-fitted"):
+        load_registered_model(model_file)
+
+    # Retraining on raw embeddings drops the record
+    assert record_projection(model_file, str(tmp_path / "train.csv")) is None
+    assert not (tmp_path / "head_model_projection.json").exists()
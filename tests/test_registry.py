@@ -0,0 +1,66 @@
+import joblib
+import numpy as np
+import pytest
+
+from utils import registry
+from utils.linear_head import RidgeMultilabelHead
+from utils.thresholds import save_thresholds
+
+
+@pytest.fixture
+def registered_head(tmp_path, monkeypatch):
+    """A ridge head saved with thresholds and registered under a temp path."""
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(200, 6))
+    y = (X[:, :2] > 0).astype(int)
+    model_file = str(tmp_path / "head.pkl")
+    joblib.dump(RidgeMultilabelHead().fit(X, y), model_file)
+    save_thresholds(model_file, [0.4, 0.6], ["DEMPE_Class_0", "DEMPE_Class_1"])
+
+    encoder_file = tmp_path / "encoder.txt"
+    encoder_file.write_text("paraphrase-MiniLM-L3-v2\n")
+    monkeypatch.setattr(
+        registry,
+        "REGISTERED_MODELS",
+        {
+            "missing": ("Missing", str(tmp_path / "nope.pkl"), "", ""),
+            "head": ("Head", model_file, str(tmp_path / "p.json"), ""),
+        },
+    )
+    return model_file, str(encoder_file)
+
+
+def test_manifest_describes_only_existing_artifacts(registered_head):
+    """Entries carry encoder, labels, thresholds and benchmarks; missing files are skipped."""
+    model_file, encoder_file = registered_head
+    manifest = registry.build_manifest(encoder_file=encoder_file)
+
+    assert list(manifest["models"]) == ["head"]
+    entry = manifest["models"]["head"]
+    assert entry["encoder"] == "paraphrase-MiniLM-L3-v2"
+    assert entry["label_columns"] == ["DEMPE_Class_0", "DEMPE_Class_1"]
+    assert entry["thresholds"] == [0.4, 0.6]
+    assert entry["n_features"] == 6
+    assert entry["benchmarks"]["predict_one_ms"] > 0
+    assert registry.model_choices(manifest) == {2: "head"}
+
+
+def test_manifest_skips_artifacts_that_fail_to_load(registered_head, tmp_path, monkeypatch):
+    """An unloadable artifact is listed as skipped while the other models stay registered."""
+    model_file, encoder_file = registered_head
+    broken_file = tmp_path / "broken.pkl"
+    broken_file.write_bytes(b"not a pickle")
+    monkeypatch.setitem(
+        registry.REGISTERED_MODELS, "broken", ("Broken", str(broken_file), "", "")
+    )
+    manifest = registry.build_manifest(encoder_file=encoder_file)
+
+    assert list(manifest["models"]) == ["head"]
+    assert manifest["skipped"]["broken"]["model_file"] == str(broken_file)
+    assert manifest["skipped"]["broken"]["error"]
+
+
+def test_get_model_loads_each_artifact_once(registered_head):
+    """Repeated lookups reuse the model loaded earlier in the process."""
+    model_file, _ = registered_head
+    assert registry.get_model(model_file) is registry.get_model(model_file)
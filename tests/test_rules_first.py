@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from commands.label_commits import MultiLabelCommitClassifier
+from commands.predict_dempe import rule_first_predict
+
+LABELS = [f"DEMPE_Class_{i}" for i in range(5)]
+
+
+@pytest.fixture
+def rules():
+    """Rule engine without any input/output files."""
+    return MultiLabelCommitClassifier()
+
+
+def test_only_prefixed_messages_take_the_rule_path(rules):
+    """Conventional prefixes are recognised at the start of the message only."""
+    assert rules.conventional_prefix_tags("feat(ui): add menu") == [0]
+    assert rules.conventional_prefix_tags("  Fix!: crash") == [2]
+    assert rules.conventional_prefix_tags("Add menu, see fix: notes") is None
+    assert rules.conventional_prefix_tags("testing: things") is None
+
+
+def test_rule_first_predict_encodes_only_the_rest(rules):
+    """Rule hits are labeled directly and only the remainder reaches the model."""
+    seen = []
+
+    def predict_messages(messages):
+        seen.extend(messages)
+        return np.ones((len(messages), len(LABELS)), dtype=int)
+
+    messages = ["ci: bump runner", "Refresh the cache", "docs: typo"]
+    y_pred, routes = rule_first_predict(messages, rules, predict_messages, LABELS)
+
+    assert routes == ["rules", "model", "rules"]
+    assert seen == ["Refresh the cache"]
+    np.testing.assert_array_equal(y_pred[0], [0, 0, 0, 0, 1])
+    np.testing.assert_array_equal(y_pred[1], [1, 1, 1, 1, 1])
+    np.testing.assert_array_equal(y_pred[2], [0, 0, 1, 0, 0])
@@ -0,0 +1,26 @@
+import numpy as np
+
+from commands.predict_dempe import segment_predict, split_segments
+
+
+def test_split_segments_cleans_lines_and_drops_metadata():
+    """Each non-empty line is cleaned like the training data."""
+    message = "Add Menu-Bar (#42)\n\nSigned-off-by: A <a@b.c>\nFix crash!"
+    assert split_segments(message) == ["add menubar", "fix crash"]
+
+
+def test_segment_predict_dedups_sorts_and_merges_labels():
+    """Distinct segments are encoded once, shortest first, and OR-ed per commit."""
+    calls = []
+
+    def predict_texts(texts):
+        calls.append(list(texts))
+        # Label 0 for segments mentioning "fix", label 1 otherwise
+        return np.array([[int("fix" in t), int("fix" not in t)] for t in texts])
+
+    messages = ["Fix crash\nAdd a longer menu bar", "fix crash", "", "Add a longer menu bar"]
+    y_pred, n_segments, n_unique = segment_predict(messages, predict_texts, 2)
+
+    assert calls == [["fix crash", "add a longer menu bar"]]
+    assert (n_segments, n_unique) == (4, 2)
+    np.testing.assert_array_equal(y_pred, [[1, 1], [1, 0], [0, 0], [0, 1]])
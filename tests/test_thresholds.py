@@ -0,0 +1,95 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, RidgeClassifier
+from sklearn.multiclass import OneVsRestClassifier
+
+from commands.calibrate_thresholds import calibrate_thresholds
+from utils.linear_head import RidgeMultilabelHead
+from utils.thresholds import (
+    apply_thresholds,
+    best_f1_thresholds,
+    load_thresholds,
+    predict_labels,
+    predict_scores,
+    save_thresholds,
+)
+
+
+@pytest.fixture
+def multilabel_data():
+    """Small embedding matrix with three linearly derived labels."""
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 8)).astype(np.float32)
+    y = (X[:, :3] > 0).astype(int)
+    return X, y
+
+
+def test_thresholds_round_trip_next_to_model(tmp_path):
+    """Saved thresholds are found again from the model path alone."""
+    model_file = str(tmp_path / "model.pkl")
+    assert load_thresholds(model_file) is None
+
+    path = save_thresholds(model_file, [0.2, 0.7], ["DEMPE_Class_0", "DEMPE_Class_1"])
+    assert path == str(tmp_path / "model_thresholds.json")
+    np.testing.assert_allclose(load_thresholds(model_file), [0.2, 0.7])
+
+
+def test_predict_scores_covers_sklearn_output_shapes(multilabel_data):
+    """Array- and list-shaped predict_proba outputs become one score matrix."""
+    X, y = multilabel_data
+    ovr = OneVsRestClassifier(LogisticRegression()).fit(X, y)
+    forest = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+
+    for model in (ovr, forest):
+        scores = predict_scores(model, X, batch_size=64)
+        assert scores.shape == y.shape
+        assert scores.min() >= 0 and scores.max() <= 1
+
+    ovr_scores = predict_scores(ovr, X, batch_size=64)
+    np.testing.assert_array_equal(apply_thresholds(ovr_scores), ovr.predict(X))
+
+
+def test_predict_scores_rejects_models_without_scores(multilabel_data):
+    """An estimator with only decision_function gets a clear error, not a Keras call."""
+    X, y = multilabel_data
+    ridge = RidgeClassifier().fit(X, y)
+    with pytest.raises(TypeError, match="cannot score RidgeClassifier"):
+        predict_scores(ridge, X)
+
+
+def test_predict_labels_defaults_to_ridge_head_thresholds(multilabel_data):
+    """Without stored thresholds the ridge head keeps its own calibration."""
+    X, y = multilabel_data
+    head = RidgeMultilabelHead().fit(X, y)
+    np.testing.assert_array_equal(predict_labels(head, X), head.predict(X))
+
+
+def test_calibration_weights_rows_by_duplicate_count(multilabel_data, tmp_path, monkeypatch):
+    """Rows of a weighted calibration file count as many times as their Sample_Weight."""
+    monkeypatch.chdir(tmp_path)  # keeps the manifest refresh away from the repo's data/
+    X, y = multilabel_data
+    noisy = np.where(np.random.default_rng(2).random(y.shape) < 0.3, 1 - y, y)
+    model_file = str(tmp_path / "head_model.pkl")
+    model = RidgeMultilabelHead().fit(X, y)
+    joblib.dump(model, model_file)
+    weights = np.random.default_rng(3).integers(1, 20, size=len(X)).astype(float)
+    frame = pd.DataFrame(X, columns=[f"f_{i}" for i in range(X.shape[1])])
+    for k in range(y.shape[1]):
+        frame[f"DEMPE_Class_{k}"] = noisy[:, k]
+    frame["Sample_Weight"] = weights
+    frame.to_csv(tmp_path / "calibration.csv", index=False)
+
+    result = CliRunner().invoke(
+        calibrate_thresholds,
+        ["--model-file", model_file, "--calibration-file", str(tmp_path / "calibration.csv")],
+    )
+    assert result.exit_code == 0, result.output
+    scores = predict_scores(model, X)
+    expected, _ = best_f1_thresholds(noisy, scores, sample_weight=weights)
+    unweighted, _ = best_f1_thresholds(noisy, scores)
+    np.testing.assert_allclose(load_thresholds(model_file), expected)
+    assert not np.allclose(expected, unweighted)
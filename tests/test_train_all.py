@@ -0,0 +1,33 @@
+import numpy as np
+from threadpoolctl import threadpool_info
+
+from commands import train_all
+
+
+def fit_model(X_train, y_train, X_test, y_test, label_cols, model_file, params_file, n_jobs=None):
+    """Stand-in trainer reporting the thread pools it runs under."""
+    return {"n_jobs": n_jobs, "threads": [pool["num_threads"] for pool in threadpool_info()]}
+
+
+def test_allocate_cpus_splits_budget_by_weight():
+    """Heavier families get proportionally more cores and every family at least one."""
+    assert train_all.allocate_cpus(["lg_ovr", "rf_ovr"], 8) == {"lg_ovr": 2, "rf_ovr": 6}
+    assert train_all.allocate_cpus(["lg_ovr", "rf_ovr", "gbm_ovr"], 2) == {
+        "lg_ovr": 1,
+        "rf_ovr": 1,
+        "gbm_ovr": 1,
+    }
+
+
+def test_train_family_caps_running_thread_pools(monkeypatch):
+    """The fit runs with every already-loaded BLAS/OpenMP pool capped at the family's budget."""
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setitem(train_all.MODEL_FAMILIES, "fake", ("tests.test_train_all", "m", "p", 1))
+    data = (np.zeros((2, 2)), np.zeros((2, 1)), np.zeros((1, 2)), np.zeros((1, 1)), ["DEMPE_Class_0"])
+
+    # A budget unlike the default thread count shows the limit took effect
+    summary, wall_time = train_all._train_family("fake", data, 3, {})
+    assert summary["n_jobs"] == 3
+    assert summary["threads"] and set(summary["threads"]) == {3}
+    assert wall_time >= 0
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("keras_tuner")
+
+from commands import train_nn  # noqa: E402
+
+
+def test_split_indices_are_disjoint_and_cover_all_rows():
+    """The validation split takes the requested share and never overlaps the train rows."""
+    train_idx, val_idx = train_nn.split_indices(50, validation_split=0.2, seed=7)
+    assert len(val_idx) == 10
+    assert not set(train_idx) & set(val_idx)
+    assert sorted([*train_idx, *val_idx]) == list(range(50))
+
+    again_train, again_val = train_nn.split_indices(50, validation_split=0.2, seed=7)
+    np.testing.assert_array_equal(again_train, train_idx)
+    np.testing.assert_array_equal(again_val, val_idx)
+
+
+def test_make_datasets_yields_cached_float32_weighted_elements():
+    """Elements are float32 (x, y, weight) rows of the fixed split, cached after the first pass."""
+    X = np.arange(40, dtype=np.float64).reshape(20, 2)
+    y = (np.arange(60).reshape(20, 3) % 2).astype(np.int64)
+    weights = np.linspace(0.5, 2.0, 20)
+    train_ds, val_ds, train_size = train_nn.make_datasets(
+        X, y, validation_split=0.25, seed=3, sample_weight=weights
+    )
+    train_idx, val_idx = train_nn.split_indices(20, 0.25, 3)
+    assert train_size == len(train_idx) == 15
+
+    assert [spec.dtype.name for spec in train_ds.element_spec] == ["float32"] * 3
+    assert [spec.shape.as_list() for spec in train_ds.element_spec] == [[2], [3], []]
+    x, label, weight = next(iter(val_ds))
+    np.testing.assert_array_equal(x.numpy(), X[val_idx[0]].astype(np.float32))
+    np.testing.assert_array_equal(label.numpy(), y[val_idx[0]])
+    assert weight.numpy() == pytest.approx(weights[val_idx[0]])
+    assert type(train_ds).__name__ == "CacheDataset"
+
+    unweighted, _, _ = train_nn.make_datasets(X, y, validation_split=0.25, seed=3)
+    assert len(unweighted.element_spec) == 2
+
+
+def test_resumed_search_does_not_rerun_finished_trials(tmp_path, monkeypatch):
+    """A resumed search reuses the completed trials and only runs the ones still missing."""
+    monkeypatch.chdir(tmp_path)
+    fits = []
+    fit = train_nn.MultilabelHyperModel.fit
+
+    def counting_fit(self, hp, *args, **kwargs):
+        fits.append(hp.values)
+        return fit(self, hp, *args, **kwargs)
+
+    monkeypatch.setattr(train_nn.MultilabelHyperModel, "fit", counting_fit)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 4))
+    y = (rng.random((40, 2)) > 0.5).astype(int)
+    labels = ["DEMPE_Class_0", "DEMPE_Class_1"]
+
+    def search(max_trials, resume):
+        train_nn.fit_model(
+            X[:30], y[:30], X[30:], y[30:], labels,
+            str(tmp_path / "nn.keras"), str(tmp_path / "params.json"),
+            max_trials=max_trials, max_epochs=1, resume=resume, plots="none",
+        )
+        with open(tmp_path / "params.json") as f:
+            return json.load(f)["trials"]
+
+    first = search(max_trials=2, resume=False)
+    assert len(fits) == 2
+    assert [trial["status"] for trial in first] == ["COMPLETED"] * 2
+
+    assert search(max_trials=2, resume=True) == first
+    assert len(fits) == 2
+
+    resumed = search(max_trials=3, resume=True)
+    assert len(fits) == 3
+    assert resumed[:2] == first
+    assert (tmp_path / "tuner_logs" / "multilabel_nn" / "best_trial.json").exists()
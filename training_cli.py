@@ -1,7 +1,11 @@
 import click
 
+from commands.build_model_manifest import build_model_manifest
+from commands.calibrate_thresholds import calibrate_thresholds
+from commands.train_all import train_all_models
 from commands.train_classification_chain import train_classifier_chain_model
 from commands.train_gbm_ovr import train_gbm_model
+from commands.train_linear_head import train_linear_head_model
 from commands.train_nn import train_nn_model
 from commands.train_one_vs_rest_lg import train_one_vs_rest_lg_model
 from commands.train_one_vs_rest_random_forest import train_one_vs_rest_random_forest
@@ -20,3 +24,7 @@ training_cli.add_command(train_one_vs_rest_random_forest, name="train-random-for
 training_cli.add_command(train_gbm_model, name="train-gbm-ovr")
 training_cli.add_command(train_nn_model, name="train-nn")
 training_cli.add_command(train_classifier_chain_model, name="train-classifier-chain")
+training_cli.add_command(train_linear_head_model, name="train-linear-head")
+training_cli.add_command(train_all_models, name="train-all")
+training_cli.add_command(calibrate_thresholds, name="calibrate-thresholds")
+training_cli.add_command(build_model_manifest, name="build-manifest")
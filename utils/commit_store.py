@@ -0,0 +1,418 @@
+import os
+import re
+import sqlite3
+
+import numpy as np
+
+from constants import dempe_class_mapping
+
+DEFAULT_STORE = "data/commits.db"
+
+# Labels and predictions are stored as bitmasks: bit k set means DEMPE class k.
+# Commit dates are ISO 8601 UTC strings, so date ranges compare as text.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    date TEXT,
+    author TEXT,
+    message TEXT NOT NULL,
+    PRIMARY KEY (repo, sha)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS commits_repo_date ON commits (repo, date);
+
+CREATE TABLE IF NOT EXISTS labels (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    labels INTEGER NOT NULL,
+    PRIMARY KEY (repo, sha, line)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS cleaned (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    conventional INTEGER NOT NULL,
+    PRIMARY KEY (repo, sha, line)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS embeddings (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    store TEXT NOT NULL,
+    matrix_row INTEGER NOT NULL,
+    PRIMARY KEY (repo, sha, line, store)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS predictions (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    model TEXT NOT NULL,
+    labels INTEGER NOT NULL,
+    source TEXT,
+    predicted_at TEXT,
+    PRIMARY KEY (repo, sha, model)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS predictions_model ON predictions (model, repo);
+"""
+
+# DEMPE class numbers, one allocation column each
+DEMPE_CLASSES = sorted(int(key) for key in dempe_class_mapping if key.isdigit())
+CLASS_COLUMNS = [f"class_{k}" for k in DEMPE_CLASSES]
+COUNT_COLUMNS = ["commits", "unclassified", *CLASS_COLUMNS]
+
+
+def _bits(labels):
+    return [f"(({labels} >> {k}) & 1)" for k in DEMPE_CLASSES]
+
+
+def _bucket_values(labels):
+    # Counts one prediction adds to its bucket
+    return [f"({labels} = 0)", *_bits(labels)]
+
+
+def _period_of(row):
+    # Month of the predicted commit, '' when its date or the commit is unknown
+    return (
+        f"COALESCE((SELECT substr(date, 1, 7) FROM commits "
+        f"WHERE repo = {row}.repo AND sha = {row}.sha), '')"
+    )
+
+
+def _add_prediction(row):
+    return (
+        f"INSERT INTO dempe_allocation "
+        f"(model, repo, period, {', '.join(COUNT_COLUMNS)}) "
+        f"VALUES ({row}.model, {row}.repo, {_period_of(row)}, 1, "
+        f"{', '.join(_bucket_values(f'{row}.labels'))}) "
+        f"ON CONFLICT (model, period, repo) DO UPDATE SET "
+        f"{', '.join(f'{c} = {c} + excluded.{c}' for c in COUNT_COLUMNS)};"
+    )
+
+
+def _remove_prediction(row):
+    deltas = zip(COUNT_COLUMNS, ["1", *_bucket_values(f"{row}.labels")])
+    bucket = f"model = {row}.model AND repo = {row}.repo AND period = {_period_of(row)}"
+    return (
+        f"UPDATE dempe_allocation SET {', '.join(f'{c} = {c} - {d}' for c, d in deltas)} "
+        f"WHERE {bucket}; "
+        f"DELETE FROM dempe_allocation WHERE {bucket} AND commits = 0;"
+    )
+
+
+def _month(date):
+    return f"COALESCE(substr({date}, 1, 7), '')"
+
+
+def _move_commit_predictions(row, old_period, new_period):
+    # Moves every model's prediction of commit row between monthly buckets
+    predicted = f"FROM predictions AS p WHERE p.repo = {row}.repo AND p.sha = {row}.sha"
+    counts = zip(COUNT_COLUMNS, ["1", *_bucket_values("p.labels")])
+    bucket = f"dempe_allocation.repo = {row}.repo AND dempe_allocation.period = {old_period}"
+    return (
+        f"UPDATE dempe_allocation SET "
+        f"{', '.join(f'{c} = dempe_allocation.{c} - d.{c}' for c in COUNT_COLUMNS)} "
+        f"FROM (SELECT p.model, {', '.join(f'{v} AS {c}' for c, v in counts)} {predicted}) AS d "
+        f"WHERE dempe_allocation.model = d.model AND {bucket}; "
+        f"DELETE FROM dempe_allocation WHERE {bucket} AND commits = 0; "
+        f"INSERT INTO dempe_allocation "
+        f"(model, repo, period, {', '.join(COUNT_COLUMNS)}) "
+        f"SELECT p.model, p.repo, {new_period}, 1, {', '.join(_bucket_values('p.labels'))} "
+        f"{predicted} "
+        f"ON CONFLICT (model, period, repo) DO UPDATE SET "
+        f"{', '.join(f'{c} = {c} + excluded.{c}' for c in COUNT_COLUMNS)};"
+    )
+
+
+def _commit_has_predictions(row):
+    return f"EXISTS (SELECT 1 FROM predictions WHERE repo = {row}.repo AND sha = {row}.sha)"
+
+
+def _month_end_bound(until):
+    # First month excluded by an exclusive until: a bound after the first
+    # instant of its month keeps that month, so it rounds up.
+    rest = re.sub(r"\D", "", until[7:])
+    if not rest or (rest[:2] == "01" and not rest[2:].strip("0")):
+        return until[:7]
+    year, month = int(until[:4]), int(until[5:7])
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+
+
+_CLASS_COLUMN_DEFINITIONS = "".join(
+    f"    {column} INTEGER NOT NULL DEFAULT 0,\n" for column in CLASS_COLUMNS
+)
+
+# Per model, repository and month: predicted commits, commits per DEMPE class
+# and commits without any class. Triggers keep the buckets in step with the
+# predictions table, so a new or changed prediction updates only its own
+# bucket and reports never rescan the predictions. The bucket month comes
+# from the commit, so commits that are added, re-dated or removed after
+# their predictions move those predictions to the matching bucket.
+ALLOCATION_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS dempe_allocation (
+    model TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    period TEXT NOT NULL,
+    commits INTEGER NOT NULL DEFAULT 0,
+    unclassified INTEGER NOT NULL DEFAULT 0,
+{_CLASS_COLUMN_DEFINITIONS}    PRIMARY KEY (model, period, repo)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dempe_allocation_repo ON dempe_allocation (model, repo, period);
+
+CREATE TRIGGER IF NOT EXISTS dempe_allocation_insert AFTER INSERT ON predictions
+BEGIN {_add_prediction("NEW")} END;
+
+CREATE TRIGGER IF NOT EXISTS dempe_allocation_update AFTER UPDATE OF labels ON predictions
+BEGIN {_remove_prediction("OLD")} {_add_prediction("NEW")} END;
+
+CREATE TRIGGER IF NOT EXISTS dempe_allocation_delete AFTER DELETE ON predictions
+BEGIN {_remove_prediction("OLD")} END;
+
+CREATE TRIGGER IF NOT EXISTS dempe_allocation_commit_insert AFTER INSERT ON commits
+WHEN {_month("NEW.date")} != '' AND {_commit_has_predictions("NEW")}
+BEGIN {_move_commit_predictions("NEW", "''", _month("NEW.date"))} END;
+
+CREATE TRIGGER IF NOT EXISTS dempe_allocation_commit_update AFTER UPDATE OF date ON commits
+WHEN {_month("OLD.date")} != {_month("NEW.date")} AND {_commit_has_predictions("NEW")}
+BEGIN {_move_commit_predictions("NEW", _month("OLD.date"), _month("NEW.date"))} END;
+
+CREATE TRIGGER IF NOT EXISTS dempe_allocation_commit_delete AFTER DELETE ON commits
+WHEN {_month("OLD.date")} != '' AND {_commit_has_predictions("OLD")}
+BEGIN {_move_commit_predictions("OLD", _month("OLD.date"), "''")} END;
+"""
+
+# Rollups of the monthly periods: SQL expression over the period column
+PERIOD_EXPRESSIONS = {
+    "month": "period",
+    "quarter": (
+        "CASE WHEN period = '' THEN '' ELSE substr(period, 1, 4) || '-Q' || "
+        "((CAST(substr(period, 6, 2) AS INTEGER) + 2) / 3) END"
+    ),
+    "year": "substr(period, 1, 4)",
+}
+
+# Table -> (key columns, value columns)
+TABLES = {
+    "commits": (("repo", "sha"), ("date", "author", "message")),
+    "labels": (("repo", "sha", "line"), ("labels",)),
+    "cleaned": (("repo", "sha", "line"), ("text", "conventional")),
+    "embeddings": (("repo", "sha", "line", "store"), ("matrix_row",)),
+    "predictions": (("repo", "sha", "model"), ("labels", "source", "predicted_at")),
+}
+
+
+def pack_labels(y):
+    """
+    Packs a 0/1 label matrix (one column per DEMPE class) into one integer
+    bitmask per row.
+    """
+    y = np.asarray(y, dtype=np.int64)
+    return (y << np.arange(y.shape[1], dtype=np.int64)).sum(axis=1)
+
+
+def unpack_labels(masks, n_labels):
+    """
+    Expands bitmasks back into a 0/1 label matrix with n_labels columns.
+    """
+    masks = np.asarray(masks, dtype=np.int64).reshape(-1, 1)
+    return (masks >> np.arange(n_labels, dtype=np.int64)) & 1
+
+
+def commit_record(repo, commit):
+    """
+    Returns the commits row of a raw commit JSON object (REST shape, as written
+    by fetch-commits and ingest-local-repos), or None when it has no sha or
+    message.
+    """
+    details = commit.get("commit") or {}
+    if not commit.get("sha") or "message" not in details:
+        return None
+    author = details.get("author") or {}
+    return (repo, commit["sha"], author.get("date"), author.get("name"), details["message"])
+
+
+class CommitStore:
+    """
+    Embedded SQLite store of raw commits, rule labels, cleaned lines,
+    embedding references and predictions, keyed by (repo, sha).
+
+    Every write is an upsert that leaves unchanged rows untouched, so
+    re-running a stage over the same commits writes nothing, and queries by
+    repository, sha or date range read through the indexes instead of
+    scanning CSVs.
+    """
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        # WAL lets reports read while a sync is writing.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        existing = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'dempe_allocation'"
+        ).fetchone()
+        self.conn.executescript(ALLOCATION_SCHEMA)
+        if not existing:
+            # Stores written before the allocation table: backfill it once.
+            self.rebuild_allocation()
+            self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def upsert(self, table, rows):
+        """
+        Inserts rows (tuples in key + value column order) into table, updating
+        existing keys whose values changed. Returns the number of rows
+        inserted or changed.
+        """
+        keys, values = TABLES[table]
+        columns = keys + values
+        cursor = self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+            f"{', '.join(f'{c} = excluded.{c}' for c in values)} "
+            f"WHERE ({', '.join(values)}) IS NOT ({', '.join(f'excluded.{c}' for c in values)})",
+            rows,
+        )
+        # rowcount leaves out rows written by triggers
+        return cursor.rowcount
+
+    def upsert_commits(self, rows):
+        """Upserts (repo, sha, date, author, message) rows."""
+        return self.upsert("commits", rows)
+
+    def upsert_labels(self, rows):
+        """Upserts (repo, sha, line, label bitmask) rows."""
+        return self.upsert("labels", rows)
+
+    def upsert_cleaned(self, rows):
+        """Upserts (repo, sha, line, text, conventional) rows."""
+        return self.upsert("cleaned", rows)
+
+    def upsert_embeddings(self, rows):
+        """Upserts (repo, sha, line, embedding store directory, matrix row) rows."""
+        return self.upsert("embeddings", rows)
+
+    def upsert_predictions(self, rows):
+        """Upserts (repo, sha, model, label bitmask, source, predicted_at) rows."""
+        return self.upsert("predictions", rows)
+
+    def known_shas(self, repo):
+        """Set of the shas already stored for repo."""
+        cursor = self.conn.execute("SELECT sha FROM commits WHERE repo = ?", (repo,))
+        return {sha for (sha,) in cursor}
+
+    def count(self, table):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def commits(self, repo=None, since=None, until=None):
+        """
+        Yields (repo, sha, date, author, message) rows, optionally of one
+        repository and within [since, until) by commit date.
+        """
+        clauses, params = [], []
+        for clause, value in (("repo = ?", repo), ("date >= ?", since), ("date < ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        yield from self.conn.execute(
+            f"SELECT repo, sha, date, author, message FROM commits{where} ORDER BY repo, date",
+            params,
+        )
+
+    def get_commit(self, repo, sha):
+        return self.conn.execute(
+            "SELECT repo, sha, date, author, message FROM commits WHERE repo = ? AND sha = ?",
+            (repo, sha),
+        ).fetchone()
+
+    def unpredicted(self, model, batch_size=10_000):
+        """
+        Yields lists of up to batch_size (repo, sha, message) commits that have
+        no prediction from model yet.
+        """
+        # Keyset pagination on the primary key: the caller writes predictions
+        # between batches, and only one batch is held in memory.
+        last = ("", "")
+        while True:
+            rows = self.conn.execute(
+                "SELECT c.repo, c.sha, c.message FROM commits AS c "
+                "WHERE (c.repo, c.sha) > (?, ?) AND NOT EXISTS ("
+                "SELECT 1 FROM predictions AS p "
+                "WHERE p.repo = c.repo AND p.sha = c.sha AND p.model = ?) "
+                "ORDER BY c.repo, c.sha LIMIT ?",
+                (*last, model, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last = rows[-1][:2]
+
+    def rebuild_allocation(self):
+        """
+        Recomputes every DEMPE allocation bucket from the predictions table;
+        only needed for stores written before the buckets existed.
+        """
+        sums = ", ".join(f"SUM({bit})" for bit in _bits("p.labels"))
+        self.conn.execute("DELETE FROM dempe_allocation")
+        self.conn.execute(
+            f"INSERT INTO dempe_allocation "
+            f"(model, repo, period, {', '.join(COUNT_COLUMNS)}) "
+            f"SELECT p.model, p.repo, {_month('c.date')}, COUNT(*), "
+            f"SUM(p.labels = 0), {sums} "
+            f"FROM predictions AS p LEFT JOIN commits AS c ON c.repo = p.repo AND c.sha = p.sha "
+            f"GROUP BY p.model, p.repo, 3"
+        )
+
+    def allocation_models(self):
+        """Models with DEMPE allocation buckets."""
+        cursor = self.conn.execute("SELECT DISTINCT model FROM dempe_allocation ORDER BY model")
+        return [model for (model,) in cursor]
+
+    def allocation(self, model, period="quarter", repos=None, since=None, until=None):
+        """
+        Returns (repo, period, commits, unclassified, class_0, ...) rows of
+        model's DEMPE allocation, rolled up from the monthly buckets to
+        period ("month", "quarter" or "year"). since and until bound the
+        commit month (YYYY-MM or a date) as [since, until). Buckets hold whole
+        months, so a date inside a month keeps that month on either side.
+        """
+        clauses, params = ["model = ?"], [model]
+        if repos:
+            clauses.append(f"repo IN ({', '.join('?' * len(repos))})")
+            params.extend(repos)
+        if since is not None:
+            clauses.append("period >= ?")
+            params.append(since[:7])
+        if until is not None:
+            clauses.append("period < ?")
+            params.append(_month_end_bound(until))
+        counts = ", ".join(f"SUM({column})" for column in COUNT_COLUMNS)
+        return self.conn.execute(
+            f"SELECT repo, {PERIOD_EXPRESSIONS[period]} AS rollup, {counts} "
+            f"FROM dempe_allocation WHERE {' AND '.join(clauses)} "
+            f"GROUP BY repo, rollup ORDER BY repo, rollup",
+            params,
+        ).fetchall()
@@ -0,0 +1,224 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+MAX_HASH = np.uint64((1 << 32) - 1)
+FNV_PRIME = np.uint64(1099511628211)
+GOLDEN_RATIO = np.uint64(0x9E3779B97F4A7C15)
+# Version bumps and issue numbers should not separate templated commits.
+DIGITS = re.compile(r"\d+")
+
+
+def exact_keys(frame):
+    """
+    64-bit hash of every row of frame; equal keys are exact duplicates.
+    """
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles, computed for a whole batch
+    of texts with NumPy: rolling shingle hashes over the concatenated bytes,
+    one universal hash per permutation, then a segmented minimum per text.
+    Texts are lowercased and digit runs collapsed before shingling.
+    """
+
+    def __init__(self, num_perm=64, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: odd 64-bit multipliers, keep the high bits.
+        self.a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def _shingle_hashes(self, texts):
+        k = self.shingle_size
+        # Texts shorter than a shingle are padded so they still hash to one.
+        encoded = [DIGITS.sub("0", text.lower()).encode("utf-8").ljust(k) for text in texts]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+        buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+        # Polynomial hash of every k-byte window; uint64 arithmetic wraps.
+        n_windows = len(buffer) - k + 1
+        hashes = np.zeros(n_windows, dtype=np.uint64)
+        for offset in range(k):
+            hashes = hashes * FNV_PRIME + buffer[offset : offset + n_windows]
+        hashes = (hashes >> np.uint64(32)) ^ (hashes & MAX_HASH)
+
+        # Keep the windows that lie within one text.
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        counts = lengths - k + 1
+        window_starts = np.repeat(starts, counts) + (
+            np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        )
+        return hashes[window_starts], np.cumsum(counts) - counts
+
+    def signatures(self, texts, batch_shingles=4096):
+        """
+        Returns a (len(texts), num_perm) uint32 signature matrix.
+        """
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        start = 0
+        while start < len(texts):
+            # Size sub-batches by shingle count so the (shingles, num_perm)
+            # matrix stays cache-sized.
+            end = start + 1
+            total = len(texts[start]) + 1
+            while end < len(texts) and total < batch_shingles:
+                total += len(texts[end]) + 1
+                end += 1
+            shingles, offsets = self._shingle_hashes(texts[start:end])
+            permuted = (shingles[:, None] * self.a + self.b) >> np.uint64(32)
+            signatures[start:end] = np.minimum.reduceat(permuted, offsets, axis=0)
+            start = end
+        return signatures
+
+
+class SortedKeyMap:
+    """
+    Maps uint64 keys to int32 values with two sorted arrays (12 bytes per
+    entry). Lookups and inserts are vectorized over whole batches.
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.values = np.empty(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """
+        Values of the given keys, -1 where a key is absent.
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(self.keys):
+            return np.full(keys.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[pos] == keys, self.values[pos], -1)
+
+    def insert(self, keys, values):
+        """
+        Adds keys that are not in the map yet; keys must be unique.
+        """
+        order = np.argsort(keys, kind="stable")
+        keys = np.asarray(keys, dtype=np.uint64)[order]
+        pos = np.searchsorted(self.keys, keys)
+        self.keys = np.insert(self.keys, pos, keys)
+        self.values = np.insert(self.values, pos, np.asarray(values, dtype=np.int32)[order])
+
+
+class NearDuplicateIndex:
+    """
+    Greedy MinHash-LSH clustering. Each signature is split into bands; a new
+    text joins the first cluster leader sharing a band bucket (within the
+    same group) whose estimated Jaccard similarity reaches threshold, and
+    otherwise becomes a new leader. Only leader signatures and the bucket
+    keys of leaders are stored, about 0.5 KB per cluster at 64 permutations.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_agreement = int(np.ceil(threshold * num_perm))
+        self.buckets = SortedKeyMap()
+        self.n_clusters = 0
+        self._leaders = np.empty((1024, num_perm), dtype=np.uint32)
+
+    def band_keys(self, signatures, groups):
+        """
+        One 64-bit bucket key per (row, band), mixing in the group and band.
+        """
+        signatures = np.asarray(signatures, dtype=np.uint64)
+        keys = np.empty((len(signatures), self.bands), dtype=np.uint64)
+        seeds = np.arange(1, self.bands + 1, dtype=np.uint64) * GOLDEN_RATIO
+        for band in range(self.bands):
+            key = groups ^ seeds[band]
+            for col in range(band * self.rows, (band + 1) * self.rows):
+                key = (key ^ signatures[:, col]) * FNV_PRIME
+            keys[:, band] = key
+        return keys
+
+    def assign(self, signatures, groups=None):
+        """
+        Clusters a batch of signatures in order. Returns the cluster id of
+        every row and whether the row created (leads) its cluster; new
+        clusters are numbered in row order.
+        """
+        n = len(signatures)
+        if groups is None:
+            groups = np.zeros(n, dtype=np.uint64)
+        keys = self.band_keys(signatures, np.asarray(groups, dtype=np.uint64))
+        known = self.buckets.lookup(keys.ravel()).reshape(keys.shape)
+
+        # Candidates from earlier batches are verified for all rows at once;
+        # each row takes the first band whose leader is similar enough.
+        clusters = np.full(n, -1, dtype=np.int64)
+        for band in range(self.bands):
+            candidate = known[:, band]
+            pending = np.flatnonzero((clusters < 0) & (candidate >= 0))
+            if not len(pending):
+                continue
+            agreement = np.count_nonzero(
+                self._leaders[candidate[pending]] == signatures[pending], axis=1
+            )
+            matched = pending[agreement >= self.min_agreement]
+            clusters[matched] = candidate[matched]
+
+        # Unmatched rows lead a new cluster unless they match a new leader
+        # earlier in the batch, which needs a free bucket key shared with it.
+        # Only rows sharing such a key are walked one by one; leaders are
+        # tracked by row here and numbered once the batch is done.
+        unmatched = np.flatnonzero(clusters < 0)
+        free = known[unmatched] < 0
+        _, inverse, counts = np.unique(
+            keys[unmatched].ravel(), return_inverse=True, return_counts=True
+        )
+        shared = (counts[inverse.ravel()] > 1).reshape(free.shape) & free
+        leader_row = unmatched.copy()
+        claimed = {}
+        for j in np.flatnonzero(shared.any(axis=1)).tolist():
+            i = unmatched[j]
+            row_keys = keys[i][shared[j]].tolist()
+            tried = set()
+            for key in row_keys:
+                candidate = claimed.get(key)
+                if candidate is None or candidate in tried:
+                    continue
+                tried.add(candidate)
+                agreement = np.count_nonzero(signatures[candidate] == signatures[i])
+                if agreement >= self.min_agreement:
+                    leader_row[j] = candidate
+                    break
+            else:
+                for key in row_keys:
+                    claimed.setdefault(key, i)
+
+        created = np.zeros(n, dtype=bool)
+        created[unmatched[leader_row == unmatched]] = True
+        new_ids = self.n_clusters + np.cumsum(created) - 1
+        clusters[unmatched] = new_ids[leader_row]
+        self._add_leaders(signatures[created])
+
+        # Leaders claim their free bucket keys, the first leader per key wins.
+        leader_keys = keys[created][known[created] < 0]
+        leader_ids = np.broadcast_to(new_ids[created][:, None], keys[created].shape)[
+            known[created] < 0
+        ]
+        unique_keys, first = np.unique(leader_keys, return_index=True)
+        self.buckets.insert(unique_keys, leader_ids[first])
+        return clusters, created
+
+    def _add_leaders(self, signatures):
+        end = self.n_clusters + len(signatures)
+        if end > len(self._leaders):
+            grown = np.empty((max(end, 2 * len(self._leaders)), self.num_perm), dtype=np.uint32)
+            grown[: self.n_clusters] = self._leaders[: self.n_clusters]
+            self._leaders = grown
+        self._leaders[self.n_clusters : end] = signatures
+        self.n_clusters = end
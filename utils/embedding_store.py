@@ -0,0 +1,116 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+EMBEDDINGS_FILE = "embeddings.npy"
+LABELS_FILE = "labels.npy"
+WEIGHTS_FILE = "sample_weights.npy"
+META_FILE = "meta.json"
+
+# Written by dedup-commits: how many commits each deduplicated row stands for.
+SAMPLE_WEIGHT_COLUMN = "Sample_Weight"
+
+
+def shard_path(store_dir, index):
+    return os.path.join(store_dir, f"shard_{index:05d}.npy")
+
+
+def write_shard(path, embeddings):
+    """
+    Saves one shard atomically, so a crash never leaves a truncated shard
+    that a restart would mistake for a finished one.
+    """
+    tmp_path = path[: -len(".npy")] + ".tmp.npy"
+    np.save(tmp_path, np.asarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, path)
+
+
+def read_meta(store_dir):
+    path = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_meta(store_dir, meta):
+    with open(os.path.join(store_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def assemble_shards(store_dir, n_shards, n_rows, dimension):
+    """
+    Copies the shards in order into one float32 .npy matrix, then removes them.
+    """
+    matrix = np.lib.format.open_memmap(
+        os.path.join(store_dir, EMBEDDINGS_FILE),
+        mode="w+",
+        dtype=np.float32,
+        shape=(n_rows, dimension),
+    )
+    start = 0
+    for index in range(n_shards):
+        shard = np.load(shard_path(store_dir, index), mmap_mode="r")
+        matrix[start : start + len(shard)] = shard
+        start += len(shard)
+    matrix.flush()
+    del matrix
+    for index in range(n_shards):
+        os.remove(shard_path(store_dir, index))
+
+
+def is_embedding_store(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, EMBEDDINGS_FILE))
+
+
+def load_embedding_store(store_dir):
+    """
+    Opens an embed-corpus output directory. The embedding matrix is
+    memory-mapped, so rows are only read from disk when used.
+    Returns (X, y, label_cols).
+    """
+    meta = read_meta(store_dir)
+    X = np.load(os.path.join(store_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    y = np.load(os.path.join(store_dir, LABELS_FILE))
+    return X, y, meta["label_columns"]
+
+
+def load_sample_weights(path):
+    """
+    Per-row sample weights of a CSV (its Sample_Weight column) or of an
+    embedding store, or None when the data carries no weights.
+    """
+    if os.path.isdir(path):
+        weights_file = os.path.join(path, WEIGHTS_FILE)
+        return np.load(weights_file) if os.path.exists(weights_file) else None
+    header = pd.read_csv(path, nrows=0).columns
+    if SAMPLE_WEIGHT_COLUMN not in header:
+        return None
+    return pd.read_csv(path, usecols=[SAMPLE_WEIGHT_COLUMN])[SAMPLE_WEIGHT_COLUMN].to_numpy(
+        dtype=np.float64
+    )
+
+
+def save_embedding_store(store_dir, X, y, label_cols, sample_weight=None, **meta):
+    """
+    Writes features, labels, optional sample weights and metadata in the
+    layout load_embedding_store reads.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    np.save(os.path.join(store_dir, EMBEDDINGS_FILE), X)
+    np.save(os.path.join(store_dir, LABELS_FILE), np.asarray(y, dtype=np.int8))
+    if sample_weight is not None:
+        np.save(os.path.join(store_dir, WEIGHTS_FILE), np.asarray(sample_weight, dtype=np.float64))
+    write_meta(
+        store_dir,
+        {
+            "n_rows": len(X),
+            "dimension": int(X.shape[1]),
+            "dtype": str(X.dtype),
+            "label_columns": list(label_cols),
+            "complete": True,
+            **meta,
+        },
+    )
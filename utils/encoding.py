@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from tqdm import tqdm
+
+DEFAULT_TOKEN_BUDGET = 4096
+DEFAULT_MAX_BATCH_SIZE = 256
+
+
+def token_budget_batches(
+    lengths, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE
+):
+    """
+    Groups row indices, longest first, into batches whose padded size
+    (rows x longest sequence) stays within the token budget.
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(-lengths, kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch_size, token_budget // longest))
+        batches.append(order[start : start + size])
+        start += size
+    return batches
+
+
+class EncodingService:
+    """
+    Sentence-BERT encoding tuned for CPU throughput.
+
+    Texts are tokenized once in parallel threads, grouped by token length into
+    batches sized by a token budget, padded one batch ahead of the forward pass,
+    and the embeddings are written back in the original order.
+    """
+
+    def __init__(self, encoder, workers=None):
+        self.encoder = encoder.eval()
+        self.tokenizer = getattr(encoder, "tokenizer", None)
+        self.max_length = encoder.max_seq_length
+        self.dimension = encoder.encode(["dimension probe"]).shape[1]
+        self.workers = workers or min(4, os.cpu_count() or 1)
+
+    def _tokenize(self, texts):
+        return self.tokenizer(list(texts), truncation=True, max_length=self.max_length)
+
+    def tokenize(self, texts):
+        """
+        Tokenizes texts without padding, split across worker threads.
+        """
+        chunk_size = -(-len(texts) // self.workers)
+        chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            parts = list(executor.map(self._tokenize, chunks))
+        return {key: [row for part in parts for row in part[key]] for key in parts[0]}
+
+    def _pad(self, features, batch):
+        padded = self.tokenizer.pad(
+            {key: [values[i] for i in batch] for key, values in features.items()},
+            return_tensors="pt",
+        )
+        return {key: value.to(self.encoder.device) for key, value in padded.items()}
+
+    def encode(
+        self,
+        texts,
+        token_budget=DEFAULT_TOKEN_BUDGET,
+        max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+        show_progress_bar=False,
+    ):
+        """
+        Returns the float32 embeddings of texts, in input order.
+        """
+        texts = [str(text).strip() for text in texts]
+        if self.tokenizer is None:
+            return self.encoder.encode(texts, batch_size=max_batch_size).astype(np.float32)
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return embeddings
+
+        import torch
+
+        features = self.tokenize(texts)
+        lengths = [len(ids) for ids in features["input_ids"]]
+        batches = token_budget_batches(lengths, token_budget, max_batch_size)
+
+        # Padding of the next batch overlaps with the forward pass of the current one.
+        with ThreadPoolExecutor(max_workers=1) as executor, torch.inference_mode():
+            pending = executor.submit(self._pad, features, batches[0])
+            for i, batch in enumerate(tqdm(batches, disable=not show_progress_bar)):
+                padded = pending.result()
+                if i + 1 < len(batches):
+                    pending = executor.submit(self._pad, features, batches[i + 1])
+                output = self.encoder(padded)["sentence_embedding"]
+                embeddings[batch] = output.float().cpu().numpy()
+        return embeddings
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.registry import get_model
+from utils.thresholds import load_thresholds, predict_scores, resolve_thresholds
+
+COMBINE_METHODS = ("vote", "average")
+WEIGHTINGS = ("equal", "f1")
+
+
+class EnsemblePredictor:
+    """
+    Combines several registered models on one shared embedding matrix.
+
+    Every model scores the same batch in its own thread. "vote" cuts each
+    model's scores at its own thresholds and keeps a label when the weighted
+    share of models voting for it reaches vote_threshold; "average" compares the
+    weighted mean score with the weighted mean of the models' thresholds.
+    Thresholds are read from next to each model file, so recalibrated ones
+    apply without rebuilding the manifest.
+    """
+
+    def __init__(self, entries, combine="vote", weighting="equal", vote_threshold=0.5):
+        if combine not in COMBINE_METHODS:
+            raise ValueError(f"combine must be one of {COMBINE_METHODS}")
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"weighting must be one of {WEIGHTINGS}")
+        label_sets = {tuple(entry["label_columns"]) for entry in entries.values()}
+        if len(label_sets) != 1:
+            raise ValueError("ensembled models must share the same label columns")
+
+        self.combine = combine
+        self.vote_threshold = vote_threshold
+        self.label_columns = list(label_sets.pop())
+        self.models = {key: get_model(entry["model_file"]) for key, entry in entries.items()}
+        self.thresholds = {
+            key: np.broadcast_to(
+                resolve_thresholds(self.models[key], load_thresholds(entry["model_file"])),
+                len(self.label_columns),
+            )
+            for key, entry in entries.items()
+        }
+        weights = {
+            key: ((entry.get("metrics") or {}).get("macro_f1") or 1.0)
+            if weighting == "f1"
+            else 1.0
+            for key, entry in entries.items()
+        }
+        total = sum(weights.values())
+        self.weights = {key: weight / total for key, weight in weights.items()}
+
+    def predict_scores(self, X):
+        """
+        Scores X with every model concurrently. Returns {model key: scores}.
+        """
+        with ThreadPoolExecutor(max_workers=len(self.models)) as executor:
+            futures = {
+                key: executor.submit(predict_scores, model, X)
+                for key, model in self.models.items()
+            }
+            return {key: future.result() for key, future in futures.items()}
+
+    def predict(self, X):
+        """
+        Returns the combined 0/1 label matrix for X.
+        """
+        scores = self.predict_scores(X)
+        if self.combine == "vote":
+            votes = sum(
+                self.weights[key] * (scores[key] >= self.thresholds[key])
+                for key in scores
+            )
+            # Tolerance keeps exact ties (e.g. 3 of 6 votes) on the positive side.
+            return (votes >= self.vote_threshold - 1e-9).astype(int)
+
+        mean_scores = sum(self.weights[key] * scores[key] for key in scores)
+        mean_thresholds = sum(self.weights[key] * self.thresholds[key] for key in scores)
+        return (mean_scores >= mean_thresholds).astype(int)
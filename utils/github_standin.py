@@ -0,0 +1,356 @@
+import base64
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from utils.synthetic import commit_messages, commit_records
+
+COMMITS_PATH = re.compile(r"^/repos/([^/]+)/([^/]+)/commits/?$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.standin.handle(self)
+
+    def do_POST(self):
+        self.server.standin.handle(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GitHubStandIn:
+    """
+    Local stand-in for the GitHub REST commits endpoint
+    (GET /repos/{owner}/{repo}/commits) used to benchmark and harden the
+    crawler offline. It serves page/per_page pagination with Link headers,
+    weak ETags answered with 304 on If-None-Match, X-RateLimit-* headers with
+    a primary limit per window, a secondary limit on concurrent requests
+    (403 with Retry-After), injected latency and injected 502 errors.
+    POST /graphql answers the repository.defaultBranchRef history query of
+    fetch-commits --mode graphql with cursor pagination. Responses are
+    gzipped when the client accepts it.
+
+    repos maps "owner/repo" to a list of commit objects, newest first.
+    """
+
+    def __init__(
+        self,
+        repos,
+        host="127.0.0.1",
+        port=0,
+        rate_limit=5000,
+        rate_window=3600,
+        secondary_limit=None,
+        retry_after=1,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        seed=0,
+    ):
+        self.repos = {name.lower(): commits for name, commits in repos.items()}
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.secondary_limit = secondary_limit
+        self.retry_after = retry_after
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "not_modified": 0,
+            "rate_limited": 0,
+            "secondary_limited": 0,
+            "errors": 0,
+            "peak_concurrency": 0,
+            "bytes_sent": 0,
+        }
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._used = 0
+        self._reset_at = time.time() + rate_window
+        self._pages = {}
+        self._nodes = {}
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = None
+
+    @classmethod
+    def synthetic(cls, n_repos=4, commits_per_repo=1000, owner="standin", seed=0, **kwargs):
+        """
+        Builds a stand-in serving n_repos repositories of deterministic
+        synthetic commits, named owner/repo-0, owner/repo-1, ...
+        """
+        repos = {}
+        for i in range(n_repos):
+            name = f"{owner}/repo-{i}"
+            messages = commit_messages(commits_per_repo, seed=seed + i)
+            repos[name] = commit_records(messages, repo=name)
+        return cls(repos, seed=seed, **kwargs)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def repos_config(self, token="standin-token"):
+        """
+        The repos.json entries fetch-commits needs to crawl every served repo.
+        """
+        return [
+            {"repo_name": f"https://github.com/{name}", "owner": name.split("/")[0], "token": token}
+            for name in self.repos
+        ]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _page_body(self, repo, page, per_page):
+        key = (repo, page, per_page)
+        with self._lock:
+            cached = self._pages.get(key)
+        if cached:
+            return cached
+        commits = self.repos[repo][(page - 1) * per_page : page * per_page]
+        body = json.dumps(commits).encode()
+        etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+        with self._lock:
+            self._pages[key] = (body, etag)
+        return body, etag
+
+    def _rate_limit_headers(self):
+        # Called with self._lock held.
+        now = time.time()
+        if now >= self._reset_at:
+            self._used = 0
+            self._reset_at = now + self.rate_window
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(self.rate_limit - self._used, 0)),
+            "X-RateLimit-Reset": str(int(self._reset_at + 0.999)),
+            "X-RateLimit-Used": str(self._used),
+            "X-RateLimit-Resource": "core",
+        }
+
+    def handle(self, request):
+        # Read the body up front so keep-alive connections stay in sync
+        # whatever the response.
+        length = int(request.headers.get("Content-Length") or 0)
+        request_body = request.rfile.read(length) if length else b""
+        with self._lock:
+            self.stats["requests"] += 1
+            self._in_flight += 1
+            self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self._in_flight)
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+        try:
+            if delay:
+                time.sleep(delay)
+            self._respond(request, fail, request_body)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _respond(self, request, fail, request_body):
+        parts = urlsplit(request.path)
+        match = COMMITS_PATH.match(parts.path)
+        if request.command == "POST" and parts.path == "/graphql":
+            return self._respond_graphql(request, fail, request_body)
+        if request.command != "GET":
+            return self._send(request, 404, {"message": "Not Found"})
+        if parts.path == "/rate_limit":
+            with self._lock:
+                headers = self._rate_limit_headers()
+            core = {
+                "limit": self.rate_limit,
+                "remaining": int(headers["X-RateLimit-Remaining"]),
+                "reset": int(headers["X-RateLimit-Reset"]),
+                "used": int(headers["X-RateLimit-Used"]),
+            }
+            return self._send(request, 200, {"resources": {"core": core}, "rate": core}, headers)
+        if not match or f"{match[1]}/{match[2]}".lower() not in self.repos:
+            return self._send(request, 404, {"message": "Not Found"})
+
+        if self._reject(request, fail):
+            return
+
+        query = parse_qs(parts.query)
+        try:
+            page = max(int(query.get("page", ["1"])[0]), 1)
+            per_page = min(max(int(query.get("per_page", ["30"])[0]), 1), 100)
+        except ValueError:
+            return self._send(request, 422, {"message": "Validation Failed"})
+        repo = f"{match[1]}/{match[2]}".lower()
+        body, etag = self._page_body(repo, page, per_page)
+
+        not_modified = limited = False
+        with self._lock:
+            headers = self._rate_limit_headers()
+            if request.headers.get("If-None-Match") == etag:
+                # Conditional hits do not count against the primary limit.
+                self.stats["not_modified"] += 1
+                not_modified = True
+            elif self._used >= self.rate_limit:
+                self.stats["rate_limited"] += 1
+                limited = True
+            else:
+                self._used += 1
+                headers = self._rate_limit_headers()
+                self.stats["ok"] += 1
+        headers["ETag"] = etag
+        if not_modified:
+            return self._send(request, 304, None, headers)
+        if limited:
+            message = "API rate limit exceeded for user."
+            return self._send(request, 403, {"message": message}, headers)
+
+        last_page = max((len(self.repos[repo]) + per_page - 1) // per_page, 1)
+        headers["Link"] = self._link_header(parts.path, page, per_page, last_page)
+        return self._send(request, 200, body, headers)
+
+    def _reject(self, request, fail):
+        """
+        Sends a secondary rate limit or an injected 502 and returns True, or
+        returns False when the request may proceed.
+        """
+        with self._lock:
+            over_secondary = self.secondary_limit and self._in_flight > self.secondary_limit
+        if over_secondary:
+            self._count("secondary_limited")
+            message = "You have exceeded a secondary rate limit. Please wait a few minutes."
+            self._send(request, 403, {"message": message}, {"Retry-After": str(self.retry_after)})
+            return True
+        if fail:
+            self._count("errors")
+            self._send(request, 502, {"message": "Server Error"})
+            return True
+        return False
+
+    def _history_nodes(self, repo):
+        with self._lock:
+            nodes = self._nodes.get(repo)
+        if nodes is None:
+            nodes = [
+                {
+                    "oid": record["sha"],
+                    "message": record["commit"]["message"],
+                    "authoredDate": record["commit"]["author"]["date"],
+                    "committedDate": record["commit"]["committer"]["date"],
+                    "author": {
+                        "name": record["commit"]["author"]["name"],
+                        "email": record["commit"]["author"]["email"],
+                    },
+                }
+                for record in self.repos[repo]
+            ]
+            with self._lock:
+                self._nodes[repo] = nodes
+        return nodes
+
+    def _respond_graphql(self, request, fail, request_body):
+        if self._reject(request, fail):
+            return
+        try:
+            variables = json.loads(request_body or b"{}").get("variables") or {}
+            repo = f"{variables['owner']}/{variables['name']}".lower()
+            first = min(max(int(variables.get("first", 100)), 1), 100)
+            cursor = variables.get("cursor")
+            offset = int(base64.b64decode(cursor).decode().split(":")[1]) if cursor else 0
+        except (ValueError, KeyError, IndexError, AttributeError):
+            return self._send(request, 400, {"message": "Problems parsing JSON"})
+
+        with self._lock:
+            headers = self._rate_limit_headers()
+            limited = self._used >= self.rate_limit
+            if limited:
+                self.stats["rate_limited"] += 1
+            else:
+                self._used += 1
+                headers = self._rate_limit_headers()
+                self.stats["ok"] += 1
+        if limited:
+            error = {"type": "RATE_LIMITED", "message": "API rate limit exceeded for user."}
+            return self._send(request, 200, {"errors": [error]}, headers)
+        if repo not in self.repos:
+            error = {
+                "type": "NOT_FOUND",
+                "path": ["repository"],
+                "message": f"Could not resolve to a Repository with the name '{repo}'.",
+            }
+            return self._send(request, 200, {"data": {"repository": None}, "errors": [error]}, headers)
+
+        nodes = self._history_nodes(repo)
+        end = offset + first
+        history = {
+            "totalCount": len(nodes),
+            "pageInfo": {
+                "hasNextPage": end < len(nodes),
+                "endCursor": base64.b64encode(f"cursor:{end}".encode()).decode(),
+            },
+            "nodes": nodes[offset:end],
+        }
+        data = {"repository": {"defaultBranchRef": {"target": {"history": history}}}}
+        return self._send(request, 200, {"data": data}, headers)
+
+    def _link_header(self, path, page, per_page, last_page):
+        def link(target, rel):
+            query = urlencode({"per_page": per_page, "page": target})
+            return f'<{self.url}{path}?{query}>; rel="{rel}"'
+
+        links = []
+        if page < last_page:
+            links += [link(page + 1, "next"), link(last_page, "last")]
+        if page > 1:
+            links += [link(1, "first"), link(page - 1, "prev")]
+        return ", ".join(links)
+
+    def _send(self, request, status, body, headers=None):
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        headers = dict(headers or {})
+        if body and "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        with self._lock:
+            self.stats["bytes_sent"] += len(body or b"")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json; charset=utf-8")
+        request.send_header("Content-Length", str(len(body or b"")))
+        for name, value in headers.items():
+            if value:
+                request.send_header(name, value)
+        request.end_headers()
+        if body:
+            request.wfile.write(body)
@@ -1,61 +1,167 @@
 import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from inspect import signature
 
+import joblib
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 import seaborn as sns
-from sklearn.metrics import (
-    accuracy_score,
-    classification_report,
-    f1_score,
-    hamming_loss,
-    jaccard_score,
-    multilabel_confusion_matrix,
-    precision_score,
-    recall_score,
-)
+import sklearn
+from sklearn.metrics import get_scorer
 
 from constants import dempe_class_names
+from utils.embedding_store import is_embedding_store, load_embedding_store
+from utils.instrumentation import record_rows
+from utils.metrics import compute_multilabel_metrics, format_classification_report
+
+EVALUATION_SUFFIX = "_evaluation.npz"
+
+_PLOT_EXECUTOR = None
+
+
+def load_features_labels(csv_file):
+    """
+    Loads one embedded CSV and splits it into feature and label arrays.
+    An embed-corpus output directory is memory-mapped instead.
+    """
+    if is_embedding_store(csv_file):
+        return load_embedding_store(csv_file)
+    df = pd.read_csv(csv_file)
+    label_cols = [col for col in df.columns if col.startswith("DEMPE_Class_")]
+    feature_cols = [col for col in df.columns if col.startswith("f_")]
+    return df[feature_cols].values, df[label_cols].values, label_cols
+
+
+def load_train_test(train_file, test_file):
+    """
+    Loads the train/test CSVs once and splits them into feature and label arrays.
+    """
+    X_train, y_train, label_cols = load_features_labels(train_file)
+    X_test, y_test, _ = load_features_labels(test_file)
+    record_rows(rows_in=len(X_train) + len(X_test))
+    return X_train, y_train, X_test, y_test, label_cols
+
+
+def fit_search(search, X, y, sample_weight=None):
+    """
+    Fits a GridSearchCV. With sample_weight, the weights are routed to every
+    estimator whose fit accepts them and to the scorer, so a deduplicated row
+    counts as often as the commits it stands for in training and model selection.
+    """
+    if sample_weight is None:
+        return search.fit(X, y)
+    with sklearn.config_context(enable_metadata_routing=True):
+        estimators = [search.estimator, *search.estimator.get_params(deep=True).values()]
+        for estimator in estimators:
+            fit = getattr(estimator, "fit", None)
+            if hasattr(estimator, "set_fit_request") and "sample_weight" in signature(fit).parameters:
+                estimator.set_fit_request(sample_weight=True)
+        scorer = get_scorer(search.scoring).set_score_request(sample_weight=True)
+        search.set_params(scoring=scorer)
+        return search.fit(X, y, sample_weight=sample_weight)
+
+
+def load_model_artifact(model_file):
+    """
+    Loads a trained model: Keras files by extension, everything else with joblib.
+    """
+    if model_file.endswith((".h5", ".keras")):
+        from tensorflow.keras.models import load_model
+
+        return load_model(model_file)
+    return joblib.load(model_file)
 
 
 def evaluate_and_save_metrics(
-    y_true, y_pred, label_names, output_dir, model_name="model"
+    y_true, y_pred, label_names, output_dir, model_name="model", plots="background"
 ):
+    """
+    Writes the classification report, summary metrics and raw evaluation arrays.
+    Plots are rendered in a background process by default ("background"),
+    inline ("sync"), or skipped ("none") and left to the render-reports command.
+    """
     os.makedirs(output_dir, exist_ok=True)
 
     # Map technical label names to friendly ones
     display_names = [dempe_class_names.get(label, label) for label in label_names]
 
+    # All metrics derive from one confusion tensor
+    metrics = compute_multilabel_metrics(y_true, y_pred)
+
     # 1. Textual classification report
-    report = classification_report(
-        y_true, y_pred, target_names=display_names, zero_division=0
-    )
+    report = format_classification_report(metrics, display_names)
     with open(
         os.path.join(output_dir, f"{model_name}_classification_report.txt"), "w"
     ) as f:
         f.write(report)
 
     # 2. JSON summary metrics
-    summary = {
-        "subset_accuracy": accuracy_score(y_true, y_pred),
-        "hamming_loss": hamming_loss(y_true, y_pred),
-        "jaccard_score_samples": jaccard_score(y_true, y_pred, average="samples"),
-        "jaccard_score_macro": jaccard_score(y_true, y_pred, average="macro"),
-        "jaccard_score_micro": jaccard_score(y_true, y_pred, average="micro"),
-        "macro_precision": precision_score(
-            y_true, y_pred, average="macro", zero_division=0
-        ),
-        "macro_recall": recall_score(y_true, y_pred, average="macro", zero_division=0),
-        "macro_f1": f1_score(y_true, y_pred, average="macro", zero_division=0),
-    }
+    summary = metrics["summary"]
 
     with open(os.path.join(output_dir, f"{model_name}_summary_metrics.json"), "w") as f:
         json.dump(summary, f, indent=2)
 
-    # 3. PRF bar chart
-    precision = precision_score(y_true, y_pred, average=None, zero_division=0)
-    recall = recall_score(y_true, y_pred, average=None, zero_division=0)
-    f1 = f1_score(y_true, y_pred, average=None, zero_division=0)
+    # 3. Per-label metrics and raw arrays, enough to render the plots later
+    with open(os.path.join(output_dir, f"{model_name}_label_metrics.json"), "w") as f:
+        json.dump(
+            {
+                label: {
+                    "precision": float(metrics["precision"][i]),
+                    "recall": float(metrics["recall"][i]),
+                    "f1": float(metrics["f1"][i]),
+                    "support": int(metrics["support"][i]),
+                    "confusion_matrix": metrics["confusion"][i].tolist(),
+                }
+                for i, label in enumerate(label_names)
+            },
+            f,
+            indent=2,
+        )
+    np.savez_compressed(
+        os.path.join(output_dir, f"{model_name}{EVALUATION_SUFFIX}"),
+        y_true=np.asarray(y_true, dtype=np.int8),
+        y_pred=np.asarray(y_pred, dtype=np.int8),
+        label_names=np.asarray(label_names),
+    )
+
+    if plots == "sync":
+        render_report_plots(output_dir, model_name)
+    elif plots == "background":
+        _plot_executor().submit(render_report_plots, output_dir, model_name)
+        print(f"🖼️ Rendering plots for {model_name} in the background...")
+
+    print(f"✅ Evaluation completed. All reports saved to: {output_dir}")
+    return summary
+
+
+def _plot_executor():
+    # One spawned plotting process per run; interpreter exit waits for it.
+    global _PLOT_EXECUTOR
+    if _PLOT_EXECUTOR is None:
+        _PLOT_EXECUTOR = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _PLOT_EXECUTOR
+
+
+def render_report_plots(output_dir, model_name="model"):
+    """
+    Draws the PRF chart, confusion heatmaps and Jaccard histogram from the
+    evaluation arrays saved by evaluate_and_save_metrics.
+    """
+    evaluation = np.load(os.path.join(output_dir, f"{model_name}{EVALUATION_SUFFIX}"))
+    y_true, y_pred = evaluation["y_true"], evaluation["y_pred"]
+    label_names = evaluation["label_names"].tolist()
+    display_names = [dempe_class_names.get(label, label) for label in label_names]
+    metrics = compute_multilabel_metrics(y_true, y_pred)
+
+    # 1. PRF bar chart
+    precision = metrics["precision"]
+    recall = metrics["recall"]
+    f1 = metrics["f1"]
 
     plt.figure(figsize=(10, 6))
     x = np.arange(len(display_names))
@@ -77,8 +183,8 @@ def evaluate_and_save_metrics(
     plt.savefig(os.path.join(output_dir, f"{model_name}_prf_scores.png"))
     plt.close()
 
-    # 4. Confusion matrix heatmaps (Improved layout)
-    conf_matrices = multilabel_confusion_matrix(y_true, y_pred)
+    # 2. Confusion matrix heatmaps (Improved layout)
+    conf_matrices = metrics["confusion"]
 
     for i, cm in enumerate(conf_matrices):
         fig, ax = plt.subplots(figsize=(6, 6))  # Smaller but more compact size
@@ -121,11 +227,8 @@ def evaluate_and_save_metrics(
         )
         plt.close()
 
-    # 5. Jaccard similarity histogram
-    jaccard_vals = [
-        jaccard_score(y_true[i], y_pred[i], average="binary", zero_division=0)
-        for i in range(len(y_true))
-    ]
+    # 3. Jaccard similarity histogram
+    jaccard_vals = metrics["sample_jaccard"]
 
     plt.figure(figsize=(7, 5))
     sns.histplot(jaccard_vals, bins=20, kde=True, color="mediumpurple")
@@ -137,4 +240,4 @@ def evaluate_and_save_metrics(
     plt.savefig(os.path.join(output_dir, f"{model_name}_jaccard_distribution.png"))
     plt.close()
 
-    print(f"✅ Evaluation completed. All reports and plots saved to: {output_dir}")
+    print(f"✅ Plots saved to: {output_dir}")
@@ -0,0 +1,280 @@
+import cProfile
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import click
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUNS_DIR = "data/runs"
+
+_local = threading.local()
+_run = None
+_run_lock = threading.Lock()
+# cProfile allows one active profiler per process (enforced since Python 3.12)
+_profile_lock = threading.Lock()
+
+
+def current_rss_mb():
+    """
+    Resident set size of this process, read from /proc where available and
+    otherwise approximated by the peak RSS.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def children_cpu_sec():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RssSampler:
+    """
+    Polls the process RSS on a daemon thread and keeps the highest value seen.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is not None and rss > self.peak_mb:
+                self.peak_mb = rss
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        rss = current_rss_mb()
+        if rss is not None and self.peak_mb is not None:
+            self.peak_mb = max(self.peak_mb, rss)
+
+
+def record_rows(rows_in=None, rows_out=None):
+    """
+    Attaches row counts to the command being measured on this thread.
+    Does nothing outside an instrumented command.
+    """
+    stack = getattr(_local, "stack", None)
+    if not stack:
+        return
+    if rows_in is not None:
+        stack[-1]["rows_in"] = int(rows_in)
+    if rows_out is not None:
+        stack[-1]["rows_out"] = int(rows_out)
+
+
+def format_metrics(metrics):
+    parts = [f"{metrics['wall_sec']:.2f}s wall", f"{metrics['cpu_sec']:.2f}s CPU"]
+    if metrics["children_cpu_sec"] >= 0.01:
+        parts[-1] += f" (+{metrics['children_cpu_sec']:.2f}s in workers)"
+    if "rows_in" in metrics or "rows_out" in metrics:
+        rows_in, rows_out = (
+            f"{metrics[key]:,}" if key in metrics else "?" for key in ("rows_in", "rows_out")
+        )
+        rows = f"{rows_in} → {rows_out} rows"
+        if "rows_per_sec" in metrics:
+            rows += f" ({metrics['rows_per_sec']:,.0f} rows/s)"
+        parts.append(rows)
+    if metrics.get("peak_rss_mb") is not None:
+        parts.append(
+            f"peak RSS {metrics['peak_rss_mb']:.0f} MB ({metrics['rss_delta_mb']:+.0f})"
+        )
+    if "tracemalloc_peak_mb" in metrics:
+        parts.append(f"traced peak {metrics['tracemalloc_peak_mb']:.1f} MB")
+    return f"📈 {metrics['command']}: " + " | ".join(parts)
+
+
+@contextmanager
+def measure(command, profile_file=None):
+    """
+    Measures one command: wall and CPU time (this process plus finished worker
+    processes), peak RSS, row throughput and, when tracemalloc is tracing,
+    traced allocation deltas. CPU, RSS and tracemalloc figures are process-wide,
+    so they include any stage running concurrently in the same process.
+    Profiled commands of the same process run one at a time, since only one
+    profiler can be active.
+    """
+    stack = _local.__dict__.setdefault("stack", [])
+    metrics = {"command": command, "status": "ok"}
+    stack.append(metrics)
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        traced_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    profiler = None
+    if profile_file:
+        # Acquired before the clocks start, so waiting for another profiled
+        # stage is not counted in this one.
+        _profile_lock.acquire()
+        profiler = cProfile.Profile()
+
+    sampler = RssSampler().__enter__()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    children_start = children_cpu_sec()
+    try:
+        if profiler:
+            profiler.enable()
+        yield metrics
+    except click.exceptions.Exit as e:
+        if e.exit_code:
+            metrics.update(status="failed", error=f"exit code {e.exit_code}")
+        raise
+    except BaseException as e:
+        metrics.update(status="failed", error=str(e) or type(e).__name__)
+        raise
+    finally:
+        if profiler:
+            try:
+                profiler.disable()
+                os.makedirs(os.path.dirname(profile_file) or ".", exist_ok=True)
+                profiler.dump_stats(profile_file)
+            finally:
+                _profile_lock.release()
+        wall_sec = time.perf_counter() - wall_start
+        sampler.__exit__(None, None, None)
+        metrics.update(
+            wall_sec=round(wall_sec, 4),
+            cpu_sec=round(time.process_time() - cpu_start, 4),
+            children_cpu_sec=round(children_cpu_sec() - children_start, 4),
+            rss_start_mb=_round(sampler.start_mb),
+            peak_rss_mb=_round(sampler.peak_mb),
+            rss_delta_mb=_round(
+                None if sampler.start_mb is None else sampler.peak_mb - sampler.start_mb
+            ),
+        )
+        rows = metrics.get("rows_out", metrics.get("rows_in"))
+        if rows and wall_sec > 0:
+            metrics["rows_per_sec"] = round(rows / wall_sec, 1)
+        if tracing and tracemalloc.is_tracing():
+            traced_end, traced_peak = tracemalloc.get_traced_memory()
+            metrics["tracemalloc_delta_mb"] = _round((traced_end - traced_start) / 2**20)
+            metrics["tracemalloc_peak_mb"] = _round((traced_peak - traced_start) / 2**20)
+        stack.pop()
+        _record(metrics)
+
+
+def _round(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+def _record(metrics):
+    click.echo(format_metrics(metrics))
+    if profile_path := metrics.get("profile_file"):
+        click.echo(f"🔬 Profile written to: {profile_path}")
+    with _run_lock:
+        if _run is not None:
+            _run["stages"].append(metrics)
+
+
+def instrumented(command):
+    """
+    Decorates a click command so every invocation is measured, and adds a
+    --profile option writing a cProfile dump of the command.
+    """
+    command.params.append(
+        click.Option(
+            ["--profile", "profile_file"],
+            type=click.Path(),
+            default=None,
+            help="Write a cProfile dump of this command (view with snakeviz or pstats).",
+        )
+    )
+    callback = command.callback
+
+    @functools.wraps(callback)
+    def wrapper(*args, profile_file=None, **kwargs):
+        with measure(command.name, profile_file) as metrics:
+            if profile_file:
+                metrics["profile_file"] = profile_file
+            return callback(*args, **kwargs)
+
+    command.callback = wrapper
+    return command
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def run_manifest(name, runs_dir=RUNS_DIR, trace_memory=False):
+    """
+    Collects the metrics of every instrumented command run inside the block,
+    from any thread, into one JSON run manifest written to runs_dir.
+    """
+    global _run
+    started = time.time()
+    run = {
+        "run_id": time.strftime("%Y%m%dT%H%M%S", time.localtime(started)) + f"-{name}",
+        "name": name,
+        "argv": sys.argv[1:],
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "git_commit": _git_commit(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": [],
+    }
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    with _run_lock:
+        _run = run
+    try:
+        yield run
+    finally:
+        with _run_lock:
+            _run = None
+        if started_tracing:
+            tracemalloc.stop()
+        run["wall_sec"] = round(time.time() - started, 3)
+        run["peak_rss_mb"] = _round(peak_rss_mb())
+        os.makedirs(runs_dir, exist_ok=True)
+        path = os.path.join(runs_dir, f"{run['run_id']}.json")
+        with open(path, "w") as f:
+            json.dump(run, f, indent=2, default=str)
+        click.echo(f"🧾 Run manifest saved to: {path}")
@@ -0,0 +1,111 @@
+import numpy as np
+
+from utils.thresholds import best_f1_thresholds
+
+
+def gram_statistics(X, y, sample_weight=None, chunk_size=65536):
+    """
+    Accumulates the sufficient statistics of a least-squares fit chunk by chunk:
+    row count, feature/label sums, the Gram matrix X'X and the cross term X'Y.
+    With sample_weight, every row counts that many times (X'WX, X'WY).
+    """
+    n_features = X.shape[1]
+    n_labels = y.shape[1]
+    stats = {
+        "n": 0,
+        "sum_x": np.zeros(n_features),
+        "sum_y": np.zeros(n_labels),
+        "xx": np.zeros((n_features, n_features)),
+        "xy": np.zeros((n_features, n_labels)),
+    }
+    for start in range(0, len(X), chunk_size):
+        X_chunk = np.asarray(X[start : start + chunk_size], dtype=np.float64)
+        y_chunk = np.asarray(y[start : start + chunk_size], dtype=np.float64)
+        if sample_weight is None:
+            w_chunk = np.ones(len(X_chunk))
+        else:
+            w_chunk = np.asarray(sample_weight[start : start + chunk_size], dtype=np.float64)
+        weighted = X_chunk * w_chunk[:, None]
+        stats["n"] += w_chunk.sum()
+        stats["sum_x"] += weighted.sum(axis=0)
+        stats["sum_y"] += w_chunk @ y_chunk
+        stats["xx"] += weighted.T @ X_chunk
+        stats["xy"] += weighted.T @ y_chunk
+    return stats
+
+
+def _centered(stats):
+    n = stats["n"]
+    mean_x = stats["sum_x"] / n
+    mean_y = stats["sum_y"] / n
+    xx = stats["xx"] - n * np.outer(mean_x, mean_x)
+    xy = stats["xy"] - n * np.outer(mean_x, mean_y)
+    return mean_x, mean_y, xx, xy
+
+
+class RidgeMultilabelHead:
+    """
+    Multi-label linear probe on sentence embeddings, fitted in closed form.
+
+    One ridge regression per label is solved from a single Gram matrix, the
+    regularisation strength is picked on a held-out split and per-label
+    thresholds are calibrated on that split. Prediction is one matmul.
+    """
+
+    def __init__(
+        self, alphas=(0.01, 0.1, 1.0, 10.0, 100.0), val_fraction=0.1, random_state=42
+    ):
+        self.alphas = alphas
+        self.val_fraction = val_fraction
+        self.random_state = random_state
+
+    def fit(self, X, y, sample_weight=None):
+        y = np.asarray(y)
+        w = np.ones(len(X)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+        rng = np.random.default_rng(self.random_state)
+        is_val = rng.random(len(X)) < self.val_fraction
+        X_fit, y_fit, w_fit = X[~is_val], y[~is_val], w[~is_val]
+        X_val, y_val, w_val = X[is_val], y[is_val], w[is_val]
+
+        fit_stats = gram_statistics(X_fit, y_fit, w_fit)
+        mean_x, mean_y, xx, xy = _centered(fit_stats)
+
+        # One eigendecomposition serves every alpha on the grid.
+        eigvals, eigvecs = np.linalg.eigh(xx)
+        projected = eigvecs.T @ xy
+        scale = np.trace(xx) / xx.shape[0]
+
+        val_errors = []
+        for alpha in self.alphas:
+            coef = eigvecs @ (projected / (eigvals + alpha * scale)[:, None])
+            scores = (X_val - mean_x) @ coef + mean_y
+            errors = np.mean((scores - y_val) ** 2, axis=1)
+            val_errors.append(float(np.average(errors, weights=w_val)))
+        self.alpha_ = self.alphas[int(np.argmin(val_errors))]
+        self.val_errors_ = dict(zip(self.alphas, val_errors))
+
+        # Thresholds come from the held-out scores of the chosen alpha.
+        coef = eigvecs @ (projected / (eigvals + self.alpha_ * scale)[:, None])
+        val_scores = (X_val - mean_x) @ coef + mean_y
+        self.thresholds_, self.val_f1_ = best_f1_thresholds(y_val, val_scores, sample_weight=w_val)
+
+        # Refit on all rows by merging the held-out statistics.
+        val_stats = gram_statistics(X_val, y_val, w_val)
+        all_stats = {key: fit_stats[key] + val_stats[key] for key in fit_stats}
+        mean_x, mean_y, xx, xy = _centered(all_stats)
+        ridge = self.alpha_ * np.trace(xx) / xx.shape[0]
+        coef = np.linalg.solve(xx + ridge * np.eye(xx.shape[0]), xy)
+
+        self.coef_ = coef.astype(np.float32)
+        self.intercept_ = (mean_y - mean_x @ coef).astype(np.float32)
+        return self
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=np.float32) @ self.coef_ + self.intercept_
+
+    def predict_proba(self, X):
+        # Ridge scores approximate label probabilities; clip them into [0, 1].
+        return np.clip(self.decision_function(X), 0.0, 1.0)
+
+    def predict(self, X):
+        return (self.decision_function(X) >= self.thresholds_).astype(int)
@@ -0,0 +1,214 @@
+import numpy as np
+
+
+def _safe_divide(numerator, denominator):
+    # Matches sklearn's zero_division=0: empty denominators score 0.
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(
+        numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0
+    )
+
+
+# Up to this many labels, rows are packed into integer codes and every count
+# is read off a joint histogram of (true code, predicted code) pairs.
+MAX_PACKED_LABELS = 10
+
+
+def _label_codes(y):
+    # Bit j of a row's code is set when label j is on.
+    y = np.asarray(y) != 0
+    return y.view(np.uint8) @ (1 << np.arange(y.shape[1], dtype=np.int32))
+
+
+def _counts_from_histogram(y_true, y_pred):
+    n_labels = y_true.shape[1]
+    n_codes = 1 << n_labels
+    joint = (_label_codes(y_true) << n_labels) | _label_codes(y_pred)
+    hist = np.bincount(joint, minlength=n_codes * n_codes).reshape(n_codes, n_codes)
+
+    codes = np.arange(n_codes)
+    bits = (codes[:, None] >> np.arange(n_labels)) & 1
+    popcount = bits.sum(axis=1)
+    both = codes[:, None] & codes[None, :]
+
+    # Set sizes for every (true code, predicted code) pair
+    intersection = popcount[both]
+    true_count = np.broadcast_to(popcount[:, None], hist.shape)
+    pred_count = np.broadcast_to(popcount[None, :], hist.shape)
+    jaccard = _safe_divide(intersection, true_count + pred_count - intersection)
+
+    def per_sample(table):
+        # Looked up row by row, so averages sum in sklearn's order
+        return table.ravel()[joint]
+
+    return {
+        "tp": np.bincount(both.ravel(), weights=hist.ravel(), minlength=n_codes)
+        @ bits,
+        "true_pos": hist.sum(axis=1) @ bits,
+        "pred_pos": hist.sum(axis=0) @ bits,
+        "exact_match": float(np.trace(hist)),
+        "samples": {
+            "jaccard": per_sample(jaccard),
+            "precision": per_sample(_safe_divide(intersection, pred_count)),
+            "recall": per_sample(_safe_divide(intersection, true_count)),
+            "f1": per_sample(
+                _safe_divide(2 * intersection, true_count + pred_count)
+            ),
+        },
+    }
+
+
+def _counts_direct(y_true, y_pred):
+    y_true = np.asarray(y_true) != 0
+    y_pred = np.asarray(y_pred) != 0
+    both = y_true & y_pred
+
+    intersection = np.count_nonzero(both, axis=1)
+    true_count = np.count_nonzero(y_true, axis=1)
+    pred_count = np.count_nonzero(y_pred, axis=1)
+    sample_jaccard = _safe_divide(
+        intersection, true_count + pred_count - intersection
+    )
+
+    return {
+        "tp": np.count_nonzero(both, axis=0),
+        "true_pos": np.count_nonzero(y_true, axis=0),
+        "pred_pos": np.count_nonzero(y_pred, axis=0),
+        "exact_match": float(np.all(y_true == y_pred, axis=1).sum()),
+        "samples": {
+            "jaccard": sample_jaccard,
+            "precision": _safe_divide(intersection, pred_count),
+            "recall": _safe_divide(intersection, true_count),
+            "f1": _safe_divide(2 * intersection, true_count + pred_count),
+        },
+    }
+
+
+def _check_inputs(y_true, y_pred):
+    # Both must be 0/1 label matrices of the same shape
+    y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+    if y_true.ndim != 2 or y_true.shape != y_pred.shape:
+        raise ValueError(
+            f"expected two 2-D label matrices of the same shape, got {y_true.shape} and {y_pred.shape}"
+        )
+    for name, y in (("y_true", y_true), ("y_pred", y_pred)):
+        if not ((y == 0) | (y == 1)).all():
+            raise ValueError(f"{name} must only hold 0/1 label values")
+
+
+def _label_counts(y_true, y_pred):
+    _check_inputs(y_true, y_pred)
+    if np.shape(y_true)[1] <= MAX_PACKED_LABELS:
+        return _counts_from_histogram(y_true, y_pred)
+    return _counts_direct(y_true, y_pred)
+
+
+def _confusion_tensor(counts, n_samples):
+    tp = np.rint(counts["tp"]).astype(np.int64)
+    fp = np.rint(counts["pred_pos"]).astype(np.int64) - tp
+    fn = np.rint(counts["true_pos"]).astype(np.int64) - tp
+    tn = n_samples - tp - fp - fn
+    return np.stack([np.stack([tn, fp], axis=1), np.stack([fn, tp], axis=1)], axis=1)
+
+
+def multilabel_confusion_counts(y_true, y_pred):
+    """
+    Builds the per-label confusion tensor in one vectorized pass.
+    Returns an array of shape (n_labels, 2, 2) laid out as [[TN, FP], [FN, TP]],
+    the same layout as sklearn's multilabel_confusion_matrix.
+    """
+    return _confusion_tensor(_label_counts(y_true, y_pred), len(y_true))
+
+
+def compute_multilabel_metrics(y_true, y_pred):
+    """
+    Derives every metric reported by evaluate_and_save_metrics from one
+    confusion tensor plus per-sample intersection/union counts.
+    """
+    counts = _label_counts(y_true, y_pred)
+    n_samples, n_labels = np.shape(y_true)
+    confusion = _confusion_tensor(counts, n_samples)
+    fp = confusion[:, 0, 1]
+    fn, tp = confusion[:, 1, 0], confusion[:, 1, 1]
+    support = tp + fn
+
+    precision = _safe_divide(tp, tp + fp)
+    recall = _safe_divide(tp, tp + fn)
+    f1 = _safe_divide(2 * tp, 2 * tp + fp + fn)
+    jaccard = _safe_divide(tp, tp + fp + fn)
+    sample_means = {k: float(np.mean(v)) for k, v in counts["samples"].items()}
+
+    tp_sum, fp_sum, fn_sum = tp.sum(), fp.sum(), fn.sum()
+    micro = {
+        "precision": float(_safe_divide(tp_sum, tp_sum + fp_sum)),
+        "recall": float(_safe_divide(tp_sum, tp_sum + fn_sum)),
+        "f1": float(_safe_divide(2 * tp_sum, 2 * tp_sum + fp_sum + fn_sum)),
+    }
+    total_support = support.sum()
+
+    def weighted(values):
+        # np.average like sklearn, so the printed digits round the same way
+        return np.average(values, weights=support) if total_support else 0.0
+
+    averages = {
+        "micro avg": (micro["precision"], micro["recall"], micro["f1"]),
+        "macro avg": (precision.mean(), recall.mean(), f1.mean()),
+        "weighted avg": (weighted(precision), weighted(recall), weighted(f1)),
+        "samples avg": (
+            sample_means["precision"],
+            sample_means["recall"],
+            sample_means["f1"],
+        ),
+    }
+
+    summary = {
+        "subset_accuracy": counts["exact_match"] / n_samples,
+        "hamming_loss": float((fp_sum + fn_sum) / (n_samples * n_labels)),
+        "jaccard_score_samples": sample_means["jaccard"],
+        "jaccard_score_macro": float(jaccard.mean()),
+        "jaccard_score_micro": float(_safe_divide(tp_sum, tp_sum + fp_sum + fn_sum)),
+        "macro_precision": float(precision.mean()),
+        "macro_recall": float(recall.mean()),
+        "macro_f1": float(f1.mean()),
+    }
+
+    return {
+        "summary": summary,
+        "confusion": confusion,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "support": support,
+        "averages": {k: tuple(float(v) for v in avg) for k, avg in averages.items()},
+        "total_support": int(total_support),
+        "sample_jaccard": counts["samples"]["jaccard"],
+    }
+
+
+def format_classification_report(metrics, target_names, digits=2):
+    """
+    Renders the metrics in the same text layout as sklearn's classification_report.
+    """
+    headers = ["precision", "recall", "f1-score", "support"]
+    width = max(max(len(name) for name in target_names), len("weighted avg"), digits)
+    head_fmt = "{:>{width}s} " + " {:>9}" * len(headers)
+    row_fmt = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+
+    report = head_fmt.format("", *headers, width=width) + "\n\n"
+    for i, name in enumerate(target_names):
+        report += row_fmt.format(
+            name,
+            metrics["precision"][i],
+            metrics["recall"][i],
+            metrics["f1"][i],
+            int(metrics["support"][i]),
+            width=width,
+            digits=digits,
+        )
+    report += "\n"
+    for heading, values in metrics["averages"].items():
+        report += row_fmt.format(
+            heading, *values, metrics["total_support"], width=width, digits=digits
+        )
+    return report
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import click
+
+PIPELINE_CACHE_FILE = "data/.pipeline_cache.json"
+
+
+class Stage:
+    """
+    One pipeline step: a click command plus the options it is run with.
+    Dependencies follow from the paths: a stage waits for every stage whose
+    outputs it reads. Stages sharing a resource (e.g. matplotlib's global
+    state) never run at the same time. An always_run stage reads state
+    outside its inputs (e.g. a remote API) and is never skipped; stages
+    downstream of it are still skipped when its outputs did not change.
+    """
+
+    def __init__(
+        self, name, command, params, inputs=(), outputs=(), resource=None, always_run=False
+    ):
+        self.name = name
+        self.command = command
+        self.params = params
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.resource = resource
+        self.always_run = always_run
+
+    def args(self):
+        """
+        Renders the params as command-line arguments, so the stage gets the same
+        parsing and validation as when run from the shell.
+        """
+        args = []
+        for key, value in self.params.items():
+            option = "--" + key.replace("_", "-")
+            if value is True:
+                args.append(option)
+            elif isinstance(value, (list, tuple)):
+                for item in value:
+                    args += [option, str(item)]
+            elif value is not None and value is not False:
+                args += [option, str(value)]
+        return args
+
+    def run(self, profile_file=None):
+        args = self.args()
+        if profile_file:
+            args += ["--profile", profile_file]
+        self.command.main(args=args, prog_name=self.name, standalone_mode=False)
+
+
+class ContentHasher:
+    """
+    SHA-256 of files and directory trees. Digests are memoized by
+    (size, mtime), so unchanged files are only read once across runs.
+    """
+
+    def __init__(self, memo=None):
+        self.memo = memo if memo is not None else {}
+        self._lock = threading.Lock()
+
+    def _file_digest(self, path):
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            cached = self.memo.get(path)
+        if cached and cached[:2] == signature:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with self._lock:
+            self.memo[path] = [*signature, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def digest(self, path):
+        if os.path.isfile(path):
+            return self._file_digest(path)
+        if not os.path.isdir(path):
+            return None
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(self._file_digest(file_path).encode())
+        return digest.hexdigest()
+
+
+def stage_dependencies(stages):
+    """
+    Maps every stage name to the names of the stages producing its inputs.
+    Raises ValueError on cycles.
+    """
+    producers = {path: stage.name for stage in stages for path in stage.outputs}
+    dependencies = {
+        stage.name: {
+            producers[path]
+            for path in stage.inputs
+            if path in producers and producers[path] != stage.name
+        }
+        for stage in stages
+    }
+
+    done = set()
+    while len(done) < len(dependencies):
+        ready = {name for name, deps in dependencies.items() if name not in done and deps <= done}
+        if not ready:
+            raise ValueError(f"pipeline has a cycle among: {sorted(set(dependencies) - done)}")
+        done |= ready
+    return dependencies
+
+
+class PipelineRunner:
+    """
+    Runs stages in-process as a DAG. A stage is skipped when the hash of its
+    command, params and input contents matches its last successful run and its
+    outputs still exist; stages whose dependencies are done run concurrently
+    in a thread pool. With a profile_dir, every stage that runs writes a
+    cProfile dump named after it there.
+    """
+
+    def __init__(
+        self, stages, cache_file=PIPELINE_CACHE_FILE, workers=2, force=False, profile_dir=None
+    ):
+        self.stages = {stage.name: stage for stage in stages}
+        self.dependencies = stage_dependencies(stages)
+        self.cache_file = cache_file
+        self.workers = workers
+        self.force = force
+        self.profile_dir = profile_dir
+        self.cache = self._load_cache()
+        self.hasher = ContentHasher(self.cache["files"])
+        self._locks = {stage.resource: threading.Lock() for stage in stages if stage.resource}
+        self._cache_lock = threading.Lock()
+
+    def _load_cache(self):
+        if os.path.exists(self.cache_file):
+            with open(self.cache_file) as f:
+                return json.load(f)
+        return {"stages": {}, "files": {}}
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.cache, f, indent=2)
+        os.replace(tmp_file, self.cache_file)
+
+    def stage_key(self, stage):
+        payload = {
+            "command": stage.command.name,
+            "params": stage.params,
+            "inputs": {path: self.hasher.digest(path) for path in stage.inputs},
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def is_fresh(self, stage, key):
+        record = self.cache["stages"].get(stage.name)
+        return (
+            not self.force
+            and not stage.always_run
+            and record is not None
+            and record["key"] == key
+            and all(os.path.exists(path) for path in stage.outputs)
+        )
+
+    def _execute(self, stage):
+        key = self.stage_key(stage)
+        if self.is_fresh(stage, key):
+            return "cached", 0.0
+
+        profile_file = None
+        if self.profile_dir:
+            profile_file = os.path.join(self.profile_dir, f"{stage.name}.prof")
+        lock = self._locks.get(stage.resource)
+        start = time.perf_counter()
+        if lock:
+            with lock:
+                stage.run(profile_file)
+        else:
+            stage.run(profile_file)
+        seconds = time.perf_counter() - start
+
+        with self._cache_lock:
+            self.cache["stages"][stage.name] = {
+                "key": key,
+                "seconds": round(seconds, 2),
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._save_cache()
+        return "ran", seconds
+
+    def plan(self):
+        """
+        Reports each stage as "cached", "stale" or "always" (always_run)
+        without running anything. Stages downstream of a stale stage are
+        stale too; behind an always_run stage they depend on what it fetches.
+        """
+        status = {}
+        for name in self._topological_order():
+            stage = self.stages[name]
+            if stage.always_run:
+                status[name] = "always"
+                continue
+            upstream_stale = any(status[dep] == "stale" for dep in self.dependencies[name])
+            fresh = not upstream_stale and self.is_fresh(stage, self.stage_key(stage))
+            status[name] = "cached" if fresh else "stale"
+        return status
+
+    def _topological_order(self):
+        order = []
+        while len(order) < len(self.stages):
+            order += [
+                name
+                for name in self.stages
+                if name not in order and self.dependencies[name] <= set(order)
+            ]
+        return order
+
+    def run(self):
+        """
+        Returns {stage name: {"status", "seconds"[, "error"]}} where status is
+        "ran", "cached", "failed" or "blocked" (an upstream stage failed).
+        """
+        results = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while len(results) < len(self.stages):
+                for name, stage in self.stages.items():
+                    if name in results or name in running.values():
+                        continue
+                    deps = self.dependencies[name]
+                    if any(results.get(dep, {}).get("status") in ("failed", "blocked") for dep in deps):
+                        results[name] = {"status": "blocked", "seconds": 0.0}
+                        click.echo(f"⏭️ {name}: blocked by a failed upstream stage")
+                    elif all(dep in results for dep in deps):
+                        click.echo(f"🔸 {name}: checking inputs...")
+                        running[executor.submit(self._execute, stage)] = name
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        status, seconds = future.result()
+                        results[name] = {"status": status, "seconds": round(seconds, 2)}
+                        if status == "cached":
+                            click.echo(f"♻️ {name}: inputs unchanged, skipped")
+                        else:
+                            click.echo(f"✅ {name}: finished in {seconds:.1f}s")
+                    except Exception as e:
+                        results[name] = {"status": "failed", "seconds": 0.0, "error": str(e)}
+                        click.echo(f"❌ {name} failed: {e}")
+        return results
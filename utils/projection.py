@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+
+import joblib
+import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.random_projection import GaussianRandomProjection
+
+from utils.embedding_store import read_meta
+from utils.thresholds import predict_scores
+
+PROJECTION_FILE = "data/models/embedding_projection.pkl"
+# Written next to a model trained on projected features: which projection it needs
+PROJECTION_RECORD_SUFFIX = "_projection.json"
+PROJECTION_METHODS = ("pca", "random", "none")
+STORAGE_DTYPES = ("float16", "float32")
+
+
+class EmbeddingProjection:
+    """
+    Reduces sentence embeddings with PCA or a Gaussian random projection fitted
+    on the training set and stores them in a compact dtype. "none" keeps every
+    dimension and only changes the storage dtype.
+    """
+
+    def __init__(self, method="pca", n_components=128, dtype="float16", random_state=42):
+        self.method = method
+        self.n_components = n_components
+        self.dtype = dtype
+        self.random_state = random_state
+
+    def fit(self, X):
+        self.n_features_in_ = X.shape[1]
+        if self.method == "pca":
+            self.projector_ = PCA(
+                n_components=self.n_components,
+                svd_solver="randomized",
+                random_state=self.random_state,
+            ).fit(np.asarray(X, dtype=np.float32))
+        elif self.method == "random":
+            self.projector_ = GaussianRandomProjection(
+                n_components=self.n_components, random_state=self.random_state
+            ).fit(X)
+        else:
+            self.projector_ = None
+        self.n_components_ = self.n_components if self.projector_ else self.n_features_in_
+        return self
+
+    def transform(self, X, chunk_size=65536):
+        projected = np.empty((len(X), self.n_components_), dtype=self.dtype)
+        for start in range(0, len(X), chunk_size):
+            chunk = np.asarray(X[start : start + chunk_size], dtype=np.float32)
+            if self.projector_ is not None:
+                chunk = self.projector_.transform(chunk)
+            projected[start : start + chunk_size] = chunk
+        return projected
+
+
+class ProjectedModel:
+    """
+    Wraps a model trained on projected features so it can be fed raw embeddings.
+    Scores keep the inner model's scale, so its thresholds still apply.
+    """
+
+    def __init__(self, model, projection):
+        self.model = model
+        self.projection = projection
+        self.n_features_in_ = projection.n_features_in_
+
+    def predict_proba(self, X):
+        return predict_scores(self.model, self.projection.transform(X))
+
+    def predict(self, X):
+        return self.model.predict(self.projection.transform(X))
+
+    def __getattr__(self, name):
+        # Exposes the inner model's fitted attributes, e.g. thresholds_.
+        if name in ("model", "projection"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def load_projection(path=PROJECTION_FILE):
+    """
+    Loads the persisted projection, or None when features were never projected.
+    """
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
+
+
+def projection_fingerprint(path):
+    """
+    SHA-256 of a saved projection file, so a re-fitted projection is told
+    apart from the one a model was trained on even at the same width.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def projection_record_path(model_file):
+    return os.path.splitext(model_file)[0] + PROJECTION_RECORD_SUFFIX
+
+
+def read_projection_record(model_file):
+    path = projection_record_path(model_file)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def record_projection(model_file, train_file):
+    """
+    Notes next to model_file which projection produced its training features
+    (as recorded by project-embeddings in the feature store), or removes a
+    stale note when the model was trained on raw embeddings.
+    Returns the record, or None.
+    """
+    meta = read_meta(train_file) if os.path.isdir(train_file) else None
+    path = projection_record_path(model_file)
+    if not meta or not meta.get("projection_file"):
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    record = {"file": meta["projection_file"], "sha256": meta["projection_sha256"]}
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+    return record
+
+
+def load_model_projection(model_file):
+    """
+    Loads the exact projection model_file was trained on. Models without a
+    record fall back to the default projection file.
+    """
+    record = read_projection_record(model_file)
+    if record is None:
+        return load_projection()
+    if not os.path.exists(record["file"]):
+        raise FileNotFoundError(f"projection {record['file']} used by {model_file} is missing")
+    if projection_fingerprint(record["file"]) != record["sha256"]:
+        raise ValueError(
+            f"projection {record['file']} was re-fitted after {model_file} was trained; "
+            "retrain the model on the new projected features"
+        )
+    return joblib.load(record["file"])
+
+
+def with_projection(model, n_features, projection):
+    """
+    Wraps model when it expects the projection's output width instead of raw embeddings.
+    """
+    if (
+        projection is not None
+        and projection.n_components_ != projection.n_features_in_
+        and n_features == projection.n_components_
+    ):
+        return ProjectedModel(model, projection)
+    return model
@@ -0,0 +1,259 @@
+import json
+import os
+import time
+from functools import lru_cache
+
+import click
+import numpy as np
+
+from constants import dempe_class_names
+from utils.encoding import EncodingService
+from utils.helper import load_model_artifact
+from utils.projection import (
+    PROJECTION_FILE,
+    ProjectedModel,
+    load_model_projection,
+    read_projection_record,
+    with_projection,
+)
+from utils.thresholds import predict_scores, thresholds_path
+
+MANIFEST_FILE = "data/models/manifest.json"
+ENCODER_NAME_FILE = "data/models/sentence_bert_model_name.txt"
+DEFAULT_ENCODER = "all-MiniLM-L6-v2"
+FEATURE_DTYPE = "float32"
+
+# Registry key -> (display name, model file, params file, summary metrics file).
+# The order fixes the menu numbers shown by predict-dempe.
+REGISTERED_MODELS = {
+    "lg_ovr": (
+        "Logistic Regression (OvR)",
+        "data/models/logreg_ovr_model.pkl",
+        "data/models/logreg_ovr_params.json",
+        "data/reports/lg_ovr/Logistic Regression_summary_metrics.json",
+    ),
+    "rf_ovr": (
+        "Random Forest (OvR)",
+        "data/models/rf_ovr_model.pkl",
+        "data/models/rf_ovr_params.json",
+        "data/reports/random_forest_ovr/Random forest_summary_metrics.json",
+    ),
+    "gbm_ovr": (
+        "XGBoost/LightGBM (OvR)",
+        "data/models/gbm_ovr_model.pkl",
+        "data/models/gbm_ovr_params.json",
+        "data/reports/gbm_ovr/XGBoost_summary_metrics.json",
+    ),
+    "nn": (
+        "Neural Network",
+        "data/models/nn_multilabel_model.h5",
+        "data/models/nn_multilabel_params.json",
+        "data/reports/nn/Neural Network_summary_metrics.json",
+    ),
+    "classifier_chain": (
+        "Classifier Chain",
+        "data/models/classifier_chain_model.pkl",
+        "data/models/classifier_chain_params.json",
+        "data/reports/classifier_chain/classifier Chain_summary_metrics.json",
+    ),
+    "linear_head": (
+        "Linear Head (Ridge)",
+        "data/models/linear_head_model.pkl",
+        "data/models/linear_head_params.json",
+        "data/reports/linear_head/Linear Head_summary_metrics.json",
+    ),
+}
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_encoder_name(path=ENCODER_NAME_FILE):
+    """
+    Returns the Sentence-BERT model the embeddings were produced with.
+    """
+    if not os.path.exists(path):
+        return DEFAULT_ENCODER
+    with open(path) as f:
+        return f.read().strip() or DEFAULT_ENCODER
+
+
+def n_model_features(model):
+    """
+    Returns the embedding width a trained model expects.
+    """
+    if hasattr(model, "n_features_in_"):
+        return int(model.n_features_in_)
+    if hasattr(model, "coef_"):
+        return int(model.coef_.shape[0])
+    return int(model.input_shape[-1])
+
+
+def load_registered_model(model_file):
+    """
+    Loads a model artifact ready for raw encoder output: models trained on
+    projected features get the projection they were trained on applied in front.
+    """
+    model = load_model_artifact(model_file)
+    return with_projection(model, n_model_features(model), load_model_projection(model_file))
+
+
+def benchmark_model(model_file, repeats=5, batch_rows=1024):
+    """
+    Measures cold load time, single-message latency and batch throughput of a
+    model artifact on random embeddings.
+    Returns the benchmark dict, the loaded model and its label count.
+    """
+    start = time.perf_counter()
+    model = load_registered_model(model_file)
+    load_sec = time.perf_counter() - start
+
+    n_features = n_model_features(model)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(batch_rows, n_features)).astype(FEATURE_DTYPE)
+    n_labels = predict_scores(model, X[:1]).shape[1]  # warm-up
+
+    single = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_scores(model, X[:1])
+        single.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predict_scores(model, X, batch_size=batch_rows)
+    batch_sec = time.perf_counter() - start
+
+    benchmarks = {
+        "load_sec": round(load_sec, 4),
+        "predict_one_ms": round(float(np.median(single)) * 1000, 3),
+        "predict_batch_rows_per_sec": round(batch_rows / batch_sec, 1),
+    }
+    return benchmarks, model, n_labels
+
+
+def build_manifest(encoder_file=ENCODER_NAME_FILE, benchmark=True):
+    """
+    Describes every registered model whose artifact exists: encoder, label
+    columns, thresholds, feature dtype, test metrics and latency benchmarks.
+    Artifacts that fail to load or predict are left out with a warning and
+    listed under "skipped", so one broken model does not hide the others.
+    """
+    encoder = read_encoder_name(encoder_file)
+    models = {}
+    skipped = {}
+    for key, (name, model_file, params_file, metrics_file) in REGISTERED_MODELS.items():
+        if not os.path.exists(model_file):
+            continue
+
+        params = _read_json(params_file) or {}
+        calibration = _read_json(thresholds_path(model_file)) or {}
+        label_columns = params.get("label_columns") or calibration.get("label_columns")
+        entry = {
+            "name": name,
+            "model_file": model_file,
+            "encoder": encoder,
+            "feature_dtype": FEATURE_DTYPE,
+            "label_columns": label_columns,
+            "thresholds": calibration.get("thresholds"),
+            "metrics": _read_json(metrics_file),
+        }
+        if benchmark:
+            try:
+                entry["benchmarks"], model, n_labels = benchmark_model(model_file)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                click.echo(f"⚠️ Skipping {name}: {model_file} could not be loaded ({error})")
+                skipped[key] = {"name": name, "model_file": model_file, "error": error}
+                continue
+            entry["n_features"] = n_model_features(model)
+            if isinstance(model, ProjectedModel):
+                projection = model.projection
+                record = read_projection_record(model_file) or {"file": PROJECTION_FILE}
+                entry["projection"] = {
+                    "file": record["file"],
+                    "sha256": record.get("sha256"),
+                    "method": projection.method,
+                    "n_components": projection.n_components_,
+                    "dtype": projection.dtype,
+                }
+            label_columns = label_columns or list(dempe_class_names)[:n_labels]
+        # Artifacts shipped without training details use the standard DEMPE columns.
+        entry["label_columns"] = label_columns or list(dempe_class_names)
+        models[key] = entry
+
+    return {"encoder": encoder, "models": models, "skipped": skipped}
+
+
+def write_manifest(manifest, path=MANIFEST_FILE):
+    """
+    Writes the model manifest as JSON.
+    """
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def load_manifest(path=MANIFEST_FILE):
+    """
+    Reads the model manifest, building a benchmark-free one on the fly when it
+    has not been written yet.
+    """
+    manifest = _read_json(path)
+    if manifest is None:
+        manifest = build_manifest(benchmark=False)
+    return manifest
+
+
+def refresh_manifest_thresholds(path=MANIFEST_FILE):
+    """
+    Copies freshly calibrated thresholds into an existing manifest without
+    re-running the benchmarks.
+    """
+    manifest = _read_json(path)
+    if manifest is None:
+        return None
+    for entry in manifest["models"].values():
+        calibration = _read_json(thresholds_path(entry["model_file"])) or {}
+        entry["thresholds"] = calibration.get("thresholds", entry["thresholds"])
+    return write_manifest(manifest, path)
+
+
+def model_choices(manifest):
+    """
+    Maps stable menu numbers to the registry keys available in the manifest.
+    """
+    return {
+        number: key
+        for number, key in enumerate(REGISTERED_MODELS, start=1)
+        if key in manifest["models"]
+    }
+
+
+@lru_cache(maxsize=None)
+def get_model(model_file):
+    """
+    Loads a model artifact once per process.
+    """
+    return load_registered_model(model_file)
+
+
+@lru_cache(maxsize=None)
+def get_encoder(encoder_name):
+    """
+    Loads a Sentence-BERT encoder once per process.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(encoder_name)
+
+
+@lru_cache(maxsize=None)
+def get_encoding_service(encoder_name):
+    """
+    Wraps the cached encoder in a length-bucketed encoding service.
+    """
+    return EncodingService(get_encoder(encoder_name))
@@ -0,0 +1,194 @@
+import csv
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from constants import dempe_conv_commit_mapping
+
+COMMIT_TYPES = [tag for tag in dempe_conv_commit_mapping if " " not in tag]
+SCOPES = ["api", "cli", "core", "deps", "docs", "auth", "ui", "db", "parser", "build"]
+WORDS = (
+    "add update remove fix refactor improve handle support rename move cache "
+    "config parser login crash menu readme pipeline endpoint token model test "
+    "build release version error timeout memory dependency query user client "
+    "server schema validation logging metrics docker workflow script layout"
+).split()
+NON_CONVENTIONAL_TEMPLATES = [
+    "Merge pull request #{n} from {user}/{branch}",
+    "Merge branch '{branch}' into main",
+    "Update {file}",
+    "{Verb} {words}",
+    "wip",
+    "{words}",
+    "Initial commit",
+]
+FILES = ["README.md", "setup.py", "requirements.txt", "main.py", ".gitignore", "Dockerfile"]
+USERS = ["alice", "bob", "carol", "dave", "erin"]
+
+
+def _chunk_messages(rng, size, conventional_ratio):
+    # Every random choice of the chunk is drawn up front in a few vectorized
+    # calls; the loop below only assembles strings.
+    words = np.array(WORDS, dtype=object)
+    subject = words[rng.integers(0, len(WORDS), size=(size, 8))]
+    n_words = rng.integers(2, 9, size=size)
+    body = words[rng.integers(0, len(WORDS), size=(size, 3, 6))]
+    n_bullets = np.where(rng.random(size) < 0.25, rng.integers(1, 4, size=size), 0)
+    is_conventional = rng.random(size) < conventional_ratio
+    commit_type = rng.integers(0, len(COMMIT_TYPES), size=size)
+    scope = np.where(rng.random(size) < 0.4, rng.integers(0, len(SCOPES), size=size), -1)
+    breaking = rng.random(size)
+    template = rng.integers(0, len(NON_CONVENTIONAL_TEMPLATES), size=size)
+    numbers = rng.integers(1, 5000, size=size)
+
+    messages = []
+    for i in range(size):
+        text = " ".join(subject[i, : n_words[i]])
+        if not is_conventional[i]:
+            messages.append(
+                NON_CONVENTIONAL_TEMPLATES[template[i]].format(
+                    n=numbers[i],
+                    user=USERS[numbers[i] % len(USERS)],
+                    branch=f"{subject[i, 0]}-{numbers[i] % 100}",
+                    file=FILES[numbers[i] % len(FILES)],
+                    Verb=subject[i, 0].capitalize(),
+                    words=text,
+                )
+            )
+            continue
+        message = COMMIT_TYPES[commit_type[i]]
+        if scope[i] >= 0:
+            message += f"({SCOPES[scope[i]]})"
+        if breaking[i] < 0.03:
+            message += "!"
+        message += f": {text}"
+        if n_bullets[i]:
+            message += "\n\n" + "\n".join(
+                "- " + " ".join(body[i, b, : 2 + b]) for b in range(n_bullets[i])
+            )
+        if breaking[i] < 0.02:
+            message += f"\n\nBREAKING CHANGE: {' '.join(body[i, 0, :4])}"
+        messages.append(message)
+    return messages
+
+
+def iter_commit_messages(n_commits, conventional_ratio=0.6, seed=0, chunk_size=100_000):
+    """
+    Yields lists of synthetic commit messages, chunk_size at a time, so even
+    millions of messages never sit in memory at once. The stream is fully
+    determined by the arguments.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_commits, chunk_size):
+        yield _chunk_messages(rng, min(chunk_size, n_commits - start), conventional_ratio)
+
+
+def commit_messages(n_commits, conventional_ratio=0.6, seed=0):
+    """
+    Returns n_commits deterministic synthetic commit messages: conventional
+    commits (type, optional scope, bullet bodies, breaking-change footers)
+    mixed with merges, "Update README.md" style and free-form messages.
+    """
+    return [
+        message
+        for chunk in iter_commit_messages(n_commits, conventional_ratio, seed)
+        for message in chunk
+    ]
+
+
+def _user_object(login, user_id):
+    api = f"https://api.github.com/users/{login}"
+    return {
+        "login": login,
+        "id": user_id,
+        "node_id": f"MDQ6VXNlcj{user_id:08d}",
+        "avatar_url": f"https://avatars.githubusercontent.com/u/{user_id}?v=4",
+        "gravatar_id": "",
+        "url": api,
+        "html_url": f"https://github.com/{login}",
+        "followers_url": f"{api}/followers",
+        "following_url": f"{api}/following{{/other_user}}",
+        "gists_url": f"{api}/gists{{/gist_id}}",
+        "starred_url": f"{api}/starred{{/owner}}{{/repo}}",
+        "subscriptions_url": f"{api}/subscriptions",
+        "organizations_url": f"{api}/orgs",
+        "repos_url": f"{api}/repos",
+        "events_url": f"{api}/events{{/privacy}}",
+        "received_events_url": f"{api}/received_events",
+        "type": "User",
+        "user_view_type": "public",
+        "site_admin": False,
+    }
+
+
+def commit_records(messages, repo="synthetic/repo", start=None):
+    """
+    Wraps messages in full commit objects as returned by the GitHub REST
+    commits API (user objects, URLs, tree, parents, verification), newest
+    first, with deterministic SHAs and hourly author dates.
+    """
+    start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    api = f"https://api.github.com/repos/{repo}"
+    records = []
+    parent = None
+    for i, message in enumerate(messages):
+        sha = hashlib.sha1(f"{repo}:{i}".encode()).hexdigest()
+        tree = hashlib.sha1(f"{repo}:tree:{i}".encode()).hexdigest()
+        date = (start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        user = USERS[i % len(USERS)]
+        author = {"name": user, "email": f"{user}@example.com", "date": date}
+        user_object = _user_object(user, 1000 + i % len(USERS))
+        parents = []
+        if parent:
+            parents.append(
+                {
+                    "sha": parent,
+                    "url": f"{api}/commits/{parent}",
+                    "html_url": f"https://github.com/{repo}/commit/{parent}",
+                }
+            )
+        records.append(
+            {
+                "sha": sha,
+                "node_id": f"C_kwDO{sha[:24]}",
+                "commit": {
+                    "author": author,
+                    "committer": author,
+                    "message": message,
+                    "tree": {"sha": tree, "url": f"{api}/git/trees/{tree}"},
+                    "url": f"{api}/git/commits/{sha}",
+                    "comment_count": 0,
+                    "verification": {
+                        "verified": False,
+                        "reason": "unsigned",
+                        "signature": None,
+                        "payload": None,
+                        "verified_at": None,
+                    },
+                },
+                "url": f"{api}/commits/{sha}",
+                "html_url": f"https://github.com/{repo}/commit/{sha}",
+                "comments_url": f"{api}/commits/{sha}/comments",
+                "author": user_object,
+                "committer": user_object,
+                "parents": parents,
+            }
+        )
+        parent = sha
+    return records[::-1]
+
+
+def write_raw_commit_csv(path, n_commits, conventional_ratio=0.6, seed=0):
+    """
+    Streams synthetic messages into the CSV layout written by
+    extract-raw-commit-messages.
+    """
+    serial = 0
+    with open(path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
+        writer.writerow(["Serial Number", "Commit Message", "Label"])
+        for chunk in iter_commit_messages(n_commits, conventional_ratio, seed):
+            writer.writerows([serial + i, message, ""] for i, message in enumerate(chunk, start=1))
+            serial += len(chunk)
+    return serial
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+THRESHOLDS_SUFFIX = "_thresholds.json"
+
+
+def best_f1_thresholds(y_true, scores, default=0.5, sample_weight=None):
+    """
+    Finds the per-label decision threshold that maximises F1 in one vectorized
+    sweep over the sorted scores of every label. With sample_weight, each
+    sample counts that many times.
+    Returns the thresholds and the F1 reached with them.
+    """
+    y_true = np.asarray(y_true)
+    scores = np.asarray(scores, dtype=np.float64)
+    n_samples, n_labels = scores.shape
+
+    order = np.argsort(-scores, axis=0, kind="stable")
+    sorted_scores = np.take_along_axis(scores, order, axis=0)
+    sorted_true = np.take_along_axis(y_true, order, axis=0)
+    if sample_weight is None:
+        sorted_weight = np.ones((n_samples, 1))
+    else:
+        sorted_weight = np.asarray(sample_weight, dtype=np.float64)[order]
+
+    # Predicting the top k samples as positive gives F1 = 2TP / (k + P).
+    tp = np.cumsum(sorted_true * sorted_weight, axis=0)
+    k = np.cumsum(np.broadcast_to(sorted_weight, scores.shape), axis=0)
+    positives = (sorted_true * sorted_weight).sum(axis=0)
+    f1 = 2 * tp / (k + positives)
+
+    # Only cut between distinct scores, otherwise ties would be split.
+    valid = np.ones_like(f1, dtype=bool)
+    valid[:-1] = sorted_scores[:-1] != sorted_scores[1:]
+    f1 = np.where(valid, f1, -1.0)
+
+    best = np.argmax(f1, axis=0)
+    labels = np.arange(n_labels)
+    upper = sorted_scores[best, labels]
+    lower = sorted_scores[np.minimum(best + 1, n_samples - 1), labels]
+    thresholds = np.where(best < n_samples - 1, (upper + lower) / 2, upper)
+
+    best_f1 = f1[best, labels]
+    # Labels without positives carry no signal to calibrate on.
+    thresholds = np.where(positives > 0, thresholds, default)
+    best_f1 = np.where(positives > 0, best_f1, 0.0)
+    return thresholds, best_f1
+
+
+def thresholds_path(model_file):
+    """
+    Returns the path of the thresholds file stored next to a model artifact.
+    """
+    return os.path.splitext(model_file)[0] + THRESHOLDS_SUFFIX
+
+
+def save_thresholds(model_file, thresholds, label_cols, best_f1=None, n_samples=None):
+    """
+    Persists calibrated per-label thresholds next to the model artifact.
+    """
+    path = thresholds_path(model_file)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "label_columns": list(label_cols),
+                "thresholds": [float(t) for t in thresholds],
+                "calibration_f1": None
+                if best_f1 is None
+                else [float(v) for v in best_f1],
+                "calibration_samples": n_samples,
+            },
+            f,
+            indent=2,
+        )
+    return path
+
+
+def load_thresholds(model_file):
+    """
+    Loads the thresholds stored next to a model artifact, or None if the
+    model was never calibrated.
+    """
+    path = thresholds_path(model_file)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return np.asarray(json.load(f)["thresholds"])
+
+
+def _is_keras_model(model):
+    # A loaded Keras model means TensorFlow is already imported; checking
+    # sys.modules keeps sklearn-only callers from importing it here.
+    tf = sys.modules.get("tensorflow")
+    return tf is not None and isinstance(model, tf.keras.Model)
+
+
+def predict_scores(model, X, batch_size=8192):
+    """
+    Computes per-label scores for any trained model in fixed-size batches.
+    Keras models return sigmoid outputs, sklearn models the positive class
+    probability and the ridge head its raw decision function.
+    """
+    # Imported here so loading thresholds never pulls in the model classes.
+    from utils.linear_head import RidgeMultilabelHead
+
+    chunks = []
+    for start in range(0, len(X), batch_size):
+        X_batch = X[start : start + batch_size]
+        if isinstance(model, RidgeMultilabelHead):
+            scores = model.decision_function(X_batch)
+        elif hasattr(model, "predict_proba"):
+            scores = model.predict_proba(X_batch)
+            if isinstance(scores, list):
+                scores = np.column_stack([proba[:, -1] for proba in scores])
+        elif _is_keras_model(model):
+            # Calling a Keras model directly skips predict()'s per-call setup.
+            scores = model(X_batch, training=False)
+        else:
+            raise TypeError(
+                f"cannot score {type(model).__name__}: expected a Keras model, the ridge "
+                "head or an estimator with predict_proba"
+            )
+        chunks.append(np.asarray(scores, dtype=np.float32))
+    return np.vstack(chunks)
+
+
+def apply_thresholds(scores, thresholds=None, default=0.5):
+    """
+    Turns per-label scores into 0/1 predictions (score >= threshold).
+    """
+    if thresholds is None:
+        thresholds = default
+    return (np.asarray(scores) >= np.asarray(thresholds)).astype(int)
+
+
+def resolve_thresholds(model, thresholds=None, default=0.5):
+    """
+    Picks the thresholds to cut a model's scores at: the stored calibration,
+    else the model's own (ridge head), else the default.
+    """
+    if thresholds is not None:
+        return np.asarray(thresholds)
+    own = getattr(model, "thresholds_", None)
+    return default if own is None else own
+
+
+def predict_labels(model, X, thresholds=None, batch_size=8192):
+    """
+    Predicts 0/1 labels with calibrated thresholds. Without stored thresholds the
+    ridge head falls back to its own and every other model to 0.5.
+    """
+    return apply_thresholds(
+        predict_scores(model, X, batch_size), resolve_thresholds(model, thresholds)
+    )